@@ -1,14 +1,141 @@
+import os
+from contextlib import contextmanager
+from dotenv import load_dotenv
 from sqlmodel import SQLModel, create_engine, Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from Models.models import StatusPedido, StatusPedidoEnum
-from sqlalchemy import select
+from Utils.busca import criar_indices_busca
+from Utils.metricas import instrumentar_engine
+from Utils.rollups import inicializar_rollups
+from sqlalchemy import select, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
 
-DATABASE_URL = "sqlite:///database.db"
-engine = create_engine(DATABASE_URL)
+load_dotenv()
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///database.db")
+
+# Configuração do pool (ignorada pelo SQLite em memória)
+POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))
+MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+
+# Com DB_ASYNC=true as rotas usam AsyncSession (aiosqlite ou asyncpg) em vez do threadpool
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+DRIVERS_ASYNC = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+# PRAGMAs aplicados em cada nova conexão SQLite. WAL permite leituras concorrentes
+# com um escritor e busy_timeout faz o escritor esperar em vez de falhar com
+# "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", 5000)),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", -64000)),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", 268435456)),
+    "temp_store": os.getenv("SQLITE_TEMP_STORE", "MEMORY"),
+}
+
+def aplicar_pragmas_sqlite(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, valor in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={valor}")
+    cursor.close()
+
+def iniciar_transacao_sqlite(conexao):
+    # O pysqlite só abre a transação no primeiro INSERT/UPDATE/DELETE, e não antes
+    # de um SAVEPOINT: numa gravação em lote com um savepoint por registro, cada
+    # RELEASE virava um commit. Sessões com a execution option escrita_imediata
+    # começam com BEGIN IMMEDIATE: os savepoints ficam dentro de uma transação só,
+    # e a trava de escrita é obtida no início, esperando o busy_timeout, em vez de
+    # falhar na hora ao promover para escrita uma transação que já leu.
+    # As demais sessões mantêm o comportamento padrão do driver.
+    if conexao.get_execution_options().get("escrita_imediata", False):
+        conexao.exec_driver_sql("BEGIN IMMEDIATE")
+
+def parametros_pool(url_banco) -> dict:
+    # Parâmetros do pool comuns aos engines síncrono e assíncrono
+    parametros = {"echo": DB_ECHO}
+
+    if url_banco.get_backend_name() == "sqlite":
+        if url_banco.database in (None, "", ":memory:"):
+            parametros["poolclass"] = StaticPool
+        else:
+            parametros.update(pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_timeout=POOL_TIMEOUT)
+    else:
+        parametros.update(
+            pool_size=POOL_SIZE,
+            max_overflow=MAX_OVERFLOW,
+            pool_timeout=POOL_TIMEOUT,
+            pool_recycle=POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+    return parametros
+
+def criar_engine(url: str = DATABASE_URL, **opcoes):
+    # Cria o engine para SQLite ou PostgreSQL com as configurações de pool do .env
+    url_banco = make_url(url)
+    parametros = parametros_pool(url_banco)
+
+    if url_banco.get_backend_name() == "sqlite":
+        parametros["connect_args"] = {
+            "check_same_thread": False,
+            "timeout": SQLITE_PRAGMAS["busy_timeout"] / 1000,
+        }
+
+    parametros.update(opcoes)
+    novo_engine = create_engine(url, **parametros)
+
+    if url_banco.get_backend_name() == "sqlite":
+        event.listen(novo_engine, "connect", aplicar_pragmas_sqlite)
+        event.listen(novo_engine, "begin", iniciar_transacao_sqlite)
+
+    return novo_engine
+
+def criar_engine_async(url: str = DATABASE_URL, **opcoes):
+    # Mesmo banco e configurações do engine síncrono, trocando o driver pelo assíncrono
+    url_banco = make_url(url)
+    backend = url_banco.get_backend_name()
+    url_async = url_banco.set(drivername=f"{backend}+{DRIVERS_ASYNC[backend]}")
+    parametros = parametros_pool(url_banco)
+    parametros.update(opcoes)
+    novo_engine = create_async_engine(url_async, **parametros)
+
+    if backend == "sqlite":
+        event.listen(novo_engine.sync_engine, "connect", aplicar_pragmas_sqlite)
+        event.listen(novo_engine.sync_engine, "begin", iniciar_transacao_sqlite)
+
+    return novo_engine
+
+engine = criar_engine()
+async_engine = criar_engine_async() if DB_ASYNC else None
+
+# Tempo, linhas e quantidade de comandos SQL por requisição (GET /metrics)
+instrumentar_engine(engine)
+if async_engine is not None:
+    instrumentar_engine(async_engine.sync_engine, "async")
+
+def metricas_pool(engine_banco=None) -> dict:
+    # Situação atual do pool de conexões
+    pool = (engine_banco or engine).pool
+    metricas = {"pool": type(pool).__name__, "status": pool.status()}
+    for nome, metodo in (("tamanho", "size"), ("em_uso", "checkedout"),
+                         ("disponiveis", "checkedin"), ("overflow", "overflow")):
+        if hasattr(pool, metodo):
+            metricas[nome] = getattr(pool, metodo)()
+    return metricas
 
 def get_session():
     with Session(engine) as session:
         yield session
 
+async def get_async_session():
+    async with AsyncSession(async_engine) as session:
+        yield session
+
 def criar_status_padrao(session):
     status_padrao = [
         StatusPedido(
@@ -46,8 +173,69 @@ def criar_status_padrao(session):
     
     session.commit()
 
+def criar_indices(engine_banco=None):
+    # create_all só cria índices junto com tabelas novas. Para bancos já existentes
+    # (ex.: database.db) os índices declarados nos modelos que faltarem são criados aqui.
+    with (engine_banco or engine).begin() as conexao:
+        for tabela in SQLModel.metadata.sorted_tables:
+            for indice in tabela.indexes:
+                indice.create(conexao, checkfirst=True)
+
 def create_db_and_tables():
     SQLModel.metadata.create_all(engine)
+    criar_indices()
+    criar_indices_busca(engine)
     
     with Session(engine) as session:
         criar_status_padrao(session)
+    inicializar_rollups(engine)
+
+# Chave do pg_advisory_lock da inicialização no PostgreSQL
+CHAVE_TRAVA_INICIALIZACAO = 7_260_001
+
+@contextmanager
+def trava_inicializacao(engine_banco=None):
+    # Exclusão mútua entre processos durante a inicialização do banco: flock num
+    # arquivo ao lado do banco SQLite, pg_advisory_lock no PostgreSQL
+    engine_banco = engine_banco or engine
+    url_banco = engine_banco.url
+    if url_banco.get_backend_name() == "sqlite":
+        if url_banco.database in (None, "", ":memory:"):
+            yield
+            return
+        try:
+            import fcntl
+        except ImportError:
+            # Sem flock (Windows): roda sem trava, como um processo só
+            yield
+            return
+        with open(f"{url_banco.database}.init.lock", "a") as arquivo:
+            fcntl.flock(arquivo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(arquivo, fcntl.LOCK_UN)
+        return
+
+    with engine_banco.connect() as conexao:
+        conexao.execute(text("SELECT pg_advisory_lock(:chave)"), {"chave": CHAVE_TRAVA_INICIALIZACAO})
+        conexao.commit()
+        try:
+            yield
+        finally:
+            conexao.execute(text("SELECT pg_advisory_unlock(:chave)"), {"chave": CHAVE_TRAVA_INICIALIZACAO})
+            conexao.commit()
+
+def inicializar_banco() -> bool:
+    # Tabelas, índices, status padrão e rollups, sob a trava de inicialização.
+    # O entrypoint com vários workers (servidor.py, gunicorn.conf.py) chama esta
+    # função antes de criar os processos e marca BANCO_INICIALIZADO=1, que os
+    # workers herdam e então pulam a etapa: a inicialização roda uma vez só.
+    # Sem a marca (ex.: uvicorn --workers direto) cada worker inicializa, um de
+    # cada vez; os seguintes só confirmam que está tudo criado.
+    if os.getenv("BANCO_INICIALIZADO") == "1":
+        return False
+    with trava_inicializacao():
+        create_db_and_tables()
+    os.environ["BANCO_INICIALIZADO"] = "1"
+    return True
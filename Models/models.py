@@ -1,17 +1,20 @@
 from sqlmodel import SQLModel, Field, Relationship
-from datetime import datetime
+from datetime import date, datetime
 from typing import Optional, List, TypeVar, Generic
 from pydantic import BaseModel
+from sqlalchemy import Index, text
 from enum import Enum
 
 T = TypeVar('T')
 
 class PaginatedResponse(BaseModel, Generic[T]):
     items: List[T]
-    total: int
-    page: int
+    total: Optional[int] = None
+    page: Optional[int] = None
     size: int
-    pages: int
+    pages: Optional[int] = None
+    # Preenchido na paginação por cursor; None quando não há próxima página
+    next_cursor: Optional[str] = None
 
     class Config:
         arbitrary_types_allowed = True
@@ -19,6 +22,10 @@ class PaginatedResponse(BaseModel, Generic[T]):
 
 class Cliente(SQLModel, table=True):
     __tablename__ = "cliente"
+    __table_args__ = (
+        # clientes_por_estado usa LIKE; no SQLite só um índice NOCASE atende LIKE sem curinga
+        Index("ix_cliente_estado_nocase", text("estado COLLATE NOCASE")).ddl_if(dialect="sqlite"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     nome: str
     data_nascimento: str
@@ -26,18 +33,19 @@ class Cliente(SQLModel, table=True):
     telefone: str
     endereco: str
     cidade: str
-    estado: str
+    estado: str = Field(index=True)
     cep: str
     
-    # Modificando a relação para usar List["Pedido"] com ForwardRef
-    pedidos: List["Pedido"] = Relationship(back_populates="cliente", sa_relationship_kwargs={"lazy": "selectin"})
+    # Carregamento preguiçoso: as rotas que precisam dos pedidos os buscam
+    # explicitamente (?include=pedidos, Utils.respostas.pedidos_recentes)
+    pedidos: List["Pedido"] = Relationship(back_populates="cliente")
 
 class Produto(SQLModel, table=True):
     __tablename__ = "produto"
     id: Optional[int] = Field(default=None, primary_key=True)
     nome: str
-    categoria: str
-    preco: float
+    categoria: str = Field(index=True)
+    preco: float = Field(index=True)
     estoque: int
     
     itens: List["ItemPedido"] = Relationship(back_populates="produto")
@@ -60,21 +68,86 @@ class StatusPedido(SQLModel, table=True):
 
 class Pedido(SQLModel, table=True):
     __tablename__ = "pedido"
+    __table_args__ = (
+        # Histórico de pedidos do cliente; também atende filtros só por cliente_id
+        Index("ix_pedido_cliente_data", "cliente_id", "data_pedido"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     cliente_id: Optional[int] = Field(foreign_key="cliente.id")
-    status_id: Optional[int] = Field(foreign_key="status_pedido.id")
-    data_pedido: datetime = Field(default_factory=datetime.now)
+    status_id: Optional[int] = Field(foreign_key="status_pedido.id", index=True)
+    data_pedido: datetime = Field(default_factory=datetime.now, index=True)
     valor_total: float
     
     cliente: Optional["Cliente"] = Relationship(back_populates="pedidos")
     status: Optional[StatusPedido] = Relationship(back_populates="pedidos")
     itens: List["ItemPedido"] = Relationship(back_populates="pedido")
 
+class Contador(SQLModel, table=True):
+    # Contagens mantidas pelas rotas na mesma transação dos inserts/deletes.
+    # categoria "*" guarda o total da tabela.
+    __tablename__ = "contador"
+    tabela: str = Field(primary_key=True)
+    categoria: str = Field(default="*", primary_key=True)
+    quantidade: int
+
+class VendaDiariaProduto(SQLModel, table=True):
+    # Rollup diário por produto, mantido junto com as gravações de pedidos (Utils.rollups).
+    # cancelado separa o que os relatórios excluem por padrão.
+    __tablename__ = "venda_diaria_produto"
+    dia: date = Field(primary_key=True)
+    produto_id: int = Field(primary_key=True)
+    cancelado: bool = Field(default=False, primary_key=True)
+    quantidade: int = 0
+    receita: float = 0
+    pedidos: int = 0
+
+class VendaDiariaEstado(SQLModel, table=True):
+    # Rollup diário por estado do cliente; pedidos conta cada pedido uma vez
+    __tablename__ = "venda_diaria_estado"
+    dia: date = Field(primary_key=True)
+    estado: str = Field(primary_key=True)
+    cancelado: bool = Field(default=False, primary_key=True)
+    quantidade: int = 0
+    receita: float = 0
+    pedidos: int = 0
+
+class MarcaRollup(SQLModel, table=True):
+    # Maior pedido.id já refletido nos rollups pela atualização incremental em lote
+    __tablename__ = "marca_rollup"
+    nome: str = Field(primary_key=True)
+    ultimo_pedido_id: int = 0
+
+class Exportacao(SQLModel, table=True):
+    # Manifesto de cada GET /export: o SHA-256 e o total de linhas e bytes do corpo
+    # enviado só são conhecidos no fim do streaming
+    __tablename__ = "exportacao"
+    id: str = Field(primary_key=True)
+    entidade: str
+    formato: str
+    status: str = "em_andamento"
+    linhas: int = 0
+    bytes: int = 0
+    sha256: Optional[str] = None
+    iniciada_em: datetime = Field(default_factory=datetime.now)
+    concluida_em: Optional[datetime] = None
+
+class InvalidacaoCache(SQLModel, table=True):
+    # Canal de invalidação entre processos (Utils.invalidacao): cada commit que
+    # invalida caches grava aqui as chaves, e os demais workers as aplicam.
+    # AUTOINCREMENT no SQLite: ids nunca são reaproveitados depois da limpeza
+    __tablename__ = "invalidacao_cache"
+    __table_args__ = {"sqlite_autoincrement": True}
+    id: Optional[int] = Field(default=None, primary_key=True)
+    cache: str
+    # Chave serializada em JSON; None limpa o cache inteiro
+    chave: Optional[str] = None
+    criado_em: datetime = Field(default_factory=datetime.now, index=True)
+
 class ItemPedido(SQLModel, table=True):
     __tablename__ = "item_pedido"
     id: Optional[int] = Field(default=None, primary_key=True)
-    pedido_id: Optional[int] = Field(foreign_key="pedido.id")
-    produto_id: Optional[int] = Field(foreign_key="produto.id")
+    pedido_id: Optional[int] = Field(foreign_key="pedido.id", index=True)
+    produto_id: Optional[int] = Field(foreign_key="produto.id", index=True)
     quantidade: int
     preco_unitario: float
     
@@ -0,0 +1,182 @@
+"""
+Busca textual em clientes (nome, email) e produtos (nome, categoria).
+
+No SQLite usa tabelas FTS5 de conteúdo externo, mantidas por triggers na mesma
+transação dos INSERT/UPDATE/DELETE feitos pelas rotas. O tokenizer unicode61 com
+remove_diacritics ignora acentos ("joao" encontra "João") e os índices de prefixo
+atendem buscas pelo início das palavras.
+
+No PostgreSQL usa índices GIN com pg_trgm sobre unaccent(lower(coluna)), que o
+próprio banco mantém atualizados.
+
+Cargas grandes (Utils.importacao) desligam os triggers de uma entidade e
+reindexam tudo no final (indexacao_suspensa). A suspensão fica registrada em
+busca_suspensa na mesma transação que remove os triggers: se o processo cair no
+meio da carga, o próximo startup recria os triggers e reconstrói o índice.
+"""
+import re
+from contextlib import contextmanager
+from typing import List, Optional
+from sqlmodel import Session, select
+from sqlalchemy import Select, column, func, or_, table, text
+from Models.models import Cliente, Produto
+
+ENTIDADES = {
+    "cliente": (Cliente, ("nome", "email")),
+    "produto": (Produto, ("nome", "categoria")),
+}
+
+# Entidades com os triggers FTS desligados por uma carga em andamento (ou interrompida)
+CRIAR_BUSCA_SUSPENSA = "CREATE TABLE IF NOT EXISTS busca_suspensa (entidade TEXT PRIMARY KEY)"
+
+
+def _criar_fts_sqlite(conexao, entidade: str, colunas: tuple):
+    fts = f"{entidade}_fts"
+    existia = conexao.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (fts,)
+    ).first()
+
+    lista = ", ".join(colunas)
+    novos = ", ".join(f"new.{coluna}" for coluna in colunas)
+    antigos = ", ".join(f"old.{coluna}" for coluna in colunas)
+
+    conexao.exec_driver_sql(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5({lista}, content='{entidade}', "
+        f"content_rowid='id', tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+    )
+    conexao.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {entidade} BEGIN "
+        f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {novos}); END"
+    )
+    conexao.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {entidade} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); END"
+    )
+    conexao.exec_driver_sql(
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {lista} ON {entidade} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {lista}) VALUES ('delete', old.id, {antigos}); "
+        f"INSERT INTO {fts}(rowid, {lista}) VALUES (new.id, {novos}); END"
+    )
+
+    # Banco já existente: indexa as linhas gravadas antes da criação do índice.
+    # Suspensão registrada (carga interrompida): o índice ficou sem as linhas
+    # gravadas com os triggers desligados
+    conexao.exec_driver_sql(CRIAR_BUSCA_SUSPENSA)
+    suspensa = conexao.exec_driver_sql(
+        "SELECT 1 FROM busca_suspensa WHERE entidade = ?", (entidade,)
+    ).first()
+    if suspensa:
+        conexao.exec_driver_sql("DELETE FROM busca_suspensa WHERE entidade = ?", (entidade,))
+    if not existia or suspensa:
+        conexao.exec_driver_sql(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+
+
+def _criar_trigram_postgres(conexao, entidade: str, colunas: tuple):
+    for coluna in colunas:
+        conexao.exec_driver_sql(
+            f"CREATE INDEX IF NOT EXISTS ix_{entidade}_{coluna}_trgm ON {entidade} "
+            f"USING gin (f_unaccent(lower({coluna})) gin_trgm_ops)"
+        )
+
+
+def criar_indices_busca(engine_banco):
+    # Cria (se faltarem) os índices de busca; chamado em create_db_and_tables
+    with engine_banco.begin() as conexao:
+        if engine_banco.dialect.name == "sqlite":
+            for entidade, (_, colunas) in ENTIDADES.items():
+                _criar_fts_sqlite(conexao, entidade, colunas)
+        elif engine_banco.dialect.name == "postgresql":
+            conexao.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            conexao.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS unaccent")
+            # unaccent() não é IMMUTABLE e por isso não pode ser usada direto no índice
+            conexao.exec_driver_sql(
+                "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text AS "
+                "$$ SELECT public.unaccent('public.unaccent', $1) $$ "
+                "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT"
+            )
+            for entidade, (_, colunas) in ENTIDADES.items():
+                _criar_trigram_postgres(conexao, entidade, colunas)
+
+
+def reconstruir_indice_busca(session: Session, entidade: str):
+    # Reindexa todas as linhas (SQLite); útil após cargas feitas fora das rotas com triggers desativados
+    if session.get_bind().dialect.name == "sqlite":
+        fts = f"{entidade}_fts"
+        session.exec(text(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')"))
+        session.commit()
+
+
+@contextmanager
+def indexacao_suspensa(session: Session, entidade: str):
+    # Carga em massa (SQLite): remove os triggers FTS da entidade enquanto o bloco
+    # roda e, ao final, recria os triggers e reindexa a tabela inteira de uma vez,
+    # o que é bem mais rápido que atualizar o índice linha a linha. A reindexação
+    # também cobre o que as rotas gravaram nesse intervalo. O registro em
+    # busca_suspensa garante a reindexação no startup se o bloco não terminar.
+    if session.get_bind().dialect.name != "sqlite":
+        yield
+        return
+    fts = f"{entidade}_fts"
+    session.exec(text(CRIAR_BUSCA_SUSPENSA))
+    session.exec(
+        text("INSERT OR IGNORE INTO busca_suspensa (entidade) VALUES (:entidade)"), params={"entidade": entidade}
+    )
+    for sufixo in ("ai", "ad", "au"):
+        session.exec(text(f"DROP TRIGGER IF EXISTS {fts}_{sufixo}"))
+    session.commit()
+    try:
+        yield
+    except BaseException:
+        session.rollback()
+        raise
+    finally:
+        # Triggers, reindexação e remoção do registro numa transação só
+        _criar_fts_sqlite(session.connection(), entidade, ENTIDADES[entidade][1])
+        session.commit()
+
+
+def termo_fts(termo: str) -> str:
+    # "joão sil" -> '"joão"* "sil"*': cada palavra vira um prefixo entre aspas,
+    # então caracteres especiais do FTS5 digitados pelo usuário não quebram a consulta
+    return " ".join(f'"{palavra}"*' for palavra in re.findall(r"\w+", termo))
+
+
+def consulta_busca(session: Session, entidade: str, termo: str, limite: int = 50) -> Optional[Select]:
+    # SELECT das linhas mais relevantes para o termo, da melhor para a pior
+    # (None se o termo não tem palavras)
+    modelo, colunas = ENTIDADES[entidade]
+    consulta_fts = termo_fts(termo)
+    if not consulta_fts:
+        return None
+
+    dialeto = session.get_bind().dialect.name
+    if dialeto == "sqlite":
+        fts = table(f"{entidade}_fts", column("rowid"), column("rank"))
+        query = (
+            select(modelo)
+            .join(fts, fts.c.rowid == modelo.id)
+            .where(text(f"{entidade}_fts MATCH :termo").bindparams(termo=consulta_fts))
+            .order_by(fts.c.rank)
+            .limit(limite)
+        )
+    elif dialeto == "postgresql":
+        alvo = func.f_unaccent(func.lower(termo.strip()))
+        normalizadas = [func.f_unaccent(func.lower(getattr(modelo, coluna))) for coluna in colunas]
+        query = (
+            select(modelo)
+            .where(or_(*(coluna.contains(alvo) for coluna in normalizadas)))
+            .order_by(func.greatest(*(func.word_similarity(alvo, coluna) for coluna in normalizadas)).desc())
+            .limit(limite)
+        )
+    else:
+        query = (
+            select(modelo)
+            .where(or_(*(getattr(modelo, coluna).like(f"%{termo}%") for coluna in colunas)))
+            .limit(limite)
+        )
+    return query
+
+
+def buscar(session: Session, entidade: str, termo: str, limite: int = 50) -> List:
+    query = consulta_busca(session, entidade, termo, limite)
+    return session.exec(query).all() if query is not None else []
@@ -0,0 +1,227 @@
+"""
+Cache de leitura (read-through) para o catálogo de produtos e os status de pedido.
+
+obter_ou_carregar() devolve o valor em cache ou chama a função de carga (uma
+consulta ao banco) e guarda o resultado. Backends:
+
+    memória  LRU com TTL no próprio processo (padrão)
+    redis    qualquer cliente compatível com redis-py (CACHE_URL=redis://...);
+             CACHE_URL=fakeredis:// usa o fakeredis, para testes e desenvolvimento
+
+Os status de pedido (seis linhas fixas) ficam sempre em memória, sem TTL, e são
+carregados no startup. Os produtos usam o backend configurado; alterações de
+produto e de estoque invalidam as chaves depois do commit da transação que as
+gravou (invalidar_apos_commit), e o TTL limita o tempo que uma leitura
+concorrente com a escrita pode manter um valor antigo.
+
+Os tokens de versão usados nos ETags (Utils.etag) também ficam aqui.
+
+Acertos, faltas e remoções por LRU/TTL de cada cache aparecem em GET /cache/metricas.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional
+import orjson
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SessionORM
+from Models.models import Produto
+
+# Segundos até um produto em cache expirar
+CACHE_TTL = float(os.getenv("CACHE_TTL", 60))
+
+# Máximo de entradas por cache em memória (LRU)
+CACHE_MAX_ITENS = int(os.getenv("CACHE_MAX_ITENS", 10_000))
+
+# Vazio: cache em memória; redis://...: Redis; fakeredis://: fakeredis
+CACHE_URL = os.getenv("CACHE_URL", "")
+
+
+class CacheMemoria:
+    def __init__(self, max_itens: int = CACHE_MAX_ITENS, ttl: Optional[float] = CACHE_TTL):
+        self.max_itens = max_itens
+        self.ttl = ttl
+        self.removidos_lru = 0
+        self.expirados = 0
+        self._itens: OrderedDict = OrderedDict()
+        self._trava = threading.Lock()
+
+    def obter(self, chave) -> Optional[Any]:
+        with self._trava:
+            entrada = self._itens.get(chave)
+            if entrada is None:
+                return None
+            valor, expira_em = entrada
+            if expira_em is not None and expira_em <= time.monotonic():
+                del self._itens[chave]
+                self.expirados += 1
+                return None
+            self._itens.move_to_end(chave)
+            return valor
+
+    def gravar(self, chave, valor):
+        expira_em = time.monotonic() + self.ttl if self.ttl is not None else None
+        with self._trava:
+            self._itens[chave] = (valor, expira_em)
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.max_itens:
+                self._itens.popitem(last=False)
+                self.removidos_lru += 1
+
+    def remover(self, chaves: Iterable):
+        with self._trava:
+            for chave in chaves:
+                self._itens.pop(chave, None)
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+
+    def metricas(self) -> dict:
+        return {
+            "backend": "memoria",
+            "itens": len(self._itens),
+            "max_itens": self.max_itens,
+            "ttl": self.ttl,
+            "removidos_lru": self.removidos_lru,
+            "expirados": self.expirados,
+        }
+
+
+class CacheRedis:
+    # Valores serializados com orjson; a expiração (e a remoção por memória,
+    # conforme a maxmemory-policy do servidor) fica a cargo do Redis
+    def __init__(self, cliente, prefixo: str, ttl: Optional[float] = CACHE_TTL):
+        self.cliente = cliente
+        self.prefixo = prefixo
+        self.ttl = ttl
+
+    def _chave(self, chave) -> str:
+        return f"{self.prefixo}:{chave}"
+
+    def obter(self, chave) -> Optional[Any]:
+        valor = self.cliente.get(self._chave(chave))
+        return orjson.loads(valor) if valor is not None else None
+
+    def gravar(self, chave, valor):
+        self.cliente.set(self._chave(chave), orjson.dumps(valor), px=int(self.ttl * 1000) if self.ttl else None)
+
+    def remover(self, chaves: Iterable):
+        chaves = [self._chave(chave) for chave in chaves]
+        if chaves:
+            self.cliente.delete(*chaves)
+
+    def limpar(self):
+        chaves = list(self.cliente.scan_iter(match=f"{self.prefixo}:*", count=1000))
+        if chaves:
+            self.cliente.delete(*chaves)
+
+    def metricas(self) -> dict:
+        return {"backend": "redis", "prefixo": self.prefixo, "ttl": self.ttl}
+
+
+def criar_backend(prefixo: str, ttl: Optional[float] = CACHE_TTL, url: str = CACHE_URL):
+    if not url:
+        return CacheMemoria(ttl=ttl)
+    if url.startswith("fakeredis://"):
+        import fakeredis
+        return CacheRedis(fakeredis.FakeRedis(), prefixo, ttl)
+    import redis
+    return CacheRedis(redis.Redis.from_url(url), prefixo, ttl)
+
+
+class Cache:
+    def __init__(self, nome: str, backend):
+        self.nome = nome
+        self.backend = backend
+        self.acertos = 0
+        self.faltas = 0
+        self.invalidacoes = 0
+
+    def obter_ou_carregar(self, chave, carregar: Callable[[], Optional[Any]]) -> Optional[Any]:
+        # None (registro inexistente) não é guardado
+        valor = self.backend.obter(chave)
+        if valor is not None:
+            self.acertos += 1
+            return valor
+        self.faltas += 1
+        valor = carregar()
+        if valor is not None:
+            self.backend.gravar(chave, valor)
+        return valor
+
+    def gravar(self, chave, valor):
+        self.backend.gravar(chave, valor)
+
+    def invalidar(self, chaves: Iterable):
+        chaves = list(chaves)
+        self.invalidacoes += len(chaves)
+        self.backend.remover(chaves)
+
+    def limpar(self):
+        self.invalidacoes += 1
+        self.backend.limpar()
+
+    def metricas(self) -> dict:
+        consultas = self.acertos + self.faltas
+        return {
+            "acertos": self.acertos,
+            "faltas": self.faltas,
+            "taxa_acerto": round(self.acertos / consultas, 4) if consultas else None,
+            "invalidacoes": self.invalidacoes,
+            **self.backend.metricas(),
+        }
+
+
+# Status de pedido: tabela fixa, sempre em memória e sem expiração
+status_cache = Cache("status_pedido", CacheMemoria(max_itens=64, ttl=None))
+produto_cache = Cache("produto", criar_backend("produto"))
+# Tokens de versão dos ETags (Utils.etag): sem TTL, expiram só por invalidação ou LRU
+versao_cache = Cache("versoes", criar_backend("versao", ttl=None))
+
+CACHES: Dict[str, Cache] = {cache.nome: cache for cache in (status_cache, produto_cache, versao_cache)}
+
+
+def metricas_cache() -> dict:
+    return {nome: cache.metricas() for nome, cache in CACHES.items()}
+
+
+# --- Invalidação transacional -------------------------------------------------------
+
+def invalidar_apos_commit(session, cache: Cache, chaves: Optional[Iterable] = None):
+    # Agenda a invalidação para depois do commit (chaves=None limpa o cache todo).
+    # Invalidar antes deixaria outra requisição recarregar o valor antigo do banco
+    # entre a invalidação e o commit; num rollback nada é invalidado.
+    pendentes = session.info.setdefault("cache_invalidar", {})
+    if chaves is None:
+        pendentes[cache.nome] = None
+    elif pendentes.get(cache.nome, set()) is not None:
+        pendentes.setdefault(cache.nome, set()).update(chaves)
+
+
+@event.listens_for(SessionORM, "after_commit")
+def _invalidar_pendentes(session):
+    for nome, chaves in session.info.pop("cache_invalidar", {}).items():
+        if chaves is None:
+            CACHES[nome].limpar()
+        else:
+            CACHES[nome].invalidar(chaves)
+
+
+@event.listens_for(SessionORM, "after_soft_rollback")
+def _descartar_pendentes(session, transacao_anterior):
+    if not session.in_transaction():
+        session.info.pop("cache_invalidar", None)
+
+
+# --- Produtos --------------------------------------------------------------------------
+
+def obter_produto(session, produto_id: int) -> Optional[Produto]:
+    # Produto desanexado da sessão, montado a partir do cache (ou do banco na falta)
+    def carregar():
+        produto = session.get(Produto, produto_id)
+        return produto.model_dump() if produto else None
+
+    dados = produto_cache.obter_ou_carregar(produto_id, carregar)
+    return Produto.model_validate(dados) if dados is not None else None
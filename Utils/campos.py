@@ -0,0 +1,59 @@
+"""
+Projeção de colunas (?fields=) nas rotas de listagem.
+
+?fields=id,nome devolve só esses campos. A consulta da rota vira um SELECT
+apenas dessas colunas (with_only_columns), executado direto na conexão: sem
+montar objetos do ORM nem passar pelo mapa de identidade, e a resposta sai com
+orjson, sem a validação do response_model. Coleções aninhadas (pedidos de um
+cliente, itens de um pedido) só são carregadas se estiverem em fields.
+
+O id sempre vem na resposta, mesmo fora de fields: é a chave da paginação por
+cursor e a referência para buscar o registro completo.
+"""
+from typing import Callable, Iterable, List, Optional
+from fastapi import HTTPException, Query
+from sqlalchemy import Select
+from sqlmodel import Session
+
+
+def colunas_do_modelo(modelo) -> List[str]:
+    return [coluna.name for coluna in modelo.__table__.columns]
+
+
+def parametro_campos(permitidos: Iterable[str]) -> Callable[..., Optional[List[str]]]:
+    # Dependência que lê ?fields= e devolve a lista de campos pedidos (com o id
+    # primeiro), ou None quando o parâmetro não foi enviado
+    permitidos = tuple(permitidos)
+    descricao = f"Campos da resposta, separados por vírgula: {', '.join(permitidos)} (o id sempre vem)"
+
+    def dependencia(fields: Optional[str] = Query(default=None, description=descricao)) -> Optional[List[str]]:
+        if fields is None:
+            return None
+        campos = [campo.strip() for campo in fields.split(",") if campo.strip()]
+        invalidos = [campo for campo in campos if campo not in permitidos]
+        if invalidos:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Campos inválidos: {', '.join(invalidos)}. Permitidos: {', '.join(permitidos)}"
+            )
+        return list(dict.fromkeys(["id", *campos]))
+
+    return dependencia
+
+
+def selecionar(session: Session, query: Select, modelo, campos: Optional[Iterable[str]] = None) -> List[dict]:
+    # Executa o SELECT da rota (filtros, ordem, limite) trocando as colunas pelas
+    # pedidas (todas as do modelo se campos for None). Campos que não são
+    # colunas do modelo (coleções) são ignorados aqui.
+    tabela = modelo.__table__
+    nomes = [campo for campo in campos if campo in tabela.c] if campos is not None else list(tabela.c.keys())
+    consulta = query.with_only_columns(*(tabela.c[nome] for nome in nomes))
+    return [dict(linha) for linha in session.connection().execute(consulta).mappings()]
+
+
+def projetar(itens: List[dict], campos: Optional[Iterable[str]]) -> List[dict]:
+    # Mantém só os campos pedidos em respostas já montadas como dicts
+    if campos is None:
+        return itens
+    campos = list(campos)
+    return [{campo: item[campo] for campo in campos if campo in item} for item in itens]
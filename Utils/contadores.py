@@ -0,0 +1,135 @@
+"""
+Contadores de linhas por tabela e por categoria de produto.
+
+As rotas chamam incrementar() na mesma transação em que inserem ou removem
+linhas, e as leituras de quantidade viram uma busca pela chave primária da
+tabela contador em vez de um COUNT(*) na tabela inteira.
+
+Invalidação e reconstrução (a partir da raiz do projeto):
+    python -m Utils.contadores --invalidar
+    python -m Utils.contadores --reconstruir
+"""
+import argparse
+from typing import Optional
+from sqlmodel import Session, select
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from Models.models import Cliente, Contador, Pedido, Produto
+
+TOTAL = "*"
+
+# Tabelas contadas e a coluna usada na contagem por categoria (se houver)
+TABELAS = {
+    "cliente": (Cliente, None),
+    "produto": (Produto, Produto.categoria),
+    "pedido": (Pedido, None),
+}
+
+
+def incrementar(session: Session, tabela: str, delta: int = 1, categoria: str = TOTAL):
+    # Chamado depois de inserir/remover as linhas, na mesma transação. Com o
+    # contador ausente (invalidado), grava a contagem da tabela, que já inclui as
+    # alterações desta transação; se outra transação o criar antes, o upsert soma
+    # o delta ao valor dela. Nenhum incremento se perde entre recálculo e gravação.
+    atualizados = session.exec(
+        update(Contador)
+        .where(Contador.tabela == tabela, Contador.categoria == categoria)
+        .values(quantidade=Contador.quantidade + delta)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    if atualizados:
+        return
+
+    session.flush()
+    query = _dialeto(session).insert(Contador).values(
+        tabela=tabela, categoria=categoria, quantidade=consulta_contagem(tabela, categoria).scalar_subquery()
+    )
+    session.exec(query.on_conflict_do_update(
+        index_elements=["tabela", "categoria"], set_={"quantidade": Contador.quantidade + delta}
+    ))
+
+
+def consulta_contagem(tabela: str, categoria: str = TOTAL):
+    modelo, coluna_categoria = TABELAS[tabela]
+    query = select(func.count()).select_from(modelo)
+    if categoria != TOTAL:
+        query = query.where(coluna_categoria == categoria)
+    return query
+
+
+def contar_na_tabela(session: Session, tabela: str, categoria: str = TOTAL) -> int:
+    return session.exec(consulta_contagem(tabela, categoria)).one()
+
+
+def _dialeto(session: Session):
+    return postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+
+
+def _inserir_ignorando(session: Session, valores: list[dict]):
+    # INSERT ... ON CONFLICT DO NOTHING no dialeto do banco em uso
+    session.exec(_dialeto(session).insert(Contador).values(valores).on_conflict_do_nothing())
+
+
+def obter_contagem(session: Session, tabela: str, categoria: str = TOTAL) -> int:
+    # Leitura O(1) pela chave primária. Na primeira leitura após uma invalidação
+    # o contador é recalculado e gravado numa sessão própria, sem confirmar nada
+    # pendente na sessão de quem chamou; se um escritor o criou nesse meio tempo
+    # (incrementar), vale o valor dele.
+    # Sem autoflush: objetos pendentes de quem chamou não entram numa transação
+    # de escrita. Use em sessões de leitura (no SQLite a sessão própria esperaria
+    # pela trava de uma escrita já enviada ao banco por esta mesma sessão).
+    with session.no_autoflush:
+        contador = session.get(Contador, (tabela, categoria))
+    if contador is not None:
+        return contador.quantidade
+
+    with Session(session.get_bind()) as sessao_contador:
+        quantidade = contar_na_tabela(sessao_contador, tabela, categoria)
+        _inserir_ignorando(sessao_contador, [{"tabela": tabela, "categoria": categoria, "quantidade": quantidade}])
+        sessao_contador.commit()
+        return sessao_contador.get(Contador, (tabela, categoria)).quantidade
+
+
+def invalidar_contadores(session: Session, tabela: Optional[str] = None):
+    query = delete(Contador)
+    if tabela:
+        query = query.where(Contador.tabela == tabela)
+    session.exec(query)
+    session.commit()
+
+
+def reconstruir_contadores(session: Session):
+    # Recalcula todos os contadores (totais e por categoria) com GROUP BY
+    session.exec(delete(Contador))
+    valores = []
+    for tabela, (modelo, coluna_categoria) in TABELAS.items():
+        valores.append({"tabela": tabela, "categoria": TOTAL, "quantidade": contar_na_tabela(session, tabela)})
+        if coluna_categoria is not None:
+            grupos = session.exec(
+                select(coluna_categoria, func.count()).select_from(modelo).group_by(coluna_categoria)
+            ).all()
+            valores.extend(
+                {"tabela": tabela, "categoria": categoria, "quantidade": quantidade}
+                for categoria, quantidade in grupos
+            )
+    _inserir_ignorando(session, valores)
+    session.commit()
+
+
+if __name__ == "__main__":
+    from Context.database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    acao = parser.add_mutually_exclusive_group(required=True)
+    acao.add_argument("--invalidar", action="store_true", help="Remove os contadores (recalculados na próxima leitura)")
+    acao.add_argument("--reconstruir", action="store_true", help="Recalcula todos os contadores")
+    parser.add_argument("--tabela", choices=list(TABELAS), help="Restringe a invalidação a uma tabela")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        if args.invalidar:
+            invalidar_contadores(session, args.tabela)
+            print("Contadores invalidados.")
+        else:
+            reconstruir_contadores(session)
+            print("Contadores reconstruídos.")
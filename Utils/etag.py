@@ -0,0 +1,100 @@
+"""
+Requisições condicionais (ETag / If-None-Match) para GET /produtos/,
+GET /clientes/{id} e GET /pedidos/{id}.
+
+O ETag não vem do conteúdo nem de uma coluna de versão: cada recurso depende de
+algumas chaves de versão guardadas no cache (Utils.cache), cada uma com um token
+aleatório criado na primeira leitura. As escritas apagam as chaves afetadas
+depois do commit (versoes_alteradas) e a próxima leitura cria um token novo.
+Assim o ETag atual é conhecido sem consultar o banco e, se bater com o
+If-None-Match, a rota responde 304 antes de abrir conexão e serializar.
+
+Chaves de versão de uma tabela:
+    tabela:<id>    a linha foi alterada ou removida
+    tabela:*       qualquer alteração na tabela (listas)
+    tabela:dados   algum dado descritivo foi alterado ou removido (nome, preço...),
+                   usado por recursos que incluem dados de outra tabela
+    tabela:lote    alteração em massa de linhas não identificadas (importação)
+
+Um token perdido (LRU, reinício, Redis limpo) só gera um ETag novo, nunca um
+304 indevido. Com vários processos, use CACHE_URL=redis://... para que todos
+vejam as mesmas versões.
+"""
+import hashlib
+import os
+import secrets
+from typing import Callable, Iterable, Optional
+from fastapi import HTTPException, Request, Response
+from Utils.cache import invalidar_apos_commit, versao_cache
+
+# max-age das listas; recursos individuais são sempre revalidados (no-cache)
+HTTP_MAX_AGE_LISTAS = int(os.getenv("HTTP_MAX_AGE_LISTAS", 5))
+
+
+def versoes_alteradas(session, tabela: str, ids: Optional[Iterable] = (), descritivos: bool = True):
+    # ids=None: alteração em lote. descritivos=False para inserções e para o
+    # estoque, que não aparecem em recursos de outras tabelas
+    chaves = {f"{tabela}:*"}
+    if descritivos:
+        chaves.add(f"{tabela}:dados")
+    if ids is None:
+        chaves.add(f"{tabela}:lote")
+    else:
+        chaves.update(f"{tabela}:{id_}" for id_ in ids)
+    invalidar_apos_commit(session, versao_cache, chaves)
+
+
+def calcular_etag(chaves: Iterable[str], variante: str = "") -> str:
+    tokens = [versao_cache.obter_ou_carregar(chave, lambda: secrets.token_hex(8)) for chave in chaves]
+    resumo = hashlib.blake2b("|".join([*tokens, variante]).encode(), digest_size=12).hexdigest()
+    return f'W/"{resumo}"'
+
+
+def etag_confere(if_none_match: Optional[str], etag: str) -> bool:
+    # Comparação fraca (RFC 9110): ignora o prefixo W/
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    alvo = etag.removeprefix("W/")
+    return any(candidato.strip().removeprefix("W/") == alvo for candidato in if_none_match.split(","))
+
+
+def condicional(chaves: Callable[[Request], Iterable[str]], lista: bool = False):
+    # Dependência compartilhada pelas rotas: calcula o ETag a partir das chaves
+    # que a requisição lê (chaves recebe a Request) e responde 304 se o cliente
+    # já tem esta versão. A query string (página, tamanho, cursor, include...)
+    # entra no ETag. Devolve os cabeçalhos, para rotas que montam a própria Response.
+    cache_control = f"max-age={HTTP_MAX_AGE_LISTAS}, must-revalidate" if lista else "no-cache"
+
+    def dependencia(request: Request, response: Response) -> dict:
+        try:
+            dependencias = chaves(request)
+        except ValueError:
+            # Parâmetro inválido: a validação da própria rota responde
+            return {}
+        variante = "&".join(sorted(request.url.query.split("&")))
+        etag = calcular_etag(dependencias, variante)
+        cabecalhos = {"ETag": etag, "Cache-Control": cache_control}
+        if etag_confere(request.headers.get("if-none-match"), etag):
+            raise HTTPException(status_code=304, headers=cabecalhos)
+        response.headers.update(cabecalhos)
+        return cabecalhos
+
+    return dependencia
+
+
+def _chaves_cliente(request: Request) -> list:
+    chaves = [f"cliente:{int(request.path_params['cliente_id'])}", "cliente:lote"]
+    # ?include=pedidos embute os pedidos do cliente, criados ou alterados em pedido:*
+    if request.query_params.get("include") == "pedidos":
+        chaves.append("pedido:*")
+    return chaves
+
+
+lista_produtos = condicional(lambda _: ["produto:*"], lista=True)
+cliente_por_id = condicional(_chaves_cliente)
+# A resposta do pedido inclui o nome do cliente e nome/categoria/preço dos produtos
+pedido_por_id = condicional(
+    lambda request: [f"pedido:{int(request.path_params['pedido_id'])}", "cliente:dados", "produto:dados"]
+)
@@ -0,0 +1,183 @@
+"""
+Exportação em streaming de clientes, produtos, pedidos e itens de pedido.
+
+As linhas saem do banco em lotes (yield_per, cursor no servidor quando o driver
+suporta) e cada lote é convertido e enviado antes do próximo ser lido, então a
+memória usada não depende do tamanho da tabela. Formatos:
+
+    csv      CSV com cabeçalho
+    csv.gz   o mesmo CSV comprimido em gzip à medida que é gerado
+    parquet  um row group por lote (requer pyarrow)
+
+O SHA-256 é calculado sobre os bytes enviados e gravado no manifesto
+(tabela exportacao) quando o streaming termina.
+"""
+import csv
+import hashlib
+import io
+import os
+import zlib
+from datetime import date, datetime
+from typing import Iterator
+from sqlmodel import Session
+from sqlalchemy import select
+from Models.models import Cliente, Exportacao, ItemPedido, Pedido, Produto
+
+ENTIDADES = {
+    "clientes": Cliente,
+    "produtos": Produto,
+    "pedidos": Pedido,
+    "itens_pedido": ItemPedido,
+}
+
+# formato -> (media type, extensão do arquivo)
+FORMATOS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "csv.gz": ("application/gzip", "csv.gz"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Linhas lidas do banco e convertidas por vez
+EXPORT_LOTE = int(os.getenv("EXPORT_LOTE", 10_000))
+
+
+def ler_lotes(engine_banco, modelo, lote: int = EXPORT_LOTE) -> Iterator[list]:
+    # Uma única transação de leitura (snapshot consistente); no SQLite em WAL
+    # ela não bloqueia as escritas feitas pelas outras requisições
+    tabela = modelo.__table__
+    with engine_banco.connect() as conexao:
+        resultado = conexao.execution_options(yield_per=lote).execute(
+            select(tabela).order_by(tabela.c.id)
+        )
+        for particao in resultado.partitions():
+            yield particao
+
+
+def gerar_csv(lotes: Iterator[list], colunas: list) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    escritor.writerow(colunas)
+    for linhas in lotes:
+        escritor.writerows(linhas)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        # Tabela vazia: só o cabeçalho
+        yield buffer.getvalue().encode()
+
+
+def comprimir_gzip(partes: Iterator[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for parte in partes:
+        saida = compressor.compress(parte)
+        if saida:
+            yield saida
+    yield compressor.flush()
+
+
+class _Destino(io.RawIOBase):
+    # Arquivo só de escrita para o ParquetWriter: acumula o que foi escrito até
+    # ser esvaziado, mas tell() continua contando desde o início, como o rodapé
+    # do Parquet espera
+    def __init__(self):
+        super().__init__()
+        self.partes = []
+        self.posicao = 0
+
+    def writable(self):
+        return True
+
+    def write(self, dados):
+        self.partes.append(bytes(dados))
+        self.posicao += len(dados)
+        return len(dados)
+
+    def tell(self):
+        return self.posicao
+
+    def esvaziar(self) -> bytes:
+        dados = b"".join(self.partes)
+        self.partes.clear()
+        return dados
+
+
+def _tipo_arrow(pa, coluna):
+    tipos = {
+        int: pa.int64(),
+        float: pa.float64(),
+        bool: pa.bool_(),
+        datetime: pa.timestamp("us"),
+        date: pa.date32(),
+    }
+    try:
+        return tipos.get(coluna.type.python_type, pa.string())
+    except NotImplementedError:
+        return pa.string()
+
+
+def gerar_parquet(lotes: Iterator[list], tabela) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    esquema = pa.schema([(coluna.name, _tipo_arrow(pa, coluna)) for coluna in tabela.columns])
+    destino = _Destino()
+    with pq.ParquetWriter(destino, esquema) as escritor:
+        for linhas in lotes:
+            valores = list(zip(*linhas))
+            escritor.write_table(pa.Table.from_arrays(
+                [pa.array(coluna, type=campo.type) for coluna, campo in zip(valores, esquema)],
+                schema=esquema
+            ))
+            yield destino.esvaziar()
+    yield destino.esvaziar()
+
+
+def exportar(engine_banco, exportacao_id: str, entidade: str, formato: str) -> Iterator[bytes]:
+    # Gera o corpo da resposta e, ao final (ou se o cliente desconectar),
+    # grava linhas, bytes e SHA-256 no manifesto
+    modelo = ENTIDADES[entidade]
+    tabela = modelo.__table__
+    sha256 = hashlib.sha256()
+    linhas = 0
+    total_bytes = 0
+    status = "interrompida"
+
+    def contar(lotes):
+        nonlocal linhas
+        for lote in lotes:
+            linhas += len(lote)
+            yield lote
+
+    lotes = contar(ler_lotes(engine_banco, modelo))
+    if formato == "parquet":
+        partes = gerar_parquet(lotes, tabela)
+    else:
+        partes = gerar_csv(lotes, [coluna.name for coluna in tabela.columns])
+        if formato == "csv.gz":
+            partes = comprimir_gzip(partes)
+
+    try:
+        for parte in partes:
+            if not parte:
+                continue
+            sha256.update(parte)
+            total_bytes += len(parte)
+            yield parte
+        status = "concluida"
+    except Exception:
+        status = "erro"
+        raise
+    finally:
+        # Fecha a leitura antes de gravar o manifesto
+        partes.close()
+        with Session(engine_banco) as session:
+            exportacao = session.get(Exportacao, exportacao_id)
+            exportacao.status = status
+            exportacao.linhas = linhas
+            exportacao.bytes = total_bytes
+            exportacao.sha256 = sha256.hexdigest() if status == "concluida" else None
+            exportacao.concluida_em = datetime.now()
+            session.add(exportacao)
+            session.commit()
+
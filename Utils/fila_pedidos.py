@@ -0,0 +1,198 @@
+"""
+Commit agrupado (group commit) para POST /pedidos/.
+
+No modo normal cada pedido é uma transação, com um fsync no commit. Com
+PEDIDOS_AGRUPADOS=true o pedido já validado (corpo da requisição) entra numa
+fila em memória, e uma tarefa em segundo plano grava os pedidos em lotes: um
+lote fecha com PEDIDOS_LOTE_MAX pedidos ou PEDIDOS_LOTE_ESPERA_MS depois do
+primeiro, o que vier antes, e é gravado em uma única transação. Enquanto um
+lote é gravado, os próximos pedidos se acumulam; sob carga os lotes crescem
+sozinhos e o custo do commit se divide entre eles. Cada requisição espera o
+resultado do seu próprio pedido.
+
+Durabilidade e semântica:
+    - A resposta só é enviada depois do commit do lote. Um pedido confirmado
+      (HTTP 200) tem a mesma durabilidade do modo normal (SQLITE_SYNCHRONOUS
+      ou a configuração do PostgreSQL). Não existe janela em que o cliente
+      recebeu a confirmação e o pedido ainda não foi gravado.
+    - Se o processo cair, os pedidos que estavam na fila ou no lote em
+      gravação são perdidos. Nenhum deles foi confirmado: as requisições
+      terminam com erro de conexão.
+    - Cada pedido roda em um savepoint (Utils.pedidos.registrar_pedidos).
+      Cliente ou produto inexistente e estoque insuficiente afetam só aquele
+      pedido, que recebe o mesmo 404/400 do modo normal. Se o commit do lote
+      falhar, todos os pedidos do lote recebem 500.
+    - Os pedidos são gravados na ordem de chegada: o estoque é reservado para
+      quem chegou primeiro.
+    - Uma requisição cancelada (cliente desconectou) não retira o pedido da
+      fila: ele ainda pode ser gravado, como no modo normal.
+    - Com a fila cheia (PEDIDOS_FILA_MAX) a requisição recebe 503 com
+      Retry-After. No desligamento, a fila é esvaziada antes de o processo sair.
+    - A fila é por processo. Com vários workers cada um agrupa os seus pedidos,
+      e o UPDATE condicional de estoque continua garantindo que nada é vendido
+      acima do estoque.
+
+Com PEDIDOS_LOTE_ESPERA_MS=0 não há espera: um lote leva o que já estiver na
+fila. É o mais indicado quando a latência importa mais que o total de commits.
+"""
+import asyncio
+import os
+from contextlib import suppress
+from typing import List, Optional, Tuple, Union
+
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+
+from Models.models import StatusPedidoEnum
+from Utils.metricas import COLETORES, Histograma
+from Utils.pedidos import obter_status_id, registrar_pedidos
+from Utils.transacoes import com_retentativas
+
+PEDIDOS_AGRUPADOS = os.getenv("PEDIDOS_AGRUPADOS", "false").lower() == "true"
+
+# Pedidos por transação no máximo
+PEDIDOS_LOTE_MAX = int(os.getenv("PEDIDOS_LOTE_MAX", 200))
+
+# Quanto o primeiro pedido de um lote espera por outros (ms)
+PEDIDOS_LOTE_ESPERA_MS = float(os.getenv("PEDIDOS_LOTE_ESPERA_MS", 5))
+
+# Pedidos aguardando gravação; acima disso as requisições recebem 503
+PEDIDOS_FILA_MAX = int(os.getenv("PEDIDOS_FILA_MAX", 10_000))
+
+tamanho_lote = Histograma(
+    "pedidos_agrupados_lote", "Pedidos gravados por transação no modo agrupado", (),
+    (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+)
+
+
+def gravar_lote(engine_banco, pedidos: List[Tuple[int, List[dict]]]) -> List[Union[dict, HTTPException]]:
+    # Grava os pedidos (cliente_id, itens) em uma transação e devolve, na mesma
+    # ordem, o pedido criado (dict) ou a HTTPException de cada um
+    # No SQLite a transação já começa com a trava de escrita (BEGIN IMMEDIATE)
+    with Session(engine_banco.execution_options(escrita_imediata=True)) as session:
+        status_inicial_id = obter_status_id(session, StatusPedidoEnum.PENDENTE)
+        if not status_inicial_id:
+            return [HTTPException(status_code=500, detail="Status inicial não encontrado") for _ in pedidos]
+
+        def gravar() -> List[Union[dict, HTTPException]]:
+            registrados = registrar_pedidos(session, pedidos, status_inicial_id)
+            # As respostas são montadas antes do commit, como em criar_pedido
+            respostas = [
+                registrado if isinstance(registrado, HTTPException) else registrado.model_dump()
+                for registrado in registrados
+            ]
+            session.commit()
+            return respostas
+
+        try:
+            # Um conflito transitório refaz o lote inteiro
+            return com_retentativas(session, gravar)
+        except Exception as e:
+            session.rollback()
+            return [
+                HTTPException(status_code=500, detail=f"Erro ao gravar lote de pedidos: {str(e)}") for _ in pedidos
+            ]
+
+
+class FilaPedidos:
+    def __init__(
+        self,
+        engine_banco,
+        lote_max: int = PEDIDOS_LOTE_MAX,
+        espera_ms: float = PEDIDOS_LOTE_ESPERA_MS,
+        fila_max: int = PEDIDOS_FILA_MAX,
+    ):
+        self.engine = engine_banco
+        self.lote_max = max(lote_max, 1)
+        self.espera = max(espera_ms, 0) / 1000
+        self.fila_max = fila_max
+        self._fila: Optional[asyncio.Queue] = None
+        self._tarefa: Optional[asyncio.Task] = None
+
+    def tamanho(self) -> int:
+        return self._fila.qsize() if self._fila is not None else 0
+
+    async def iniciar(self):
+        # Chamado no lifespan: a fila e a tarefa pertencem ao event loop do app
+        self._fila = asyncio.Queue(self.fila_max)
+        self._tarefa = asyncio.create_task(self._trabalhar())
+
+    async def parar(self):
+        # Recusa novos pedidos, grava os que já estão na fila e encerra a tarefa
+        fila, self._fila = self._fila, None
+        if fila is None:
+            return
+        await fila.join()
+        self._tarefa.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._tarefa
+
+    async def enfileirar(self, cliente_id: int, itens: List[dict]) -> dict:
+        if self._fila is None:
+            raise HTTPException(status_code=503, detail="Fila de pedidos indisponível")
+        futuro = asyncio.get_running_loop().create_future()
+        try:
+            self._fila.put_nowait((cliente_id, itens, futuro))
+        except asyncio.QueueFull:
+            raise HTTPException(
+                status_code=503, detail="Fila de pedidos cheia; tente novamente", headers={"Retry-After": "1"}
+            )
+        return await futuro
+
+    async def _proximo_lote(self, fila: asyncio.Queue) -> list:
+        loop = asyncio.get_running_loop()
+        lote = [await fila.get()]
+        limite = loop.time() + self.espera
+        while len(lote) < self.lote_max:
+            try:
+                lote.append(fila.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            restante = limite - loop.time()
+            if restante <= 0:
+                break
+            try:
+                lote.append(await asyncio.wait_for(fila.get(), restante))
+            except asyncio.TimeoutError:
+                break
+        return lote
+
+    async def _trabalhar(self):
+        fila = self._fila
+        while True:
+            lote = await self._proximo_lote(fila)
+            tamanho_lote.observar(len(lote))
+            try:
+                # Um lote por vez: no SQLite só há um escritor, e os pedidos que
+                # chegam durante a gravação formam o próximo lote
+                resultados = await run_in_threadpool(
+                    gravar_lote, self.engine, [(cliente_id, itens) for cliente_id, itens, _ in lote]
+                )
+            except Exception as e:
+                resultados = [
+                    HTTPException(status_code=500, detail=f"Erro ao gravar lote de pedidos: {str(e)}") for _ in lote
+                ]
+
+            for (_, _, futuro), resultado in zip(lote, resultados):
+                # Requisições canceladas já não esperam o resultado
+                if futuro.done():
+                    continue
+                if isinstance(resultado, HTTPException):
+                    futuro.set_exception(resultado)
+                else:
+                    futuro.set_result(resultado)
+            for _ in lote:
+                fila.task_done()
+
+
+def coletor_fila(fila_pedidos: FilaPedidos):
+    # Linha de /metrics com os pedidos aguardando gravação
+    def coletar() -> List[str]:
+        return [
+            "# HELP pedidos_agrupados_fila Pedidos aguardando gravação no modo agrupado",
+            "# TYPE pedidos_agrupados_fila gauge",
+            f"pedidos_agrupados_fila {fila_pedidos.tamanho()}",
+        ]
+    COLETORES.append(coletar)
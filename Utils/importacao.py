@@ -0,0 +1,271 @@
+"""
+Importação em lote de clientes e produtos a partir de CSV.
+
+O arquivo é lido como gerador (nunca inteiro em memória), validado em lotes com
+um TypeAdapter do Pydantic e gravado com um INSERT ... ON CONFLICT (id) DO UPDATE
+executado via executemany por lote. Linhas com id atualizam o registro
+existente; linhas sem id são inseridas. Em arquivos grandes os triggers da busca
+textual são suspensos e o índice é reconstruído ao final (Utils.busca). Linhas inválidas são rejeitadas e
+reportadas com o número da linha, sem interromper o restante do arquivo.
+
+A codificação é detectada antes da leitura: UTF-8 (com ou sem BOM) quando o
+arquivo inteiro é UTF-8 válido, senão Latin-1.
+
+Uso (a partir da raiz do projeto):
+    python -m Utils.importacao clientes clientes.csv
+    python -m Utils.importacao produtos produtos.csv --rejeitadas rejeitadas.csv
+"""
+import argparse
+import codecs
+import csv
+import io
+import os
+from contextlib import nullcontext
+from operator import itemgetter
+from typing import Annotated, BinaryIO, Callable, Iterator, List, NotRequired, Optional, TypedDict
+from fastapi import HTTPException
+from pydantic import BeforeValidator, StringConstraints, TypeAdapter, ValidationError
+from sqlmodel import Session, select
+from sqlalchemy import bindparam, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from Models.models import Cliente, Produto
+from Utils.busca import indexacao_suspensa
+from Utils.cache import invalidar_apos_commit, produto_cache
+from Utils.contadores import invalidar_contadores
+from Utils.etag import versoes_alteradas
+from Utils.rollups import mover_cliente
+
+ENTIDADES = {
+    "clientes": (Cliente, "cliente"),
+    "produtos": (Produto, "produto"),
+}
+
+# Linhas validadas e gravadas por transação
+IMPORT_LOTE = int(os.getenv("IMPORT_LOTE", 5000))
+
+# A partir deste tamanho de arquivo os triggers da busca (FTS5, SQLite) ficam
+# desligados durante a carga e o índice é reconstruído uma vez no final
+IMPORT_REINDEXAR_BYTES = int(os.getenv("IMPORT_REINDEXAR_BYTES", 1024 * 1024))
+
+# Quantidade máxima de erros devolvidos no relatório (o total é sempre contado)
+MAX_ERROS_RELATORIO = 1000
+
+
+def _validador(modelo) -> TypeAdapter:
+    # TypeAdapter de uma lista de TypedDict com os campos do modelo: valida o lote
+    # inteiro de uma vez e devolve dicts, sem instanciar um modelo por linha.
+    # Textos vazios ou só com espaços são rejeitados, como em validar_objeto.
+    # A coluna id é opcional no CSV, como no cabeçalho exigido por importar_csv.
+    campos = {}
+    for nome, campo in modelo.model_fields.items():
+        if nome == "id":
+            campos[nome] = NotRequired[Annotated[Optional[int], BeforeValidator(lambda valor: valor or None)]]
+        elif campo.annotation is str:
+            campos[nome] = Annotated[str, StringConstraints(pattern=r"\S")]
+        else:
+            campos[nome] = campo.annotation
+    return TypeAdapter(List[TypedDict(f"{modelo.__name__}Linha", campos)])
+
+
+VALIDADORES = {entidade: _validador(modelo) for entidade, (modelo, _) in ENTIDADES.items()}
+
+
+def detectar_codificacao(arquivo: BinaryIO) -> str:
+    # Percorre o arquivo com um decodificador UTF-8 incremental; no primeiro byte
+    # inválido assume Latin-1 (que aceita qualquer sequência de bytes)
+    inicio = arquivo.tell()
+    try:
+        if arquivo.read(3) == codecs.BOM_UTF8:
+            return "utf-8-sig"
+        arquivo.seek(inicio)
+        decodificador = codecs.getincrementaldecoder("utf-8")()
+        while pedaco := arquivo.read(1024 * 1024):
+            decodificador.decode(pedaco)
+        decodificador.decode(b"", final=True)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+    finally:
+        arquivo.seek(inicio)
+
+
+def ler_linhas_csv(arquivo: BinaryIO, codificacao: str, obrigatorias=()) -> Iterator[tuple[int, dict]]:
+    # Gera (número da linha no arquivo, linha) lendo o arquivo aos poucos
+    texto = io.TextIOWrapper(arquivo, encoding=codificacao, newline="")
+    try:
+        # csv.reader + zip em vez de DictReader, que faz o mesmo por linha em Python puro
+        leitor = csv.reader(texto)
+        cabecalho = [coluna.strip() for coluna in next(leitor, [])]
+        ausentes = [coluna for coluna in obrigatorias if coluna not in cabecalho]
+        if ausentes:
+            raise HTTPException(status_code=400, detail=f"Colunas ausentes no CSV: {', '.join(ausentes)}")
+        for valores in leitor:
+            if valores:
+                yield leitor.line_num, dict(zip(cabecalho, valores))
+    finally:
+        texto.detach()
+
+
+def validar_lote(entidade: str, lote: List[tuple[int, dict]]) -> tuple[List[dict], List[dict]]:
+    # Retorna (linhas válidas, erros); um erro em uma linha não descarta as demais
+    validador = VALIDADORES[entidade]
+    linhas = [linha for _, linha in lote]
+    try:
+        return validador.validate_python(linhas), []
+    except ValidationError as e:
+        motivos: dict[int, list] = {}
+        for erro in e.errors(include_url=False, include_context=False, include_input=False):
+            indice, *campo = erro["loc"]
+            mensagem = "não pode ser vazio" if erro["type"] == "string_pattern_mismatch" else erro["msg"]
+            motivos.setdefault(indice, []).append(f"{'.'.join(map(str, campo)) or 'linha'}: {mensagem}")
+
+    erros = [{"linha": lote[indice][0], "detail": "; ".join(mensagens)} for indice, mensagens in motivos.items()]
+    restantes = [linha for indice, linha in enumerate(linhas) if indice not in motivos]
+    return validador.validate_python(restantes), erros
+
+
+def _executemany(conexao, query, linhas: List[dict]):
+    # Compila a query uma vez e passa os parâmetros direto ao executemany do
+    # driver, sem o processamento de parâmetros linha a linha do SQLAlchemy
+    compilada = query.compile(dialect=conexao.dialect)
+    if compilada.positional:
+        linhas = list(map(itemgetter(*compilada.positiontup), linhas))
+    conexao.exec_driver_sql(compilada.string, linhas)
+
+
+def gravar_lote(session: Session, modelo, linhas: List[dict]):
+    # Upsert com executemany: linhas com id atualizam (ou criam) aquele id,
+    # linhas sem id ficam com o id gerado pelo banco
+    dialeto = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    com_id = [linha for linha in linhas if linha.get("id") is not None]
+    sem_id = [
+        {campo: valor for campo, valor in linha.items() if campo != "id"} for linha in linhas if linha.get("id") is None
+    ]
+
+    conexao = session.connection()
+    tabela = modelo.__table__
+    if com_id and modelo is Cliente:
+        # Clientes que mudam de estado levam as vendas junto no rollup por estado
+        anteriores = dict(session.exec(
+            select(Cliente.id, Cliente.estado).where(Cliente.id.in_([linha["id"] for linha in com_id]))
+        ).all())
+        for linha in com_id:
+            estado_anterior = anteriores.get(linha["id"])
+            if estado_anterior is not None and estado_anterior != linha["estado"]:
+                mover_cliente(session, linha["id"], estado_anterior, linha["estado"])
+                # Um id repetido no lote parte do estado que a linha anterior gravou
+                anteriores[linha["id"]] = linha["estado"]
+    if com_id:
+        colunas = list(com_id[0])
+        query = dialeto.insert(tabela).values({coluna: bindparam(coluna) for coluna in colunas})
+        _executemany(conexao, query.on_conflict_do_update(
+            index_elements=["id"],
+            set_={coluna: getattr(query.excluded, coluna) for coluna in colunas if coluna != "id"}
+        ), com_id)
+    if sem_id:
+        _executemany(conexao, insert(tabela).values({coluna: bindparam(coluna) for coluna in sem_id[0]}), sem_id)
+
+
+def importar_csv(
+    session: Session,
+    entidade: str,
+    arquivo: BinaryIO,
+    tamanho_lote: int = IMPORT_LOTE,
+    ao_rejeitar: Optional[Callable[[dict], None]] = None
+) -> dict:
+    # Cada lote é gravado na sua própria transação. ao_rejeitar recebe todas as
+    # linhas rejeitadas; o relatório guarda só as primeiras MAX_ERROS_RELATORIO
+    modelo, tabela = ENTIDADES[entidade]
+    codificacao = detectar_codificacao(arquivo)
+    relatorio = {"entidade": entidade, "codificacao": codificacao, "linhas": 0, "gravadas": 0, "rejeitadas": 0, "erros": []}
+
+    def processar(lote):
+        validas, erros = validar_lote(entidade, lote)
+        if validas:
+            try:
+                gravar_lote(session, modelo, validas)
+                if modelo is Produto:
+                    invalidar_apos_commit(session, produto_cache, [linha["id"] for linha in validas if linha.get("id")])
+                versoes_alteradas(session, tabela, ids=None)
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                erros.append({"linha": lote[0][0], "detail": f"Erro ao gravar o lote iniciado nesta linha: {str(e)}"})
+                relatorio["rejeitadas"] += len(validas) - 1
+                validas = []
+        relatorio["linhas"] += len(lote)
+        relatorio["gravadas"] += len(validas)
+        relatorio["rejeitadas"] += len(erros)
+        relatorio["erros"].extend(erros[:MAX_ERROS_RELATORIO - len(relatorio["erros"])])
+        if ao_rejeitar:
+            for erro in erros:
+                ao_rejeitar(erro)
+
+    inicio = arquivo.tell()
+    grande = arquivo.seek(0, io.SEEK_END) - inicio >= IMPORT_REINDEXAR_BYTES
+    arquivo.seek(inicio)
+
+    lote = []
+    try:
+        obrigatorias = [campo for campo in modelo.model_fields if campo != "id"]
+        with indexacao_suspensa(session, tabela) if grande else nullcontext():
+            for numero, linha in ler_linhas_csv(arquivo, codificacao, obrigatorias):
+                lote.append((numero, linha))
+                if len(lote) >= tamanho_lote:
+                    processar(lote)
+                    lote = []
+            if lote:
+                processar(lote)
+    finally:
+        if relatorio["gravadas"]:
+            ajustar_sequencia(session, tabela)
+            # Contagens totais e por categoria são recalculadas na próxima leitura
+            invalidar_contadores(session, tabela)
+
+    return relatorio
+
+
+def ajustar_sequencia(session: Session, tabela: str):
+    # No PostgreSQL ids explícitos não avançam a sequência do SERIAL
+    if session.get_bind().dialect.name == "postgresql":
+        session.connection().exec_driver_sql(
+            f"SELECT setval(pg_get_serial_sequence('{tabela}', 'id'), COALESCE(MAX(id), 1)) FROM {tabela}"
+        )
+        session.commit()
+
+
+if __name__ == "__main__":
+    import time
+    from Context.database import create_db_and_tables, engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("entidade", choices=list(ENTIDADES))
+    parser.add_argument("arquivo")
+    parser.add_argument("--lote", type=int, default=IMPORT_LOTE, help="Linhas por transação")
+    parser.add_argument("--rejeitadas", help="Grava as linhas rejeitadas (número e motivo) neste CSV")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+    inicio = time.perf_counter()
+    with Session(engine) as session, open(args.arquivo, "rb") as arquivo:
+        rejeitadas = open(args.rejeitadas, "w", newline="") if args.rejeitadas else None
+        try:
+            escritor = csv.writer(rejeitadas) if rejeitadas else None
+            if escritor:
+                escritor.writerow(["linha", "motivo"])
+
+            def ao_rejeitar(erro: dict):
+                escritor.writerow([erro["linha"], erro["detail"]])
+
+            relatorio = importar_csv(session, args.entidade, arquivo, args.lote, ao_rejeitar if escritor else None)
+        finally:
+            if rejeitadas:
+                rejeitadas.close()
+
+    duracao = time.perf_counter() - inicio
+    print(
+        f"{relatorio['gravadas']} linhas gravadas, {relatorio['rejeitadas']} rejeitadas "
+        f"({relatorio['codificacao']}) em {duracao:.1f}s ({relatorio['linhas'] / max(duracao, 1e-9):,.0f} linhas/s)"
+    )
+    for erro in relatorio["erros"][:20]:
+        print(f"  linha {erro['linha']}: {erro['detail']}")
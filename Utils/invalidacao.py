@@ -0,0 +1,179 @@
+"""
+Invalidação de caches entre processos (vários workers com cache em memória).
+
+Com CACHE_URL vazio cada worker tem os seus caches (Utils.cache), e um commit
+só invalida as chaves do processo que o fez: os outros continuariam servindo o
+produto antigo até o TTL e, pior, o token de versão antigo, respondendo 304 a
+um If-None-Match que já não vale. Com CACHE_SINCRONIZAR=true:
+
+    - no commit, as invalidações pendentes da sessão (invalidar_apos_commit)
+      são gravadas na tabela invalidacao_cache, na mesma transação: só
+      aparecem para os outros se o commit acontecer;
+    - cada worker lê a tabela a cada CACHE_SINCRONIA_MS, numa thread, e aplica
+      nos seus caches as linhas que ainda não viu.
+
+Um worker enxerga a escrita de outro em até CACHE_SINCRONIA_MS (mais o tempo
+da leitura); o processo que escreveu continua invalidando na hora, depois do
+commit. A thread acompanha o maior id lido. Um id que ainda não apareceu
+(transação concorrente que pegou o id antes e confirmou depois, possível no
+PostgreSQL) segura a leitura por até CACHE_SINCRONIA_LACUNA_S segundos; depois
+disso é dado como desfeito. Linhas com mais de CACHE_SINCRONIA_RETENCAO_S
+segundos são apagadas.
+
+Com CACHE_URL=redis://... os caches já são compartilhados e o canal não é
+necessário. Os status de pedido (tabela fixa) nunca são invalidados.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+import orjson
+from sqlalchemy import delete, event, func, insert, select
+from sqlalchemy.orm import Session as SessionORM
+
+from Models.models import InvalidacaoCache
+from Utils.cache import CACHES
+
+logger = logging.getLogger(__name__)
+
+CACHE_SINCRONIZAR = os.getenv("CACHE_SINCRONIZAR", "false").lower() == "true"
+
+# Intervalo entre leituras da tabela de invalidações (ms)
+CACHE_SINCRONIA_MS = float(os.getenv("CACHE_SINCRONIA_MS", 100))
+
+# Quanto tempo um id ausente segura a leitura antes de ser dado como desfeito (s)
+CACHE_SINCRONIA_LACUNA_S = float(os.getenv("CACHE_SINCRONIA_LACUNA_S", 5))
+
+# Idade a partir da qual as invalidações são apagadas (s)
+CACHE_SINCRONIA_RETENCAO_S = float(os.getenv("CACHE_SINCRONIA_RETENCAO_S", 300))
+
+tabela = InvalidacaoCache.__table__
+
+
+@event.listens_for(SessionORM, "before_commit")
+def _publicar_pendentes(session):
+    # Grava as invalidações pendentes na transação que está sendo confirmada
+    if not CACHE_SINCRONIZAR:
+        return
+    pendentes = session.info.get("cache_invalidar")
+    if not pendentes:
+        return
+    agora = datetime.now()
+    linhas = []
+    for nome, chaves in pendentes.items():
+        if chaves is None:
+            linhas.append({"cache": nome, "chave": None, "criado_em": agora})
+        else:
+            linhas.extend(
+                {"cache": nome, "chave": orjson.dumps(chave).decode(), "criado_em": agora} for chave in chaves
+            )
+    if linhas:
+        session.connection().execute(insert(tabela), linhas)
+
+
+class SincroniaCache:
+    def __init__(
+        self,
+        engine_banco,
+        intervalo_ms: float = CACHE_SINCRONIA_MS,
+        lacuna_s: float = CACHE_SINCRONIA_LACUNA_S,
+        retencao_s: float = CACHE_SINCRONIA_RETENCAO_S,
+    ):
+        self.engine = engine_banco
+        self.intervalo = max(intervalo_ms, 1) / 1000
+        self.lacuna = lacuna_s
+        self.retencao = retencao_s
+        self.aplicadas = 0
+        # Todos os ids até ultimo_id foram aplicados (ou dados como desfeitos);
+        # vistos guarda os ids acima dele que já foram aplicados
+        self.ultimo_id = 0
+        self._vistos: set = set()
+        self._lacuna_desde: Optional[float] = None
+        self._proxima_limpeza = 0.0
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def iniciar(self):
+        # Os caches do processo começam vazios: invalidações anteriores não importam
+        with self.engine.connect() as conexao:
+            self.ultimo_id = conexao.execute(select(func.coalesce(func.max(tabela.c.id), 0))).scalar_one()
+        self._proxima_limpeza = time.monotonic() + self.retencao / 10
+        self._parar.clear()
+        self._thread = threading.Thread(target=self._executar, name="sincronia-cache", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.sincronizar()
+            except Exception:
+                # Banco ocupado ou indisponível: tenta de novo no próximo ciclo
+                logger.exception("Falha ao ler invalidações de cache")
+
+    def sincronizar(self) -> int:
+        # Aplica as invalidações novas e devolve quantas foram aplicadas
+        with self.engine.connect() as conexao:
+            linhas = conexao.execute(
+                select(tabela.c.id, tabela.c.cache, tabela.c.chave)
+                .where(tabela.c.id > self.ultimo_id)
+                .order_by(tabela.c.id)
+            ).all()
+
+        aplicadas = 0
+        for id_linha, nome, chave in linhas:
+            if id_linha in self._vistos:
+                continue
+            self._vistos.add(id_linha)
+            cache = CACHES.get(nome)
+            if cache is None:
+                continue
+            if chave is None:
+                cache.limpar()
+            else:
+                cache.invalidar([orjson.loads(chave)])
+            aplicadas += 1
+        self.aplicadas += aplicadas
+        self._avancar()
+
+        if time.monotonic() >= self._proxima_limpeza:
+            self._limpar()
+        return aplicadas
+
+    def _avancar(self):
+        # Avança ultimo_id sobre os ids contíguos já vistos; uma lacuna só é
+        # pulada depois de CACHE_SINCRONIA_LACUNA_S segundos
+        while self._vistos:
+            if self.ultimo_id + 1 in self._vistos:
+                self.ultimo_id += 1
+                self._vistos.discard(self.ultimo_id)
+                self._lacuna_desde = None
+                continue
+            agora = time.monotonic()
+            if self._lacuna_desde is None:
+                self._lacuna_desde = agora
+            if agora - self._lacuna_desde < self.lacuna:
+                break
+            self.ultimo_id = min(self._vistos) - 1
+            self._lacuna_desde = None
+
+    def _limpar(self):
+        self._proxima_limpeza = time.monotonic() + self.retencao / 10
+        limite = datetime.now() - timedelta(seconds=self.retencao)
+        with self.engine.begin() as conexao:
+            conexao.execute(delete(tabela).where(tabela.c.criado_em < limite))
+
+    def metricas(self) -> dict:
+        return {
+            "intervalo_ms": self.intervalo * 1000,
+            "ultimo_id": self.ultimo_id,
+            "aplicadas": self.aplicadas,
+        }
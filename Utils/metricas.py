@@ -0,0 +1,258 @@
+"""
+Métricas de desempenho no formato texto do Prometheus (GET /metrics).
+
+    http_requisicoes_total               requisições por método, rota e status
+    http_requisicao_duracao_segundos     histograma de latência por método e rota
+    http_requisicoes_em_andamento        requisições sendo atendidas agora
+    http_resposta_bytes                  histograma do tamanho do corpo por método e rota
+    db_consultas_por_requisicao          histograma de comandos SQL por requisição (N+1)
+    db_consulta_duracao_segundos         histograma de latência por tipo de comando SQL
+    db_linhas_total                      linhas afetadas/retornadas informadas pelo driver
+    db_pool_conexoes                     conexões do pool por estado
+
+A rota é o template (/pedidos/{pedido_id}), não o caminho, para manter poucas
+séries. Cada observação custa um bisect e um incremento sob uma trava; o texto
+só é montado quando /metrics é lido. Comandos acima de DB_CONSULTA_LENTA_MS
+também vão para o log. Com METRICAS_HABILITADAS=false nada é registrado.
+"""
+import bisect
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+METRICAS_HABILITADAS = os.getenv("METRICAS_HABILITADAS", "true").lower() == "true"
+
+# Comandos SQL mais lentos que isto (ms) são registrados no log; 0 desliga
+DB_CONSULTA_LENTA_MS = float(os.getenv("DB_CONSULTA_LENTA_MS", 200))
+
+BALDES_HTTP = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+BALDES_SQL = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+BALDES_CONSULTAS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 500)
+BALDES_BYTES = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _rotulos(nomes: Iterable[str], valores: Iterable) -> str:
+    pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(nomes, valores)]
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+class Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = ()):
+        self.nome = nome
+        self.ajuda = ajuda
+        self.rotulos = tuple(rotulos)
+        self._valores: Dict[tuple, object] = {}
+        self._trava = threading.Lock()
+        REGISTRO.append(self)
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._trava:
+            valores = list(self._valores.items())
+        for chave, valor in valores:
+            linhas.append(f"{self.nome}{_rotulos(self.rotulos, chave)} {valor}")
+        return linhas
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def incrementar(self, *rotulos, valor: float = 1):
+        with self._trava:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+
+class Medidor(Metrica):
+    tipo = "gauge"
+
+    def incrementar(self, *rotulos, valor: float = 1):
+        with self._trava:
+            self._valores[rotulos] = self._valores.get(rotulos, 0) + valor
+
+    def decrementar(self, *rotulos, valor: float = 1):
+        self.incrementar(*rotulos, valor=-valor)
+
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nome: str, ajuda: str, rotulos: Iterable[str] = (), baldes: Iterable[float] = BALDES_HTTP):
+        super().__init__(nome, ajuda, rotulos)
+        self.baldes = tuple(baldes)
+
+    def observar(self, valor: float, *rotulos):
+        # Cada série guarda a contagem por balde (não acumulada) e a soma
+        indice = bisect.bisect_left(self.baldes, valor)
+        with self._trava:
+            serie = self._valores.get(rotulos)
+            if serie is None:
+                serie = self._valores[rotulos] = [[0] * (len(self.baldes) + 1), 0.0]
+            serie[0][indice] += 1
+            serie[1] += valor
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.ajuda}", f"# TYPE {self.nome} {self.tipo}"]
+        with self._trava:
+            valores = [(chave, list(contagens), soma) for chave, (contagens, soma) in self._valores.items()]
+        nomes = (*self.rotulos, "le")
+        for chave, contagens, soma in valores:
+            acumulado = 0
+            for limite, contagem in zip((*self.baldes, "+Inf"), contagens):
+                acumulado += contagem
+                linhas.append(f"{self.nome}_bucket{_rotulos(nomes, (*chave, limite))} {acumulado}")
+            linhas.append(f"{self.nome}_sum{_rotulos(self.rotulos, chave)} {soma}")
+            linhas.append(f"{self.nome}_count{_rotulos(self.rotulos, chave)} {acumulado}")
+        return linhas
+
+
+REGISTRO: List[Metrica] = []
+# Funções chamadas na leitura de /metrics que devolvem linhas prontas (ex.: pool)
+COLETORES: List[Callable[[], List[str]]] = []
+# Engines instrumentados, pelo nome usado no rótulo engine do pool
+ENGINES: Dict[str, object] = {}
+
+requisicoes = Contador("http_requisicoes_total", "Requisições HTTP atendidas", ("metodo", "rota", "status"))
+duracao_requisicao = Histograma(
+    "http_requisicao_duracao_segundos", "Duração das requisições HTTP", ("metodo", "rota"), BALDES_HTTP
+)
+tamanho_resposta = Histograma(
+    "http_resposta_bytes", "Tamanho do corpo das respostas HTTP", ("metodo", "rota"), BALDES_BYTES
+)
+em_andamento = Medidor("http_requisicoes_em_andamento", "Requisições HTTP em andamento")
+consultas_por_requisicao = Histograma(
+    "db_consultas_por_requisicao", "Comandos SQL executados por requisição", ("metodo", "rota"), BALDES_CONSULTAS
+)
+duracao_consulta = Histograma(
+    "db_consulta_duracao_segundos", "Duração dos comandos SQL por tipo", ("operacao",), BALDES_SQL
+)
+linhas_consulta = Contador(
+    "db_linhas_total", "Linhas afetadas ou retornadas pelos comandos SQL (quando o driver informa)", ("operacao",)
+)
+
+# Contador de comandos SQL da requisição atual. É uma lista para que o
+# incremento feito numa thread do threadpool (contexto copiado) chegue ao middleware.
+consultas_requisicao: ContextVar[Optional[list]] = ContextVar("consultas_requisicao", default=None)
+
+
+def exportar_metricas() -> str:
+    linhas: List[str] = []
+    for metrica in REGISTRO:
+        linhas.extend(metrica.exportar())
+    for coletor in COLETORES:
+        linhas.extend(coletor())
+    return "\n".join(linhas) + "\n"
+
+
+# --- HTTP ------------------------------------------------------------------------------
+
+class MetricasMiddleware:
+    # Middleware ASGI puro (sem BaseHTTPMiddleware): mede a requisição inteira,
+    # inclusive o envio de respostas em streaming
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        tamanho = 0
+
+        async def enviar(mensagem):
+            nonlocal status, tamanho
+            if mensagem["type"] == "http.response.start":
+                status = mensagem["status"]
+            elif mensagem["type"] == "http.response.body":
+                tamanho += len(mensagem.get("body", b""))
+            await send(mensagem)
+
+        consultas = [0]
+        token = consultas_requisicao.set(consultas)
+        em_andamento.incrementar()
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracao = time.perf_counter() - inicio
+            em_andamento.decrementar()
+            consultas_requisicao.reset(token)
+            # O roteador grava a rota encontrada no scope; sem rota (404) fica um rótulo só
+            rota = getattr(scope.get("route"), "path", "<sem rota>")
+            metodo = scope["method"]
+            requisicoes.incrementar(metodo, rota, status)
+            duracao_requisicao.observar(duracao, metodo, rota)
+            tamanho_resposta.observar(tamanho, metodo, rota)
+            consultas_por_requisicao.observar(consultas[0], metodo, rota)
+
+
+# --- SQL -------------------------------------------------------------------------------
+
+def _operacao(comando: str) -> str:
+    palavra = comando.lstrip()[:8].split(None, 1)
+    return palavra[0].upper() if palavra and palavra[0].isalpha() else "OUTRO"
+
+
+def _antes_do_comando(conexao, cursor, comando, parametros, contexto, executemany):
+    conexao.info.setdefault("metricas_inicio", []).append(time.perf_counter())
+
+
+def _depois_do_comando(conexao, cursor, comando, parametros, contexto, executemany):
+    duracao = time.perf_counter() - conexao.info["metricas_inicio"].pop()
+    operacao = _operacao(comando)
+    duracao_consulta.observar(duracao, operacao)
+    if cursor.rowcount > 0:
+        linhas_consulta.incrementar(operacao, valor=cursor.rowcount)
+
+    consultas = consultas_requisicao.get()
+    if consultas is not None:
+        consultas[0] += 1
+
+    if DB_CONSULTA_LENTA_MS and duracao * 1000 >= DB_CONSULTA_LENTA_MS:
+        logger.warning("Comando SQL lento (%.1f ms): %s", duracao * 1000, comando[:500])
+
+
+def _erro_no_comando(contexto_excecao):
+    # O after_cursor_execute não roda quando o comando falha
+    conexao = contexto_excecao.connection
+    if conexao is not None and conexao.info.get("metricas_inicio"):
+        conexao.info["metricas_inicio"].pop()
+
+
+def instrumentar_engine(engine_banco, nome: str = "sync"):
+    # Liga a medição dos comandos SQL e as métricas do pool de um engine síncrono
+    # (para o assíncrono, passe engine.sync_engine)
+    if not METRICAS_HABILITADAS:
+        return
+    event.listen(engine_banco, "before_cursor_execute", _antes_do_comando)
+    event.listen(engine_banco, "after_cursor_execute", _depois_do_comando)
+    event.listen(engine_banco, "handle_error", _erro_no_comando)
+
+    ENGINES[nome] = engine_banco
+
+
+def coletar_pool() -> List[str]:
+    linhas = ["# HELP db_pool_conexoes Conexões do pool por estado", "# TYPE db_pool_conexoes gauge"]
+    for nome, engine_banco in ENGINES.items():
+        pool = engine_banco.pool
+        for estado, metodo in (("em_uso", "checkedout"), ("disponiveis", "checkedin"),
+                               ("overflow", "overflow"), ("tamanho", "size")):
+            if hasattr(pool, metodo):
+                rotulos = _rotulos(("engine", "estado"), (nome, estado))
+                linhas.append(f"db_pool_conexoes{rotulos} {getattr(pool, metodo)()}")
+    return linhas
+
+
+COLETORES.append(coletar_pool)
@@ -0,0 +1,47 @@
+import base64
+import json
+from typing import Optional
+from fastapi import HTTPException
+from sqlmodel import Session
+
+
+def codificar_cursor(ultimo_id: int, **chaves) -> str:
+    # Gera um cursor opaco a partir do último id retornado na página
+    # (e das demais colunas da ordenação, quando não é só pelo id)
+    dados = json.dumps({"id": ultimo_id, **chaves}).encode()
+    return base64.urlsafe_b64encode(dados).decode().rstrip("=")
+
+
+def ler_cursor(cursor: str) -> dict:
+    try:
+        dados = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        dados["id"] = int(dados["id"])
+        return dados
+    except Exception:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+
+def decodificar_cursor(cursor: str) -> int:
+    return ler_cursor(cursor)["id"]
+
+
+def resolver_after_id(cursor: Optional[str], after_id: Optional[int]) -> Optional[int]:
+    # Retorna o id a partir do qual a página começa, ou None para a paginação por offset
+    if cursor:
+        return decodificar_cursor(cursor)
+    return after_id
+
+
+def paginar_por_chave(session: Session, query, coluna_id, after_id: int, size: int, carregar=None):
+    # Paginação por chave (keyset): WHERE id > :after_id ORDER BY id LIMIT size + 1.
+    # Usa o índice da chave primária, então o custo não depende da profundidade da página.
+    # carregar executa a consulta no lugar de session.exec (ex.: Utils.campos.selecionar,
+    # que devolve dicts)
+    query = query.where(coluna_id > after_id).order_by(coluna_id).limit(size + 1)
+    itens = carregar(query) if carregar else session.exec(query).all()
+
+    next_cursor = None
+    if len(itens) > size:
+        ultimo = itens[size - 1]
+        next_cursor = codificar_cursor(ultimo["id"] if isinstance(ultimo, dict) else ultimo.id)
+    return itens[:size], next_cursor
@@ -0,0 +1,284 @@
+from fastapi import HTTPException
+from sqlmodel import Session, select
+from sqlalchemy import case, delete, insert, update
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple, Union
+from datetime import date, datetime, time, timedelta
+from Models.models import Cliente, Pedido, ItemPedido, Produto, StatusPedido, StatusPedidoEnum
+from Utils.cache import invalidar_apos_commit, produto_cache, status_cache
+from Utils.contadores import incrementar
+from Utils.etag import versoes_alteradas
+from Utils.rollups import aplicar_pedido, aplicar_pedidos
+
+
+def carregar_status(session: Session):
+    # A tabela status_pedido só muda no seed (criar_status_padrao): os ids são
+    # carregados uma vez no startup e servidos do cache daí em diante
+    for status in session.exec(select(StatusPedido)).all():
+        status_cache.gravar(status.nome.value, status.id)
+
+
+def obter_status_id(session: Session, nome: str) -> int | None:
+    # Retorna o id do status pelo nome, consultando o banco apenas se não estiver em cache
+    chave = nome.value if isinstance(nome, StatusPedidoEnum) else nome
+    return status_cache.obter_ou_carregar(
+        chave,
+        lambda: session.exec(select(StatusPedido.id).where(StatusPedido.nome == chave)).first()
+    )
+
+
+def filtro_periodo(inicio: Optional[date], fim: Optional[date]) -> list:
+    # Predicados de intervalo semiaberto [inicio, fim + 1 dia) sobre data_pedido,
+    # que podem usar o índice da coluna (ao contrário de func.date(data_pedido)).
+    # Um limite None deixa o intervalo aberto daquele lado.
+    predicados = []
+    if inicio is not None:
+        predicados.append(Pedido.data_pedido >= datetime.combine(inicio, time.min))
+    if fim is not None:
+        predicados.append(Pedido.data_pedido < datetime.combine(fim + timedelta(days=1), time.min))
+    return predicados
+
+
+def agrupar_quantidades(itens: List[dict]) -> Dict[int, int]:
+    # Soma as quantidades de linhas repetidas do mesmo produto
+    quantidades: Dict[int, int] = {}
+    for item in itens:
+        quantidades[item["produto_id"]] = quantidades.get(item["produto_id"], 0) + item["quantidade"]
+    return quantidades
+
+
+def carregar_produtos(session: Session, produto_ids) -> Dict[int, Produto]:
+    # Carrega todos os produtos do pedido em uma única consulta IN (...).
+    # No PostgreSQL as linhas ficam travadas (FOR UPDATE) até o commit, sempre na
+    # ordem dos ids, para que pedidos com os mesmos produtos em ordens diferentes
+    # não entrem em deadlock e a validação veja o estoque que será baixado.
+    # O SQLite omite o FOR UPDATE: lá só há um escritor por vez.
+    produtos = session.exec(
+        select(Produto)
+        .where(Produto.id.in_(list(produto_ids)))
+        .order_by(Produto.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).all()
+    return {produto.id: produto for produto in produtos}
+
+
+def validar_itens(itens: List[dict], produtos: Dict[int, Produto]):
+    # Mesmas regras do loop original: produto existente e estoque suficiente,
+    # considerando o que as linhas anteriores do mesmo pedido já consumiram
+    consumido: Dict[int, int] = {}
+    for item in itens:
+        produto = produtos.get(item["produto_id"])
+        if not produto:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Produto com ID {item['produto_id']} não encontrado"
+            )
+
+        disponivel = produto.estoque - consumido.get(produto.id, 0)
+        if disponivel < item["quantidade"]:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Estoque insuficiente para o produto {produto.nome}. Disponível: {disponivel}"
+            )
+        consumido[produto.id] = consumido.get(produto.id, 0) + item["quantidade"]
+
+
+def baixar_estoque(session: Session, quantidades: Dict[int, int]) -> bool:
+    # Decrementa o estoque de todos os produtos com um único UPDATE condicional:
+    # UPDATE produto SET estoque = estoque - q WHERE id IN (...) AND estoque >= q
+    # Quantidades negativas devolvem unidades ao estoque (a condição sempre vale)
+    if not quantidades:
+        return True
+
+    quantidade = case(quantidades, value=Produto.id)
+    resultado = session.exec(
+        update(Produto)
+        .where(Produto.id.in_(list(quantidades)))
+        .where(Produto.estoque >= quantidade)
+        .values(estoque=Produto.estoque - quantidade)
+        .execution_options(synchronize_session=False)
+    )
+    invalidar_apos_commit(session, produto_cache, quantidades)
+    versoes_alteradas(session, "produto", quantidades, descritivos=False)
+    return resultado.rowcount == len(quantidades)
+
+
+def registrar_pedido(
+    session: Session, cliente_id: int, itens: List[dict], status_id: int, agregados: bool = True
+) -> Pedido:
+    # Insere o pedido, seus itens e baixa o estoque sem fazer commit.
+    # Usa um SELECT para os produtos, um INSERT em lote para os itens e um UPDATE
+    # para o estoque, independente da quantidade de linhas do pedido.
+    # Com agregados=False o contador e os rollups ficam para quem chamou
+    # (registrar_pedidos aplica os de vários pedidos de uma vez).
+    quantidades = agrupar_quantidades(itens)
+    produtos = carregar_produtos(session, quantidades)
+    validar_itens(itens, produtos)
+
+    novo_pedido = Pedido(
+        cliente_id=cliente_id,
+        status_id=status_id,
+        valor_total=sum(item["quantidade"] * item["preco_unitario"] for item in itens)
+    )
+    session.add(novo_pedido)
+    session.flush()
+    versoes_alteradas(session, "pedido", descritivos=False)
+
+    if itens:
+        session.exec(
+            insert(ItemPedido),
+            params=[
+                {
+                    "pedido_id": novo_pedido.id,
+                    "produto_id": item["produto_id"],
+                    "quantidade": item["quantidade"],
+                    "preco_unitario": item["preco_unitario"],
+                } for item in itens
+            ]
+        )
+
+    # Outra transação pode ter consumido o estoque entre a leitura e o UPDATE
+    if not baixar_estoque(session, quantidades):
+        raise HTTPException(
+            status_code=400,
+            detail="Estoque insuficiente: o estoque foi alterado por outro pedido"
+        )
+
+    if agregados:
+        incrementar(session, "pedido")
+        cancelado = status_id == obter_status_id(session, StatusPedidoEnum.CANCELADO)
+        aplicar_pedido(session, novo_pedido, itens, cancelado)
+    return novo_pedido
+
+
+def registrar_pedidos(
+    session: Session, pedidos: List[Tuple[int, List[dict]]], status_id: int
+) -> List[Union[Pedido, HTTPException]]:
+    # Registra vários pedidos (cliente_id, itens) na transação atual, sem commit.
+    # Cada pedido roda em um savepoint: um pedido inválido (cliente ou produto
+    # inexistente, estoque insuficiente) vira a HTTPException da sua posição no
+    # resultado e não desfaz os demais. O contador e os rollups dos pedidos
+    # gravados são aplicados uma vez no final, em vez de três comandos por pedido.
+    # Os clientes vêm em uma única consulta; mantê-los no mapa de identidade
+    # evita um SELECT por pedido ao atualizar o rollup por estado
+    cliente_ids = {cliente_id for cliente_id, _ in pedidos}
+    clientes_existentes = {
+        cliente.id: cliente
+        for cliente in session.exec(select(Cliente).where(Cliente.id.in_(cliente_ids))).all()
+    } if cliente_ids else {}
+
+    resultados: List[Union[Pedido, HTTPException]] = []
+    gravados = []
+    for cliente_id, itens in pedidos:
+        if cliente_id not in clientes_existentes:
+            resultados.append(HTTPException(status_code=404, detail=f"Cliente com ID {cliente_id} não encontrado"))
+            continue
+        try:
+            with session.begin_nested():
+                novo_pedido = registrar_pedido(session, cliente_id, itens, status_id, agregados=False)
+            resultados.append(novo_pedido)
+            gravados.append((novo_pedido, itens))
+        except HTTPException as e:
+            resultados.append(e)
+        except Exception as e:
+            resultados.append(HTTPException(status_code=500, detail=f"Erro ao criar pedido: {str(e)}"))
+
+    if gravados:
+        incrementar(session, "pedido", len(gravados))
+        cancelado = status_id == obter_status_id(session, StatusPedidoEnum.CANCELADO)
+        aplicar_pedidos(session, [(pedido, itens, cancelado) for pedido, itens in gravados])
+    return resultados
+
+
+def ajustar_reserva(
+    session: Session, anterior: Dict[int, int], nova: Dict[int, int], produto_ids: Iterable[int] = ()
+):
+    # Troca a reserva de estoque de um pedido (quantidade por produto) pela nova,
+    # aplicando só a diferença líquida com um único UPDATE condicional: produtos
+    # com mais unidades reservadas são baixados e os com menos recebem a sobra.
+    # produto_ids são os produtos que precisam existir mesmo sem diferença.
+    diferencas = {
+        produto_id: nova.get(produto_id, 0) - anterior.get(produto_id, 0)
+        for produto_id in anterior.keys() | nova.keys()
+    }
+    diferencas = {produto_id: delta for produto_id, delta in diferencas.items() if delta}
+    exigidos = set(produto_ids) | {produto_id for produto_id, delta in diferencas.items() if delta > 0}
+    if not diferencas and not exigidos:
+        return
+
+    produtos = carregar_produtos(session, diferencas.keys() | exigidos)
+    for produto_id in exigidos:
+        produto = produtos.get(produto_id)
+        if not produto:
+            raise HTTPException(status_code=404, detail=f"Produto com ID {produto_id} não encontrado")
+        # As unidades que o pedido já reserva também estão disponíveis para ele
+        disponivel = produto.estoque + anterior.get(produto_id, 0)
+        if nova.get(produto_id, 0) > disponivel:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Estoque insuficiente para o produto {produto.nome}. Disponível: {disponivel}"
+            )
+
+    # Unidades de produtos que já saíram do catálogo não têm para onde voltar
+    diferencas = {produto_id: delta for produto_id, delta in diferencas.items() if produto_id in produtos}
+    if not baixar_estoque(session, diferencas):
+        raise HTTPException(
+            status_code=400,
+            detail="Estoque insuficiente: o estoque foi alterado por outro pedido"
+        )
+
+
+def sincronizar_itens(session: Session, pedido_id: int, atuais: List[dict], novos: List[dict]) -> int:
+    # Substitui os itens do pedido pelos novos alterando só as linhas diferentes.
+    # As linhas de cada produto são pareadas na ordem: pares com quantidade ou
+    # preço diferentes viram UPDATE, sobras da lista nova INSERT e sobras da
+    # antiga DELETE, cada grupo em um único comando. atuais vem de
+    # itens_do_pedido (com id). Retorna quantas linhas foram gravadas.
+    antigos: Dict[int, List[dict]] = {}
+    for item in atuais:
+        antigos.setdefault(item["produto_id"], []).append(item)
+
+    inserir, atualizar = [], []
+    for item in novos:
+        pendentes = antigos.get(item["produto_id"])
+        if pendentes:
+            antigo = pendentes.pop(0)
+            if (antigo["quantidade"], antigo["preco_unitario"]) != (item["quantidade"], item["preco_unitario"]):
+                atualizar.append({
+                    "id": antigo["id"],
+                    "quantidade": item["quantidade"],
+                    "preco_unitario": item["preco_unitario"],
+                })
+        else:
+            inserir.append({
+                "pedido_id": pedido_id,
+                "produto_id": item["produto_id"],
+                "quantidade": item["quantidade"],
+                "preco_unitario": item["preco_unitario"],
+            })
+    remover = [item["id"] for pendentes in antigos.values() for item in pendentes]
+
+    if remover:
+        session.exec(delete(ItemPedido).where(ItemPedido.id.in_(remover)))
+    if atualizar:
+        # UPDATE em lote pela chave primária
+        session.exec(update(ItemPedido), params=atualizar)
+    if inserir:
+        session.exec(insert(ItemPedido), params=inserir)
+    return len(remover) + len(atualizar) + len(inserir)
+
+
+async def ler_linhas_ndjson(stream: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    # Lê o corpo da requisição em pedaços e entrega uma linha por vez (com o número
+    # da linha), sem carregar o corpo inteiro em memória
+    numero = 0
+    resto = b""
+    async for pedaco in stream:
+        resto += pedaco
+        *linhas, resto = resto.split(b"\n")
+        for linha in linhas:
+            numero += 1
+            if linha.strip():
+                yield numero, linha
+    if resto.strip():
+        yield numero + 1, resto
@@ -0,0 +1,413 @@
+"""
+Repositório de clientes e produtos em arquivo CSV, com escrita só por append.
+
+O arquivo é um log: cada inserção ou atualização acrescenta a versão completa da
+linha no final e cada remoção acrescenta uma lápide (coluna _removido = 1). Um
+índice id -> posição (byte) da versão atual fica em memória e é persistido em
+<arquivo>.idx; ao abrir, só o trecho do log escrito depois do último
+salvamento do índice é relido. Assim obter/inserir/atualizar/remover custam
+O(1) amortizado, independente do tamanho do arquivo.
+
+Versões antigas e lápides são descartadas pela compactação, que roda em uma
+thread quando o lixo passa da metade do arquivo: as linhas vivas são copiadas
+para um arquivo novo sem bloquear as escritas e só a cópia do que foi
+acrescentado nesse meio tempo e a troca dos arquivos acontecem sob o lock.
+
+Escritores concorrentes (threads ou processos) são serializados por um flock
+em <arquivo>.lock; antes de cada operação o repositório relê o que outros
+processos acrescentaram ao log. Sem fcntl (Windows) o lock vale só dentro do
+processo.
+
+Arquivos no formato antigo (sem a coluna _removido, em UTF-8 ou Latin-1) são
+lidos como estão e só convertidos na primeira escrita: abrir o repositório não
+altera o arquivo.
+
+exportar() devolve só os dados vivos, no formato original (sem versões antigas,
+lápides nem a coluna _removido); é o que compactar_csv e calcular_hash
+(Utils.utils) empacotam e resumem.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Type
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from pydantic import BaseModel
+from Utils.importacao import detectar_codificacao
+
+COLUNA_REMOVIDO = "_removido"
+
+# Compacta quando houver mais versões mortas que vivas, a partir deste mínimo
+LIXO_MINIMO = int(os.getenv("CSV_LIXO_MINIMO", 1000))
+
+# O índice é salvo depois de max(INDICE_MINIMO, 10% das linhas) escritas; o
+# custo O(N) do salvamento fica diluído nessas escritas
+INDICE_MINIMO = 1000
+
+
+def _ler_registro(arquivo) -> bytes:
+    # Uma linha do CSV, incluindo quebras de linha dentro de campos entre aspas
+    registro = arquivo.readline()
+    while registro.count(b'"') % 2 and (continuacao := arquivo.readline()):
+        registro += continuacao
+    return registro
+
+
+def _campos(registro: bytes, codificacao: str = "utf-8") -> List[str]:
+    return next(csv.reader([registro.decode(codificacao)]), [])
+
+
+def _serializar(valores) -> bytes:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(valores)
+    return buffer.getvalue().encode("utf-8")
+
+
+class RepositorioCSV:
+    def __init__(self, arquivo: str, modelo: Optional[Type[BaseModel]] = None):
+        self.arquivo = os.path.abspath(arquivo)
+        self.modelo = modelo
+        self._trava_local = threading.RLock()
+        self._compactando = False
+        # Arquivo de dados aberto: além de servir as leituras, mantém o inode em uso,
+        # então um arquivo novo (compactação) nunca recebe o mesmo inode
+        self._dados = None
+        self._descartar_estado()
+        with self._trava():
+            if not os.path.exists(self.arquivo):
+                if modelo is None:
+                    raise ValueError(f"Arquivo '{arquivo}' não existe e nenhum modelo foi informado.")
+                with open(self.arquivo, "wb") as novo:
+                    novo.write(_serializar([*modelo.model_fields, COLUNA_REMOVIDO]))
+            self._carregar()
+
+    # --- Estado e sincronização ---------------------------------------------------
+
+    def _descartar_estado(self):
+        self.campos: List[str] = []
+        self.offsets: Dict[int, int] = {}
+        self.proximo_id = 1
+        self.lixo = 0
+        # Formato antigo (sem _removido), só leitura até a primeira escrita
+        self._legado = False
+        self._codificacao = "utf-8"
+        self._inode = None
+        self._tamanho = 0
+        self._fim_cabecalho = 0
+        self._nao_salvas = 0
+
+    @contextmanager
+    def _trava(self, exclusiva: bool = True):
+        with self._trava_local:
+            if fcntl is None:
+                yield
+                return
+            with open(self.arquivo + ".lock", "a") as trava:
+                fcntl.flock(trava, fcntl.LOCK_EX if exclusiva else fcntl.LOCK_SH)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(trava, fcntl.LOCK_UN)
+
+    def _carregar(self):
+        # Lê o cabeçalho, o índice salvo (se ainda corresponder ao arquivo) e
+        # reaplica o trecho do log escrito depois dele
+        self._descartar_estado()
+        self._abrir()
+
+        estado = os.fstat(self._dados.fileno())
+        self._tamanho = self._fim_cabecalho
+        try:
+            with open(self.arquivo + ".idx") as arquivo_indice:
+                indice = json.load(arquivo_indice)
+            if indice["inode"] == estado.st_ino and indice["tamanho"] <= estado.st_size:
+                self.offsets = {int(id_): offset for id_, offset in indice["offsets"]}
+                self.proximo_id = indice["proximo_id"]
+                self.lixo = indice["lixo"]
+                self._tamanho = indice["tamanho"]
+        except (OSError, ValueError, KeyError):
+            pass
+        self._reaplicar(estado.st_size)
+
+    def _abrir(self):
+        if self._dados:
+            self._dados.close()
+        self._dados = open(self.arquivo, "rb")
+        self._inode = os.fstat(self._dados.fileno()).st_ino
+        cabecalho = _ler_registro(self._dados)
+        if _campos(cabecalho, "latin-1")[-1:] != [COLUNA_REMOVIDO]:
+            self._legado = True
+            self._dados.seek(0)
+            self._codificacao = detectar_codificacao(self._dados)
+            self._dados.seek(len(cabecalho))
+        self.campos = self._decodificar(cabecalho)
+        self._fim_cabecalho = self._dados.tell()
+
+    def _decodificar(self, registro: bytes) -> List[str]:
+        return _campos(registro, self._codificacao)
+
+    def _colunas(self) -> List[str]:
+        # Colunas de dados, sem _removido
+        return self.campos if self._legado else self.campos[:-1]
+
+    def _reaplicar(self, ate: int):
+        # Atualiza o índice com os registros entre a última posição conhecida e `ate`
+        dados = self._dados
+        dados.seek(self._tamanho)
+        while dados.tell() < ate:
+            posicao = dados.tell()
+            valores = self._decodificar(_ler_registro(dados))
+            if not valores:
+                continue
+            id_ = int(valores[0])
+            if id_ in self.offsets:
+                self.lixo += 1
+            if not self._legado and valores[-1] == "1":
+                self.offsets.pop(id_, None)
+                self.lixo += 1
+            else:
+                self.offsets[id_] = posicao
+            self.proximo_id = max(self.proximo_id, id_ + 1)
+            self._nao_salvas += 1
+        self._tamanho = dados.tell()
+
+    def _sincronizar(self):
+        # Chamado sob o lock: outro processo pode ter compactado (arquivo novo)
+        # ou acrescentado registros ao log
+        estado = os.stat(self.arquivo)
+        if estado.st_ino != self._inode:
+            self._carregar()
+        elif estado.st_size > self._tamanho:
+            self._reaplicar(estado.st_size)
+
+    def _salvar_indice(self, forcar: bool = False):
+        if not forcar and self._nao_salvas < max(INDICE_MINIMO, len(self.offsets) // 10):
+            return
+        temporario = self.arquivo + ".idx.tmp"
+        with open(temporario, "w") as arquivo_indice:
+            json.dump({
+                "inode": self._inode,
+                "tamanho": self._tamanho,
+                "proximo_id": self.proximo_id,
+                "lixo": self.lixo,
+                "offsets": list(self.offsets.items()),
+            }, arquivo_indice)
+        os.replace(temporario, self.arquivo + ".idx")
+        self._nao_salvas = 0
+
+    def _remover_indice(self):
+        # Antes de trocar o arquivo: um índice antigo nunca deve valer para o
+        # arquivo novo (o inode do arquivo antigo pode ser reaproveitado)
+        try:
+            os.remove(self.arquivo + ".idx")
+        except FileNotFoundError:
+            pass
+
+    def _preparar_escrita(self):
+        # Chamado sob o lock antes de escrever: um arquivo no formato antigo é
+        # convertido agora, e não ao abrir
+        if self._legado:
+            self._migrar()
+            self._carregar()
+
+    def _migrar(self):
+        # Converte um CSV no formato antigo para o log (UTF-8, coluna _removido)
+        with open(self.arquivo, "rb") as antigo:
+            codificacao = detectar_codificacao(antigo)
+            leitor = csv.reader(io.TextIOWrapper(antigo, encoding=codificacao, newline=""))
+            cabecalho = next(leitor)
+            linhas = {int(valores[0]): valores for valores in leitor if valores}
+        temporario = self.arquivo + ".tmp"
+        with open(temporario, "wb") as novo:
+            novo.write(_serializar([*cabecalho, COLUNA_REMOVIDO]))
+            for id_ in sorted(linhas):
+                novo.write(_serializar([*linhas[id_], ""]))
+        self._remover_indice()
+        os.replace(temporario, self.arquivo)
+
+    # --- Leitura e escrita de registros ----------------------------------------------
+
+    def _acrescentar(self, valores) -> int:
+        with open(self.arquivo, "ab") as dados:
+            dados.write(_serializar(valores))
+        posicao = self._tamanho
+        self._tamanho = os.path.getsize(self.arquivo)
+        self._nao_salvas += 1
+        return posicao
+
+    def _montar(self, valores: List[str]):
+        dados = dict(zip(self._colunas(), valores))
+        return self.modelo.model_validate(dados) if self.modelo else dados
+
+    def _depois_de_escrever(self):
+        self._salvar_indice()
+        if self.lixo >= max(LIXO_MINIMO, len(self.offsets)) and not self._compactando:
+            self._compactando = True
+            threading.Thread(target=self.compactar, daemon=True).start()
+
+    def _valores(self, item: BaseModel, id_: int) -> list:
+        dados = item.model_dump()
+        dados["id"] = id_
+        return [dados.get(campo, "") for campo in self._colunas()] + [""]
+
+    # --- Operações --------------------------------------------------------------------
+
+    def obter(self, id_: int):
+        with self._trava(exclusiva=False):
+            self._sincronizar()
+            posicao = self.offsets.get(id_)
+            if posicao is None:
+                return None
+            self._dados.seek(posicao)
+            return self._montar(self._decodificar(_ler_registro(self._dados)))
+
+    def listar(self) -> list:
+        # Leitura sequencial do log, devolvendo só a versão atual de cada id
+        with self._trava(exclusiva=False):
+            self._sincronizar()
+            vivas = set(self.offsets.values())
+            registros = []
+            dados = self._dados
+            dados.seek(self._fim_cabecalho)
+            while dados.tell() < self._tamanho:
+                posicao = dados.tell()
+                registro = _ler_registro(dados)
+                if posicao in vivas:
+                    registros.append(self._decodificar(registro))
+        registros.sort(key=lambda valores: int(valores[0]))
+        return [self._montar(valores) for valores in registros]
+
+    def contar(self) -> int:
+        with self._trava(exclusiva=False):
+            self._sincronizar()
+            return len(self.offsets)
+
+    def exportar(self) -> Iterator[bytes]:
+        # Os dados vivos em CSV UTF-8, em ordem de id e com o cabeçalho original:
+        # os mesmos dados geram sempre os mesmos bytes, qualquer que seja o
+        # histórico do log (ou o formato do arquivo, antigo ou não)
+        with self._trava(exclusiva=False):
+            self._sincronizar()
+            colunas = self._colunas()
+            conteudo = [_serializar(colunas)]
+            for _, posicao in sorted(self.offsets.items()):
+                self._dados.seek(posicao)
+                conteudo.append(_serializar(self._decodificar(_ler_registro(self._dados))[:len(colunas)]))
+        yield from conteudo
+
+    def inserir(self, item: BaseModel, id_: Optional[int] = None) -> int:
+        # Sem id_ o id é sempre novo (ids removidos não são reutilizados); com id_
+        # grava naquele id, que não pode estar em uso
+        with self._trava():
+            self._sincronizar()
+            if id_ is None:
+                id_ = self.proximo_id
+            elif id_ in self.offsets:
+                raise ValueError(f"Já existe um registro com id {id_} em '{self.arquivo}'.")
+            self._preparar_escrita()
+            self.offsets[id_] = self._acrescentar(self._valores(item, id_))
+            self.proximo_id = max(self.proximo_id, id_ + 1)
+            self._depois_de_escrever()
+        item.id = id_
+        return id_
+
+    def atualizar(self, id_: int, item: BaseModel) -> bool:
+        with self._trava():
+            self._sincronizar()
+            if id_ not in self.offsets:
+                return False
+            self._preparar_escrita()
+            self.offsets[id_] = self._acrescentar(self._valores(item, id_))
+            self.lixo += 1
+            self._depois_de_escrever()
+        return True
+
+    def remover(self, id_: int) -> bool:
+        with self._trava():
+            self._sincronizar()
+            if id_ not in self.offsets:
+                return False
+            self._preparar_escrita()
+            self._acrescentar([id_] + [""] * (len(self.campos) - 2) + ["1"])
+            del self.offsets[id_]
+            self.lixo += 2
+            self._depois_de_escrever()
+        return True
+
+    def compactar(self):
+        # Reescreve o arquivo só com as versões atuais, em ordem de id
+        try:
+            with self._trava():
+                self._sincronizar()
+                self._preparar_escrita()
+                inode, tamanho = self._inode, self._tamanho
+                vivas = sorted(self.offsets.items())
+                # Aberto sob o lock: é o mesmo arquivo do snapshot e, enquanto
+                # estiver aberto, seu inode não é reaproveitado
+                antigo = open(self.arquivo, "rb")
+
+            # Nome único: outro processo pode estar compactando o mesmo arquivo
+            descritor, temporario = tempfile.mkstemp(dir=os.path.dirname(self.arquivo), suffix=".tmp")
+            novos_offsets = {}
+            with antigo, open(descritor, "wb") as novo:
+                novo.write(_serializar(self.campos))
+                for id_, posicao in vivas:
+                    antigo.seek(posicao)
+                    novos_offsets[id_] = novo.tell()
+                    novo.write(_ler_registro(antigo))
+
+                with self._trava():
+                    self._sincronizar()
+                    if self._inode != inode:
+                        # Outro processo compactou antes
+                        novo.close()
+                        os.remove(temporario)
+                        return
+                    # Copia o que foi acrescentado durante a cópia
+                    antigo.seek(tamanho)
+                    inicio_cauda = novo.tell()
+                    novo.write(antigo.read(self._tamanho - tamanho))
+                    novo.close()
+                    self._remover_indice()
+                    os.replace(temporario, self.arquivo)
+
+                    # Índice novo: posições copiadas + o trecho acrescentado, reaplicado
+                    proximo_id = self.proximo_id
+                    self._descartar_estado()
+                    self._abrir()
+                    self.offsets = novos_offsets
+                    self.proximo_id = proximo_id
+                    self._tamanho = inicio_cauda
+                    self._reaplicar(os.fstat(self._dados.fileno()).st_size)
+                    self._salvar_indice(forcar=True)
+        finally:
+            self._compactando = False
+
+    def fechar(self):
+        # Salva o índice para que a próxima abertura não precise reler o log
+        with self._trava():
+            self._sincronizar()
+            self._salvar_indice(forcar=True)
+
+
+_repositorios: Dict[str, RepositorioCSV] = {}
+_repositorios_trava = threading.Lock()
+
+
+def repositorio(arquivo: str, modelo: Optional[Type[BaseModel]] = None) -> RepositorioCSV:
+    # Um repositório por arquivo no processo, para reaproveitar o índice em memória
+    caminho = os.path.abspath(arquivo)
+    with _repositorios_trava:
+        if caminho not in _repositorios:
+            _repositorios[caminho] = RepositorioCSV(caminho, modelo)
+        elif modelo is not None:
+            _repositorios[caminho].modelo = modelo
+        return _repositorios[caminho]
@@ -0,0 +1,189 @@
+"""
+Serialização rápida das respostas de pedidos.
+
+Em vez de carregar objetos Pedido com selectinload, montar PedidoResponse,
+ItemPedidoResponse e ProdutoResponse campo a campo e deixar o FastAPI validar
+tudo de novo pelo response_model, a página inteira sai de uma única consulta
+com JOIN que projeta só as colunas da resposta. As linhas viram dicts e são
+codificadas direto com orjson, no mesmo formato de PedidoResponse.
+
+pedidos_recentes() monta o resumo paginado dos pedidos embutido nas respostas
+de cliente com ?include=pedidos.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional
+import orjson
+from fastapi import Response
+from sqlmodel import Session, select
+from sqlalchemy import Select, tuple_, union_all
+from Models.models import Cliente, ItemPedido, Pedido, Produto, StatusPedido
+from Utils.paginacao import codificar_cursor
+
+# Clientes por consulta em pedidos_recentes (uma subconsulta UNION ALL por cliente)
+CLIENTES_POR_CONSULTA = 200
+
+COLUNAS_PEDIDO = (
+    Pedido.id,
+    Pedido.data_pedido,
+    Pedido.valor_total,
+    StatusPedido.nome,
+    Cliente.nome,
+    ItemPedido.id,
+    ItemPedido.quantidade,
+    ItemPedido.preco_unitario,
+    Produto.id,
+    Produto.nome,
+    Produto.categoria,
+    Produto.preco,
+)
+
+
+def consultar_pedidos(
+    session: Session, pagina: Select, ordem: tuple = (Pedido.id,), campos: Optional[List[str]] = None
+) -> List[dict]:
+    # pagina é um SELECT pedido.id com os filtros, a ordenação e o LIMIT da rota;
+    # ordem repete as colunas de ordenação para a consulta externa.
+    # campos (?fields=) sem "itens" troca a consulta por uma linha por pedido,
+    # sem os JOINs de itens e produtos (Utils.campos.projetar corta o resto)
+    if campos is not None and "itens" not in campos:
+        return resumir_pedidos(session, pagina, ordem, campos)
+
+    pagina = pagina.subquery()
+    linhas = session.exec(
+        select(*COLUNAS_PEDIDO)
+        .join(pagina, pagina.c.id == Pedido.id)
+        .outerjoin(StatusPedido, StatusPedido.id == Pedido.status_id)
+        .outerjoin(Cliente, Cliente.id == Pedido.cliente_id)
+        .outerjoin(ItemPedido, ItemPedido.pedido_id == Pedido.id)
+        .outerjoin(Produto, Produto.id == ItemPedido.produto_id)
+        .order_by(*ordem, ItemPedido.id)
+    ).all()
+
+    pedidos = []
+    atual = None
+    for (pedido_id, data_pedido, valor_total, status, cliente_nome,
+         item_id, quantidade, preco_unitario, produto_id, produto_nome, categoria, preco) in linhas:
+        if atual is None or atual["id"] != pedido_id:
+            atual = {
+                "id": pedido_id,
+                "data_pedido": data_pedido,
+                "valor_total": valor_total,
+                "status": status.value if status else "Status não definido",
+                "cliente_nome": cliente_nome if cliente_nome is not None else "Cliente não encontrado",
+                "itens": [],
+            }
+            pedidos.append(atual)
+
+        # Itens sem produto ficam de fora, como em PedidoResponse
+        if produto_id is not None:
+            atual["itens"].append({
+                "id": item_id,
+                "quantidade": quantidade,
+                "preco_unitario": preco_unitario,
+                "subtotal": quantidade * preco_unitario,
+                "produto": {"id": produto_id, "nome": produto_nome, "categoria": categoria, "preco": preco},
+            })
+    return pedidos
+
+
+def resumir_pedidos(session: Session, pagina: Select, ordem: tuple, campos: List[str]) -> List[dict]:
+    # Pedidos sem itens; status e cliente só entram no JOIN se estiverem em campos.
+    # id e data_pedido sempre vêm, pois a paginação por cursor usa os dois.
+    pagina = pagina.subquery()
+    query = select(Pedido.id, Pedido.data_pedido, Pedido.valor_total).join(pagina, pagina.c.id == Pedido.id)
+    if "status" in campos:
+        query = query.add_columns(StatusPedido.nome.label("status")).outerjoin(
+            StatusPedido, StatusPedido.id == Pedido.status_id
+        )
+    if "cliente_nome" in campos:
+        query = query.add_columns(Cliente.nome.label("cliente_nome")).outerjoin(
+            Cliente, Cliente.id == Pedido.cliente_id
+        )
+
+    pedidos = []
+    for linha in session.exec(query.order_by(*ordem)).all():
+        pedido = linha._asdict()
+        # Mesmos valores padrão de consultar_pedidos
+        if "status" in pedido:
+            pedido["status"] = pedido["status"].value if pedido["status"] else "Status não definido"
+        if "cliente_nome" in pedido and pedido["cliente_nome"] is None:
+            pedido["cliente_nome"] = "Cliente não encontrado"
+        pedidos.append(pedido)
+    return pedidos
+
+
+def pedidos_recentes(
+    session: Session, cliente_ids: List[int], size: int, posicao: Optional[dict] = None
+) -> Dict[int, dict]:
+    # Até size pedidos de cada cliente, do mais recente para o mais antigo, no
+    # formato {"items": [...], "next_cursor": ...}. Cada cliente tem a própria
+    # subconsulta com LIMIT size + 1 (unidas por UNION ALL), que percorre só
+    # essas entradas do índice ix_pedido_cliente_data, por maior que seja o
+    # histórico. Acima de CLIENTES_POR_CONSULTA clientes são várias consultas,
+    # para não passar do limite de termos de um SELECT composto do SQLite (500).
+    # posicao (ler_cursor de um next_cursor) continua a partir do último pedido
+    # de uma página anterior.
+    embutidos = {cliente_id: {"items": [], "next_cursor": None} for cliente_id in cliente_ids}
+    for inicio in range(0, len(cliente_ids), CLIENTES_POR_CONSULTA):
+        _preencher_recentes(session, cliente_ids[inicio:inicio + CLIENTES_POR_CONSULTA], size, posicao, embutidos)
+    return embutidos
+
+
+def _preencher_recentes(
+    session: Session, cliente_ids: List[int], size: int, posicao: Optional[dict], embutidos: Dict[int, dict]
+):
+    # Uma consulta de pedidos_recentes, gravando as páginas em embutidos
+    filtros = []
+    if posicao:
+        filtros.append(
+            tuple_(Pedido.data_pedido, Pedido.id)
+            < tuple_(datetime.fromisoformat(posicao["data_pedido"]), posicao["id"])
+        )
+    partes = [
+        select(Pedido.id, Pedido.cliente_id, Pedido.data_pedido, Pedido.valor_total, Pedido.status_id)
+        .where(Pedido.cliente_id == cliente_id, *filtros)
+        .order_by(Pedido.data_pedido.desc(), Pedido.id.desc())
+        .limit(size + 1)
+        .subquery()
+        .select()
+        for cliente_id in cliente_ids
+    ]
+    recentes = (union_all(*partes) if len(partes) > 1 else partes[0]).subquery()
+    linhas = session.exec(
+        select(recentes.c.id, recentes.c.cliente_id, recentes.c.data_pedido, recentes.c.valor_total, StatusPedido.nome)
+        .outerjoin(StatusPedido, StatusPedido.id == recentes.c.status_id)
+        .order_by(recentes.c.cliente_id, recentes.c.data_pedido.desc(), recentes.c.id.desc())
+    ).all()
+
+    for pedido_id, cliente_id, data_pedido, valor_total, status in linhas:
+        pagina = embutidos[cliente_id]
+        if len(pagina["items"]) == size:
+            # A linha size + 1 só indica que há mais pedidos
+            ultimo = pagina["items"][-1]
+            pagina["next_cursor"] = codificar_cursor(ultimo["id"], data_pedido=ultimo["data_pedido"].isoformat())
+            continue
+        pagina["items"].append({
+            "id": pedido_id,
+            "data_pedido": data_pedido,
+            "valor_total": valor_total,
+            "status": status.value if status else "Status não definido",
+        })
+
+
+def resposta_json(conteudo, headers: Optional[dict] = None) -> Response:
+    # Pula a validação do response_model; o schema continua documentado na rota
+    return Response(content=orjson.dumps(conteudo), media_type="application/json", headers=headers)
+
+
+def pagina_json(
+    items: List[dict], size: int, total=None, page=None, pages=None, next_cursor=None, headers: Optional[dict] = None
+) -> Response:
+    # Mesmo formato de PaginatedResponse
+    return resposta_json({
+        "items": items,
+        "total": total,
+        "page": page,
+        "size": size,
+        "pages": pages,
+        "next_cursor": next_cursor,
+    }, headers)
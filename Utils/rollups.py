@@ -0,0 +1,230 @@
+"""
+Rollups diários de vendas por (dia, produto_id) e (dia, estado do cliente).
+
+As rotas de pedido chamam aplicar_pedido() na mesma transação em que criam,
+alteram ou removem pedidos, somando ou subtraindo as quantidades do pedido.
+Os relatórios leem apenas essas tabelas, então o custo não cresce com o
+histórico de pedidos.
+
+Pedidos gravados por fora das rotas (cargas direto no banco) entram com a
+atualização em lote, que recalcula os dias a partir do primeiro pedido com id
+acima da marca. A reconstrução recalcula tudo.
+
+O rollup por estado usa o estado atual do cliente, como a reconstrução: as
+rotas de cliente chamam mover_cliente() quando o estado muda ou o cliente é
+removido. Pedidos de clientes removidos continuam no rollup, no estado
+SEM_ESTADO, então as somas por estado cobrem todos os pedidos e servem também
+para os totais globais.
+
+Atualização e reconstrução (a partir da raiz do projeto):
+    python -m Utils.rollups --atualizar
+    python -m Utils.rollups --reconstruir
+"""
+import argparse
+from datetime import date, datetime, time
+from typing import Dict, List, Optional, Tuple
+from sqlmodel import Session, select
+from sqlalchemy import delete, distinct, func, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from Models.models import (
+    Cliente, ItemPedido, MarcaRollup, Pedido, StatusPedido, StatusPedidoEnum,
+    VendaDiariaEstado, VendaDiariaProduto
+)
+
+MARCA = "pedido"
+
+# Estado dos pedidos cujo cliente foi removido
+SEM_ESTADO = ""
+
+
+# Linhas por upsert: mantém os parâmetros abaixo do limite do SQLite e do PostgreSQL
+LINHAS_POR_UPSERT = 1000
+
+
+def _somar(session: Session, modelo, valores: List[dict]):
+    # INSERT ... ON CONFLICT DO UPDATE somando os deltas às linhas existentes
+    dialeto = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    chaves = [coluna.name for coluna in modelo.__table__.primary_key]
+    for inicio in range(0, len(valores), LINHAS_POR_UPSERT):
+        query = dialeto.insert(modelo).values(valores[inicio:inicio + LINHAS_POR_UPSERT])
+        session.exec(query.on_conflict_do_update(
+            index_elements=chaves,
+            set_={
+                coluna: getattr(modelo, coluna) + getattr(query.excluded, coluna)
+                for coluna in ("quantidade", "receita", "pedidos")
+            }
+        ))
+
+
+def itens_do_pedido(session: Session, pedido_id: int) -> List[dict]:
+    return [
+        linha._asdict() for linha in session.exec(
+            select(ItemPedido.id, ItemPedido.produto_id, ItemPedido.quantidade, ItemPedido.preco_unitario)
+            .where(ItemPedido.pedido_id == pedido_id)
+            .order_by(ItemPedido.id)
+        ).all()
+    ]
+
+
+def aplicar_pedido(session: Session, pedido: Pedido, itens: List[dict], cancelado: bool, sinal: int = 1):
+    # Soma (sinal=1) ou subtrai (sinal=-1) um pedido dos rollups, sem commit.
+    # São dois upserts por pedido, independente da quantidade de itens.
+    aplicar_pedidos(session, [(pedido, itens, cancelado)], sinal)
+
+
+def aplicar_pedidos(session: Session, pedidos: List[Tuple[Pedido, List[dict], bool]], sinal: int = 1):
+    # Como aplicar_pedido para vários pedidos (pedido, itens, cancelado): os deltas
+    # de mesma chave são somados antes, e o lote inteiro custa dois upserts
+    por_produto: Dict[tuple, list] = {}
+    por_estado: Dict[tuple, list] = {}
+    for pedido, itens, cancelado in pedidos:
+        if not itens:
+            continue
+        dia = pedido.data_pedido.date()
+        # Cliente removido (cliente_id anulado): o pedido fica em SEM_ESTADO
+        cliente = session.get(Cliente, pedido.cliente_id) if pedido.cliente_id is not None else None
+        estado = cliente.estado if cliente is not None else SEM_ESTADO
+        totais_estado = por_estado.setdefault((dia, estado, cancelado), [0, 0.0, 0])
+        totais_estado[2] += 1
+        produtos_do_pedido = set()
+        for item in itens:
+            totais = por_produto.setdefault((dia, item["produto_id"], cancelado), [0, 0.0, 0])
+            totais[0] += item["quantidade"]
+            totais[1] += item["quantidade"] * item["preco_unitario"]
+            totais_estado[0] += item["quantidade"]
+            totais_estado[1] += item["quantidade"] * item["preco_unitario"]
+            # Um pedido conta uma vez por produto, mesmo com linhas repetidas
+            if item["produto_id"] not in produtos_do_pedido:
+                produtos_do_pedido.add(item["produto_id"])
+                totais[2] += 1
+
+    if por_produto:
+        _somar(session, VendaDiariaProduto, [
+            {
+                "dia": dia, "produto_id": produto_id, "cancelado": cancelado,
+                "quantidade": sinal * quantidade, "receita": sinal * receita, "pedidos": sinal * pedidos_
+            } for (dia, produto_id, cancelado), (quantidade, receita, pedidos_) in por_produto.items()
+        ])
+    if por_estado:
+        _somar(session, VendaDiariaEstado, [
+            {
+                "dia": dia, "estado": estado, "cancelado": cancelado,
+                "quantidade": sinal * quantidade, "receita": sinal * receita, "pedidos": sinal * pedidos_
+            } for (dia, estado, cancelado), (quantidade, receita, pedidos_) in por_estado.items()
+        ])
+
+
+def mover_cliente(session: Session, cliente_id: int, estado_anterior: str, estado_novo: str):
+    # Passa os pedidos do cliente de um estado para outro no rollup por estado, sem
+    # commit (cliente removido: estado_novo=SEM_ESTADO)
+    dia = func.date(Pedido.data_pedido)
+    cancelado = Pedido.status_id == _status_cancelado(session)
+    linhas = session.exec(
+        select(
+            dia, cancelado, func.sum(ItemPedido.quantidade),
+            func.sum(ItemPedido.quantidade * ItemPedido.preco_unitario), func.count(distinct(Pedido.id))
+        )
+        .join(Pedido, Pedido.id == ItemPedido.pedido_id)
+        .where(Pedido.cliente_id == cliente_id)
+        .group_by(dia, cancelado)
+    ).all()
+
+    valores = []
+    for dia_venda, foi_cancelado, quantidade, receita, pedidos in linhas:
+        dia_venda = date.fromisoformat(str(dia_venda)[:10])
+        for estado, sinal in ((estado_anterior, -1), (estado_novo, 1)):
+            valores.append({
+                "dia": dia_venda, "estado": estado, "cancelado": bool(foi_cancelado),
+                "quantidade": sinal * quantidade, "receita": sinal * receita, "pedidos": sinal * pedidos
+            })
+    if valores:
+        _somar(session, VendaDiariaEstado, valores)
+
+
+def _status_cancelado(session: Session) -> Optional[int]:
+    return session.exec(
+        select(StatusPedido.id).where(StatusPedido.nome == StatusPedidoEnum.CANCELADO)
+    ).first()
+
+
+def recalcular(session: Session, inicio: Optional[date] = None):
+    # Apaga e recalcula com GROUP BY os rollups a partir de inicio (ou todos), sem commit
+    dia = func.date(Pedido.data_pedido)
+    cancelado = Pedido.status_id == _status_cancelado(session)
+    filtros = [Pedido.data_pedido >= datetime.combine(inicio, time.min)] if inicio else []
+
+    for modelo in (VendaDiariaProduto, VendaDiariaEstado):
+        session.exec(delete(modelo).where(*([modelo.dia >= inicio] if inicio else [])))
+
+    quantidade = func.sum(ItemPedido.quantidade)
+    receita = func.sum(ItemPedido.quantidade * ItemPedido.preco_unitario)
+    pedidos = func.count(distinct(Pedido.id))
+    session.exec(insert(VendaDiariaProduto).from_select(
+        ["dia", "produto_id", "cancelado", "quantidade", "receita", "pedidos"],
+        select(dia, ItemPedido.produto_id, cancelado, quantidade, receita, pedidos)
+        .join(Pedido, Pedido.id == ItemPedido.pedido_id)
+        .where(*filtros)
+        .group_by(dia, ItemPedido.produto_id, cancelado)
+    ))
+    estado = func.coalesce(Cliente.estado, SEM_ESTADO)
+    session.exec(insert(VendaDiariaEstado).from_select(
+        ["dia", "estado", "cancelado", "quantidade", "receita", "pedidos"],
+        select(dia, estado, cancelado, quantidade, receita, pedidos)
+        .join(Pedido, Pedido.id == ItemPedido.pedido_id)
+        .outerjoin(Cliente, Cliente.id == Pedido.cliente_id)
+        .where(*filtros)
+        .group_by(dia, estado, cancelado)
+    ))
+
+
+def reconstruir_rollups(session: Session):
+    ultimo_id = session.exec(select(func.max(Pedido.id))).one() or 0
+    recalcular(session)
+    session.merge(MarcaRollup(nome=MARCA, ultimo_pedido_id=ultimo_id))
+    session.commit()
+
+
+def atualizar_rollups(session: Session) -> int:
+    # Incorpora os pedidos com id acima da marca; retorna quantos foram encontrados.
+    # O recálculo é por dia inteiro, então pedidos que as rotas já aplicaram
+    # não são contados duas vezes.
+    marca = session.get(MarcaRollup, MARCA)
+    if marca is None:
+        reconstruir_rollups(session)
+        return 0
+
+    primeiro_dia, ultimo_id, novos = session.exec(
+        select(func.min(Pedido.data_pedido), func.max(Pedido.id), func.count())
+        .where(Pedido.id > marca.ultimo_pedido_id)
+    ).one()
+    if not novos:
+        return 0
+
+    recalcular(session, date.fromisoformat(str(primeiro_dia)[:10]))
+    marca.ultimo_pedido_id = ultimo_id
+    session.commit()
+    return novos
+
+
+def inicializar_rollups(engine_banco):
+    # Banco sem marca (rollups recém-criados): popula a partir dos pedidos existentes
+    with Session(engine_banco) as session:
+        if session.get(MarcaRollup, MARCA) is None:
+            reconstruir_rollups(session)
+
+
+if __name__ == "__main__":
+    from Context.database import engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    acao = parser.add_mutually_exclusive_group(required=True)
+    acao.add_argument("--atualizar", action="store_true", help="Incorpora os pedidos acima da marca")
+    acao.add_argument("--reconstruir", action="store_true", help="Recalcula todos os rollups")
+    args = parser.parse_args()
+
+    with Session(engine) as session:
+        if args.atualizar:
+            print(f"{atualizar_rollups(session)} pedidos novos incorporados aos rollups.")
+        else:
+            reconstruir_rollups(session)
+            print("Rollups reconstruídos.")
@@ -0,0 +1,52 @@
+import inspect
+from fastapi import APIRouter, Depends
+from fastapi.routing import APIRoute
+from Context.database import get_async_session
+
+
+def criar_handler_async(handler):
+    # Gera a versão async de um handler síncrono que recebe `session`.
+    # O corpo original roda via AsyncSession.run_sync: as consultas usam o driver
+    # assíncrono (aiosqlite/asyncpg) e a requisição não ocupa o threadpool do FastAPI.
+    assinatura = inspect.signature(handler)
+    parametros = [
+        parametro.replace(default=Depends(get_async_session)) if nome == "session" else parametro
+        for nome, parametro in assinatura.parameters.items()
+    ]
+
+    async def handler_async(**kwargs):
+        session = kwargs.pop("session")
+        return await session.run_sync(lambda sync_session: handler(**kwargs, session=sync_session))
+
+    handler_async.__name__ = handler.__name__
+    handler_async.__doc__ = handler.__doc__
+    handler_async.__signature__ = assinatura.replace(parameters=parametros)
+    return handler_async
+
+
+def criar_router_async(router: APIRouter) -> APIRouter:
+    # Copia as rotas do router trocando os handlers síncronos com `session` pela versão
+    # async. Rotas que já são async (ex.: /pedidos/bulk) são mantidas como estão.
+    router_async = APIRouter(prefix=router.prefix, tags=router.tags)
+
+    for rota in router.routes:
+        if not isinstance(rota, APIRoute):
+            router_async.routes.append(rota)
+            continue
+
+        endpoint = rota.endpoint
+        if not inspect.iscoroutinefunction(endpoint) and "session" in inspect.signature(endpoint).parameters:
+            endpoint = criar_handler_async(endpoint)
+
+        router_async.add_api_route(
+            rota.path[len(router.prefix):],
+            endpoint,
+            methods=list(rota.methods),
+            response_model=rota.response_model,
+            status_code=rota.status_code,
+            description=rota.description,
+            summary=rota.summary,
+            name=rota.name,
+        )
+
+    return router_async
@@ -0,0 +1,77 @@
+"""
+Retentativa de transações que falham por concorrência.
+
+A reserva de estoque é um UPDATE condicional (Utils.pedidos.baixar_estoque), que
+não perde atualizações nem vende acima do estoque. Sob muitos pedidos
+simultâneos a transação ainda pode falhar de forma transitória:
+
+    SQLite      "database is locked" quando o busy_timeout se esgota
+    PostgreSQL  falha de serialização (40001), deadlock (40P01) ou
+                lock indisponível (55P03)
+
+com_retentativas() desfaz a transação e executa a operação de novo, com espera
+exponencial e jitter entre as tentativas. Os demais erros, inclusive
+HTTPException, são repassados na primeira ocorrência.
+
+Com DB_ASYNC=true os handlers síncronos rodam em AsyncSession.run_sync, na
+thread do event loop (Utils.rotas_async). Ali a espera entre tentativas é um
+asyncio.sleep, aguardado pelo greenlet do SQLAlchemy: o loop segue atendendo
+as outras requisições em vez de parar num time.sleep.
+"""
+import asyncio
+import os
+import random
+import time
+from typing import Callable, TypeVar
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+# Tentativas por transação (a primeira incluída)
+TRANSACAO_TENTATIVAS = int(os.getenv("TRANSACAO_TENTATIVAS", 5))
+
+# Espera máxima, em segundos, antes da segunda tentativa; dobra a cada falha
+TRANSACAO_ESPERA_BASE = float(os.getenv("TRANSACAO_ESPERA_BASE", 0.01))
+
+# SQLSTATEs do PostgreSQL que indicam conflito entre transações
+CODIGOS_TRANSITORIOS = {"40001", "40P01", "55P03"}
+
+R = TypeVar("R")
+
+
+def erro_transitorio(erro: Exception) -> bool:
+    if not isinstance(erro, DBAPIError):
+        return False
+    original = erro.orig
+    # psycopg2 expõe pgcode; asyncpg (via adaptador do SQLAlchemy) expõe sqlstate
+    codigo = getattr(original, "pgcode", None) or getattr(original, "sqlstate", None)
+    if codigo in CODIGOS_TRANSITORIOS:
+        return True
+    mensagem = str(original).lower()
+    return "database is locked" in mensagem or "database is busy" in mensagem
+
+
+def esperar(segundos: float):
+    # Dentro de run_sync (greenlet do SQLAlchemy) cede o event loop durante a espera
+    if in_greenlet():
+        await_only(asyncio.sleep(segundos))
+    else:
+        time.sleep(segundos)
+
+
+def com_retentativas(
+    session,
+    operacao: Callable[[], R],
+    tentativas: int = TRANSACAO_TENTATIVAS,
+    espera_base: float = TRANSACAO_ESPERA_BASE,
+) -> R:
+    # A operação deve ser a transação inteira (leituras, escritas e commit),
+    # para que cada tentativa releia o estado atual do banco
+    for tentativa in range(1, tentativas + 1):
+        try:
+            return operacao()
+        except DBAPIError as e:
+            session.rollback()
+            if tentativa == tentativas or not erro_transitorio(e):
+                raise
+            # Full jitter: espalha as novas tentativas dos pedidos que colidiram
+            esperar(random.uniform(0, espera_base * 2 ** (tentativa - 1)))
@@ -0,0 +1,122 @@
+"""
+Compara a vazão das rotas no modo síncrono (threadpool) e no modo async (DB_ASYNC=true)
+com 100 e 1000 conexões concorrentes, chamando o app ASGI em processo.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_async --requisicoes 5000
+
+Cada combinação de modo e concorrência roda em um subprocesso, porque DB_ASYNC e
+DATABASE_URL são lidos na importação de Context.database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+CONCORRENCIAS = (100, 1000)
+ROTAS = ("/clientes/1", "/produtos/1", "/pedidos/1", "/clientes/?size=10", "/produtos/1/disponibilidade?quantidade=1")
+
+
+def preparar_banco():
+    from sqlmodel import Session
+    from Context.database import create_db_and_tables, engine
+    from Models.models import Cliente, Produto
+    from Utils.pedidos import obter_status_id, registrar_pedido
+
+    create_db_and_tables()
+    with Session(engine) as session:
+        session.add_all(
+            Cliente(
+                nome=f"Cliente {i}", data_nascimento="2000-01-01", email=f"cliente{i}@email.com",
+                telefone="(00) 00000-0000", endereco="Rua B, 1", cidade="Fortaleza",
+                estado="CE", cep="60000-000"
+            ) for i in range(100)
+        )
+        session.add_all(
+            Produto(nome=f"Produto {i}", categoria="Benchmark", preco=10.0, estoque=10**9)
+            for i in range(100)
+        )
+        session.commit()
+        status_id = obter_status_id(session, "Pendente")
+        registrar_pedido(
+            session, cliente_id=1, status_id=status_id,
+            itens=[{"produto_id": i + 1, "quantidade": 1, "preco_unitario": 10.0} for i in range(10)]
+        )
+        session.commit()
+
+
+async def carga(concorrencia: int, requisicoes: int) -> dict:
+    import httpx
+    from main import app
+
+    latencias = []
+    erros = 0
+    fila = iter(range(requisicoes))
+
+    async def cliente(http):
+        nonlocal erros
+        for numero in fila:
+            inicio = time.perf_counter()
+            resposta = await http.get(ROTAS[numero % len(ROTAS)])
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            erros += resposta.status_code != 200
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url="http://bench") as http:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(http) for _ in range(concorrencia)))
+        duracao = time.perf_counter() - inicio
+
+    percentis = statistics.quantiles(latencias, n=100, method="inclusive")
+    return {
+        "req_s": requisicoes / duracao,
+        "p50_ms": percentis[49],
+        "p99_ms": percentis[98],
+        "erros": erros,
+    }
+
+
+def executar_modo(modo: str, concorrencia: int, requisicoes: int) -> dict:
+    with tempfile.TemporaryDirectory() as diretorio:
+        ambiente = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(diretorio, 'bench.db')}",
+            DB_ASYNC="true" if modo == "async" else "false",
+            DB_POOL_SIZE="20",
+            DB_MAX_OVERFLOW="40",
+            DB_POOL_TIMEOUT="5",
+        )
+        saida = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_async", "--filho",
+             "--concorrencia", str(concorrencia), "--requisicoes", str(requisicoes)],
+            env=ambiente, capture_output=True, text=True, check=True
+        )
+        return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--requisicoes", type=int, default=5000)
+    parser.add_argument("--concorrencia", type=int)
+    parser.add_argument("--filho", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.filho:
+        preparar_banco()
+        print(json.dumps(asyncio.run(carga(args.concorrencia, args.requisicoes))))
+        return
+
+    print(f"{'modo':<6} {'conexões':>8} {'req/s':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'erros':>6}")
+    for concorrencia in CONCORRENCIAS:
+        for modo in ("sync", "async"):
+            r = executar_modo(modo, concorrencia, args.requisicoes)
+            print(f"{modo:<6} {concorrencia:>8} {r['req_s']:>10.1f} {r['p50_ms']:>10.2f} {r['p99_ms']:>10.2f} {r['erros']:>6}")
+
+
+if __name__ == "__main__":
+    main()
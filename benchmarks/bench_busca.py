@@ -0,0 +1,80 @@
+"""
+Compara a latência da busca de clientes por LIKE '%termo%' (implementação anterior
+de /clientes/busca) com a busca FTS5 de Utils.busca.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_busca --linhas 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from Models.models import Cliente
+from Utils.busca import buscar, criar_indices_busca
+
+NOMES = ("João", "Maria", "José", "Ana", "Antônio", "Francisca", "Carlos", "Luíza", "Paulo", "Conceição")
+SOBRENOMES = ("Silva", "Santos", "Oliveira", "Souza", "Araújo", "Gonçalves", "Lima", "Pereira", "Ferreira", "Simões")
+TERMOS = ("joao", "conceicao", "ara", "luiza ferreira", "Maria Santos", "Silva 4242", "cliente98765")
+
+
+def preparar_banco(caminho: str, linhas: int):
+    engine = create_engine(f"sqlite:///{caminho}")
+    SQLModel.metadata.create_all(engine)
+    criar_indices_busca(engine)
+
+    aleatorio = random.Random(42)
+    with engine.begin() as conexao:
+        conexao.exec_driver_sql("PRAGMA synchronous=OFF")
+        for inicio in range(0, linhas, 50_000):
+            conexao.exec_driver_sql(
+                "INSERT INTO cliente (nome, data_nascimento, email, telefone, endereco, cidade, estado, cep) "
+                "VALUES (?, '2000-01-01', ?, '(00) 00000-0000', 'Rua B, 1', 'Fortaleza', 'CE', '60000-000')",
+                [
+                    (f"{aleatorio.choice(NOMES)} {aleatorio.choice(SOBRENOMES)} {i}", f"cliente{i}@email.com")
+                    for i in range(inicio, min(inicio + 50_000, linhas))
+                ]
+            )
+    return engine
+
+
+def medir(funcao, repeticoes: int) -> list[float]:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--repeticoes", type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        inicio = time.perf_counter()
+        engine = preparar_banco(os.path.join(diretorio, "bench.db"), args.linhas)
+        print(f"{args.linhas} clientes gerados e indexados em {time.perf_counter() - inicio:.1f}s\n")
+
+        print(f"{'termo':<16} {'LIKE p50 (ms)':>14} {'FTS5 p50 (ms)':>14}")
+        with Session(engine) as session:
+            for termo in TERMOS:
+                like = medir(
+                    lambda: session.exec(
+                        select(Cliente).where(Cliente.nome.like(f"%{termo}%")).limit(50)
+                    ).all(),
+                    args.repeticoes
+                )
+                fts = medir(lambda: buscar(session, "cliente", termo, 50), args.repeticoes)
+                print(f"{termo:<16} {statistics.median(like):>14.2f} {statistics.median(fts):>14.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Compara a latência de leitura de um produto por id direto no banco (uma sessão
+por leitura, como em GET /produtos/{id}) e pelo cache de leitura
+(Utils.cache.obter_produto), com o backend configurado em CACHE_URL.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_cache --produtos 10000 --leituras 50000
+    CACHE_URL=fakeredis:// python -m benchmarks.bench_cache
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel
+
+from Context.database import criar_engine
+from Models.models import Produto
+from Utils.cache import metricas_cache, obter_produto, produto_cache
+
+
+def medir(engine, funcao, ids: list) -> list:
+    latencias = []
+    for produto_id in ids:
+        inicio = time.perf_counter()
+        with Session(engine) as session:
+            funcao(session, produto_id)
+        latencias.append((time.perf_counter() - inicio) * 1e6)
+    return latencias
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--produtos", type=int, default=10_000)
+    parser.add_argument("--leituras", type=int, default=50_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = criar_engine(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+        SQLModel.metadata.create_all(engine)
+        with Session(engine) as session:
+            session.add_all(
+                Produto(nome=f"Produto {i}", categoria="Benchmark", preco=10.0, estoque=5)
+                for i in range(args.produtos)
+            )
+            session.commit()
+
+        # Acessos concentrados em 20% do catálogo, como em um catálogo real
+        aleatorio = random.Random(42)
+        populares = args.produtos // 5 or 1
+        ids = [
+            aleatorio.randint(1, populares) if aleatorio.random() < 0.8 else aleatorio.randint(1, args.produtos)
+            for _ in range(args.leituras)
+        ]
+
+        produto_cache.limpar()
+        print(f"{'caminho':<8} {'p50 (µs)':>10} {'p99 (µs)':>10}")
+        for nome, funcao in (("banco", lambda session, produto_id: session.get(Produto, produto_id)),
+                             ("cache", obter_produto)):
+            latencias = sorted(medir(engine, funcao, ids))
+            print(f"{nome:<8} {statistics.median(latencias):>10.1f} {latencias[int(len(latencias) * 0.99)]:>10.1f}")
+        print(metricas_cache()["produto"])
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compara a latência (p50/p99) da criação de pedidos em lote (Utils.pedidos.registrar_pedido)
+com o loop item a item usado anteriormente em criar_pedido.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_criar_pedido --repeticoes 200
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from sqlmodel import SQLModel, Session, create_engine, select
+
+from Context.database import criar_status_padrao
+from Models.models import Cliente, ItemPedido, Pedido, Produto, StatusPedido, StatusPedidoEnum
+from Utils.pedidos import obter_status_id, registrar_pedido
+
+TAMANHOS = (1, 10, 100)
+
+
+def pedido_loop_por_item(session: Session, cliente_id: int, itens: list[dict]) -> Pedido:
+    # Implementação anterior de criar_pedido: um session.get por item e busca do status
+    status_inicial = session.exec(
+        select(StatusPedido).where(StatusPedido.nome == StatusPedidoEnum.PENDENTE)
+    ).first()
+    novo_pedido = Pedido(cliente_id=cliente_id, status_id=status_inicial.id, valor_total=0)
+    session.add(novo_pedido)
+    session.flush()
+
+    valor_total = 0
+    for item in itens:
+        produto = session.get(Produto, item["produto_id"])
+        if produto.estoque < item["quantidade"]:
+            raise ValueError("Estoque insuficiente")
+        session.add(ItemPedido(pedido_id=novo_pedido.id, **item))
+        valor_total += item["quantidade"] * item["preco_unitario"]
+        produto.estoque -= item["quantidade"]
+        session.add(produto)
+
+    novo_pedido.valor_total = valor_total
+    return novo_pedido
+
+
+def pedido_em_lote(session: Session, cliente_id: int, itens: list[dict]) -> Pedido:
+    status_id = obter_status_id(session, StatusPedidoEnum.PENDENTE)
+    return registrar_pedido(session, cliente_id=cliente_id, itens=itens, status_id=status_id)
+
+
+def preparar_banco(caminho: str, produtos: int):
+    engine = create_engine(f"sqlite:///{caminho}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        criar_status_padrao(session)
+        cliente = Cliente(
+            nome="Benchmark", data_nascimento="2000-01-01", email="bench@email.com",
+            telefone="(00) 00000-0000", endereco="Rua B, 1", cidade="Fortaleza",
+            estado="CE", cep="60000-000"
+        )
+        session.add(cliente)
+        session.add_all(
+            Produto(nome=f"Produto {i}", categoria="Benchmark", preco=10.0, estoque=10**9)
+            for i in range(produtos)
+        )
+        session.commit()
+        return engine, cliente.id
+
+
+def medir(engine, cliente_id: int, funcao, linhas: int, repeticoes: int) -> list[float]:
+    itens = [
+        {"produto_id": i + 1, "quantidade": 1, "preco_unitario": 10.0}
+        for i in range(linhas)
+    ]
+    tempos = []
+    for _ in range(repeticoes):
+        with Session(engine) as session:
+            inicio = time.perf_counter()
+            funcao(session, cliente_id, itens)
+            session.commit()
+            tempos.append((time.perf_counter() - inicio) * 1000)
+    return tempos
+
+
+def percentil(valores: list[float], p: float) -> float:
+    return statistics.quantiles(valores, n=100, method="inclusive")[int(p) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--repeticoes", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine, cliente_id = preparar_banco(os.path.join(diretorio, "bench.db"), max(TAMANHOS))
+
+        print(f"{'linhas':>6} {'implementação':<14} {'p50 (ms)':>10} {'p99 (ms)':>10}")
+        for linhas in TAMANHOS:
+            for nome, funcao in (("loop por item", pedido_loop_por_item), ("em lote", pedido_em_lote)):
+                tempos = medir(engine, cliente_id, funcao, linhas, args.repeticoes)
+                print(f"{linhas:>6} {nome:<14} {percentil(tempos, 50):>10.3f} {percentil(tempos, 99):>10.3f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
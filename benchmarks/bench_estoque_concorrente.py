@@ -0,0 +1,139 @@
+"""
+Teste de carga de reserva de estoque: centenas de compradores simultâneos
+disputam o mesmo produto via POST /pedidos/ e, no final, o script confere que
+não houve venda acima do estoque nem atualização perdida:
+
+    pedidos criados == unidades vendidas / quantidade por pedido
+    estoque final  == estoque inicial - unidades vendidas  (e nunca negativo)
+
+Sobe o app com uvicorn em um subprocesso (--workers processos) sobre um banco
+SQLite temporário, ou sobre DATABASE_URL se --banco for informado.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_estoque_concorrente --compradores 500 --estoque 200
+    python -m benchmarks.bench_estoque_concorrente --workers 4 --banco postgresql://...
+    python -m benchmarks.bench_estoque_concorrente --agrupado
+"""
+import argparse
+import asyncio
+import collections
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel, create_engine, func, select
+
+from Models.models import Cliente, ItemPedido, Pedido, Produto
+
+
+def preparar_banco(url: str, estoque: int) -> int:
+    engine = create_engine(url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Cliente(
+            nome="Comprador", data_nascimento="2000-01-01", email="c@email.com", telefone="(00) 00000-0000",
+            endereco="Rua B, 1", cidade="Fortaleza", estado="CE", cep="60000-000"
+        ))
+        produto = Produto(nome="Produto disputado", categoria="Benchmark", preco=10.0, estoque=estoque)
+        session.add(produto)
+        session.commit()
+        produto_id = produto.id
+    engine.dispose()
+    return produto_id
+
+
+def conferir(url: str, produto_id: int) -> dict:
+    engine = create_engine(url)
+    with Session(engine) as session:
+        estoque = session.get(Produto, produto_id).estoque
+        vendidas = session.exec(
+            select(func.coalesce(func.sum(ItemPedido.quantidade), 0)).where(ItemPedido.produto_id == produto_id)
+        ).one()
+        pedidos = session.exec(select(func.count()).select_from(Pedido)).one()
+    engine.dispose()
+    return {"estoque": estoque, "vendidas": vendidas, "pedidos": pedidos}
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def comprar(url: str, compradores: int, produto_id: int, quantidade: int) -> tuple[collections.Counter, float]:
+    import httpx
+
+    pedido = {"cliente_id": 1, "itens": [{"produto_id": produto_id, "quantidade": quantidade, "preco_unitario": 10.0}]}
+    limites = httpx.Limits(max_connections=compradores)
+    async with httpx.AsyncClient(base_url=url, timeout=120, limits=limites) as http:
+        inicio = time.perf_counter()
+        respostas = await asyncio.gather(*(http.post("/pedidos/", json=pedido) for _ in range(compradores)))
+        duracao = time.perf_counter() - inicio
+
+    resultado = collections.Counter()
+    for resposta in respostas:
+        detalhe = resposta.json().get("detail", "") if resposta.status_code != 200 else ""
+        resultado[(resposta.status_code, "estoque insuficiente" if "Estoque insuficiente" in detalhe else detalhe[:80])] += 1
+    return resultado, duracao
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--compradores", type=int, default=500)
+    parser.add_argument("--estoque", type=int, default=200)
+    parser.add_argument("--quantidade", type=int, default=1, help="Unidades por pedido")
+    parser.add_argument("--workers", type=int, default=1, help="Processos do uvicorn")
+    parser.add_argument("--banco", help="URL do banco (padrão: SQLite temporário)")
+    parser.add_argument("--agrupado", action="store_true", help="Liga o commit agrupado (PEDIDOS_AGRUPADOS=true)")
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp()
+    url_banco = args.banco or f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+    produto_id = preparar_banco(url_banco, args.estoque)
+
+    porta = porta_livre()
+    servidor = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(porta), "--log-level", "warning",
+         "--workers", str(args.workers)],
+        env=dict(os.environ, DATABASE_URL=url_banco, PEDIDOS_AGRUPADOS=str(args.agrupado).lower())
+    )
+    try:
+        while True:
+            if servidor.poll() is not None:
+                sys.exit("O servidor não iniciou.")
+            try:
+                socket.create_connection(("127.0.0.1", porta)).close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        resultado, duracao = asyncio.run(comprar(f"http://127.0.0.1:{porta}", args.compradores, produto_id, args.quantidade))
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    final = conferir(url_banco, produto_id)
+    criados = resultado[(200, "")]
+    print(f"{args.compradores} compradores, estoque inicial {args.estoque}, {args.quantidade} unidade(s) por pedido")
+    for (status, detalhe), quantidade in sorted(resultado.items()):
+        print(f"  HTTP {status:<4} {detalhe or 'criado':<40} {quantidade:>6}")
+    print(f"Tempo: {duracao:.2f}s  ({args.compradores / duracao:,.0f} requisições/s, {criados / duracao:,.0f} pedidos/s)")
+    print(f"Banco: {final['pedidos']} pedidos, {final['vendidas']} unidades vendidas, estoque final {final['estoque']}")
+
+    erros = []
+    if final["estoque"] < 0:
+        erros.append("estoque negativo")
+    if final["estoque"] != args.estoque - final["vendidas"]:
+        erros.append("atualização de estoque perdida")
+    if final["pedidos"] != criados or final["vendidas"] != criados * args.quantidade:
+        erros.append("pedidos criados não batem com as respostas")
+    if criados < min(args.compradores, args.estoque // args.quantidade):
+        erros.append("pedidos recusados com estoque disponível")
+    print("OK: sem venda acima do estoque." if not erros else "FALHOU: " + ", ".join(erros))
+    sys.exit(1 if erros else 0)
+
+
+if __name__ == "__main__":
+    main()
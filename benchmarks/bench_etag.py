@@ -0,0 +1,56 @@
+"""
+Compara a latência de um GET completo com a de uma revalidação que recebe
+304 Not Modified (If-None-Match com o ETag atual) em GET /pedidos/{id},
+GET /clientes/{id} e GET /produtos/, chamando o app em processo (TestClient).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_etag --itens 50 --repeticoes 2000
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+
+def medir(cliente, url: str, repeticoes: int, headers=None) -> float:
+    latencias = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        cliente.get(url, headers=headers)
+        latencias.append((time.perf_counter() - inicio) * 1e6)
+    return statistics.median(latencias)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--itens", type=int, default=50, help="Itens no pedido e produtos na página")
+    parser.add_argument("--repeticoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    diretorio = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(diretorio, 'bench.db')}"
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as cliente:
+        cliente.post("/clientes/", json={
+            "nome": "Cliente", "data_nascimento": "2000-01-01", "email": "c@email.com", "telefone": "(00) 00000-0000",
+            "endereco": "Rua B, 1", "cidade": "Fortaleza", "estado": "CE", "cep": "60000-000"
+        })
+        for i in range(args.itens):
+            cliente.post("/produtos/", json={"nome": f"Produto {i}", "categoria": "Benchmark", "preco": 10.0, "estoque": 10**9})
+        cliente.post("/pedidos/", json={"cliente_id": 1, "itens": [
+            {"produto_id": i + 1, "quantidade": 1, "preco_unitario": 10.0} for i in range(args.itens)
+        ]})
+
+        print(f"{'rota':<28} {'200 p50 (µs)':>13} {'304 p50 (µs)':>13}")
+        for url in ("/pedidos/1", "/clientes/1", f"/produtos/?size={min(args.itens, 100)}"):
+            etag = cliente.get(url).headers["etag"]
+            completo = medir(cliente, url, args.repeticoes)
+            revalidado = medir(cliente, url, args.repeticoes, {"If-None-Match": etag})
+            print(f"{url:<28} {completo:>13.0f} {revalidado:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
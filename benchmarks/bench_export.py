@@ -0,0 +1,127 @@
+"""
+Mede o pico de memória do servidor e a latência de outras requisições durante
+GET /export/clientes, para tabelas de tamanhos diferentes.
+
+Sobe o app com uvicorn em um subprocesso, baixa a exportação em streaming e,
+em paralelo, chama GET /clientes/1 a cada 50 ms. A memória do servidor é a
+RssAnon de /proc (a VmRSS inclui as páginas do banco mapeadas com mmap_size),
+amostrada a cada chamada, então o script só roda no Linux.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_export --linhas 1000000 10000000 --formato csv.gz
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from sqlmodel import SQLModel, create_engine
+
+import Models.models  # noqa: F401  (registra as tabelas no metadata)
+
+
+def preparar_banco(caminho: str, linhas: int):
+    engine = create_engine(f"sqlite:///{caminho}")
+    SQLModel.metadata.create_all(engine)
+    with engine.begin() as conexao:
+        conexao.exec_driver_sql("PRAGMA synchronous=OFF")
+        for inicio in range(0, linhas, 100_000):
+            conexao.exec_driver_sql(
+                "INSERT INTO cliente (nome, data_nascimento, email, telefone, endereco, cidade, estado, cep) "
+                "VALUES (?, '2000-01-01', ?, '(00) 00000-0000', 'Rua B, 1', 'Fortaleza', 'CE', '60000-000')",
+                [(f"Cliente {i}", f"cliente{i}@email.com") for i in range(inicio, min(inicio + 100_000, linhas))]
+            )
+    engine.dispose()
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def memoria_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as status:
+        for linha in status:
+            if linha.startswith("RssAnon:"):
+                return int(linha.split()[1]) / 1024
+    return 0.0
+
+
+async def medir(url: str, formato: str, pid: int) -> dict:
+    import httpx
+
+    latencias = []
+    antes = memoria_mb(pid)
+    pico = antes
+    async with httpx.AsyncClient(base_url=url, timeout=None) as http:
+        async def sondar():
+            nonlocal pico
+            while True:
+                inicio = time.perf_counter()
+                await http.get("/clientes/1")
+                latencias.append((time.perf_counter() - inicio) * 1000)
+                pico = max(pico, memoria_mb(pid))
+                await asyncio.sleep(0.05)
+
+        sonda = asyncio.create_task(sondar())
+        inicio = time.perf_counter()
+        total = 0
+        async with http.stream("GET", f"/export/clientes?formato={formato}") as resposta:
+            async for parte in resposta.aiter_raw():
+                total += len(parte)
+        duracao = time.perf_counter() - inicio
+        sonda.cancel()
+
+    return {
+        "segundos": duracao,
+        "mb": total / 2**20,
+        "memoria_antes": antes,
+        "memoria_pico": pico,
+        "p50_ms": statistics.median(latencias),
+        "max_ms": max(latencias),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--formato", choices=("csv", "csv.gz", "parquet"), default="csv")
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'tempo (s)':>10} {'corpo (MB)':>11} {'memória antes/pico (MB)':>24} {'outras p50/máx (ms)':>20}")
+    for linhas in args.linhas:
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, "bench.db")
+            preparar_banco(caminho, linhas)
+            porta = porta_livre()
+            servidor = subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(porta), "--log-level", "warning"],
+                env=dict(os.environ, DATABASE_URL=f"sqlite:///{caminho}")
+            )
+            try:
+                url = f"http://127.0.0.1:{porta}"
+                while True:
+                    if servidor.poll() is not None:
+                        sys.exit("O servidor não iniciou.")
+                    try:
+                        socket.create_connection(("127.0.0.1", porta)).close()
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+                r = asyncio.run(medir(url, args.formato, servidor.pid))
+            finally:
+                servidor.terminate()
+                servidor.wait()
+            print(f"{linhas:>10} {r['segundos']:>10.1f} {r['mb']:>11.1f} "
+                  f"{r['memoria_antes']:>13.1f} / {r['memoria_pico']:<8.1f} "
+                  f"{r['p50_ms']:>9.1f} / {r['max_ms']:<8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Mede a vazão (linhas/s) da importação de CSV (Utils.importacao) em um banco
+SQLite com o mesmo schema do app (índices e triggers da busca incluídos): primeiro
+inserindo linhas novas, depois reimportando o mesmo arquivo (upsert pelo id).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_importacao --linhas 1000000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from sqlmodel import Session, SQLModel
+
+from Context.database import criar_engine, criar_indices
+from Utils.busca import criar_indices_busca
+from Utils.importacao import importar_csv
+
+CATEGORIAS = ("Eletrônicos", "Informática", "Papelaria", "Cozinha", "Ferramentas")
+
+
+def gerar_csv(caminho: str, entidade: str, linhas: int, codificacao: str):
+    aleatorio = random.Random(42)
+    with open(caminho, "w", newline="", encoding=codificacao) as arquivo:
+        escritor = csv.writer(arquivo)
+        if entidade == "clientes":
+            escritor.writerow(["id", "nome", "data_nascimento", "email", "telefone", "endereco", "cidade", "estado", "cep"])
+            escritor.writerows(
+                (i, f"Cliente {i}", "2000-01-01", f"cliente{i}@email.com", "(85) 99999-0000",
+                 f"Rua {i % 500}, {i % 1000}", "Fortaleza", "CE", "60000-000")
+                for i in range(1, linhas + 1)
+            )
+        else:
+            escritor.writerow(["id", "nome", "categoria", "preco", "estoque"])
+            escritor.writerows(
+                (i, f"Produto {i}", aleatorio.choice(CATEGORIAS), round(aleatorio.uniform(1, 500), 2), aleatorio.randint(0, 100))
+                for i in range(1, linhas + 1)
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--linhas", type=int, default=1_000_000)
+    parser.add_argument("--lote", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'entidade':<10} {'etapa':<12} {'linhas/s':>12}")
+    for entidade, codificacao in (("clientes", "utf-8"), ("produtos", "latin-1")):
+        with tempfile.TemporaryDirectory() as diretorio:
+            engine = criar_engine(f"sqlite:///{os.path.join(diretorio, 'bench.db')}")
+            SQLModel.metadata.create_all(engine)
+            criar_indices(engine)
+            criar_indices_busca(engine)
+
+            caminho = os.path.join(diretorio, f"{entidade}.csv")
+            gerar_csv(caminho, entidade, args.linhas, codificacao)
+
+            for etapa in ("inserção", "upsert"):
+                with Session(engine) as session, open(caminho, "rb") as arquivo:
+                    inicio = time.perf_counter()
+                    relatorio = importar_csv(session, entidade, arquivo, args.lote)
+                    duracao = time.perf_counter() - inicio
+                print(f"{entidade:<10} {etapa:<12} {relatorio['linhas'] / duracao:>12,.0f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
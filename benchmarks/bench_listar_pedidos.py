@@ -0,0 +1,123 @@
+"""
+Compara o tempo de CPU por página de GET /pedidos/ entre a montagem anterior
+(selectinload + PedidoResponse campo a campo + validação do response_model) e a
+consulta com JOIN serializada com orjson (Utils.respostas).
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_listar_pedidos --pedidos 100 --itens 20
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from pydantic import TypeAdapter
+from sqlalchemy.orm import selectinload
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from Context.database import criar_status_padrao
+from Models.models import Cliente, ItemPedido, PaginatedResponse, Pedido, Produto
+from Utils.pedidos import obter_status_id, registrar_pedido
+from Utils.respostas import consultar_pedidos, pagina_json
+from routers.pedido_routes import ItemPedidoResponse, PedidoResponse, ProdutoResponse
+
+ADAPTADOR = TypeAdapter(PaginatedResponse[PedidoResponse])
+
+
+def preparar_banco(caminho: str, pedidos: int, itens: int):
+    engine = create_engine(f"sqlite:///{caminho}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        criar_status_padrao(session)
+        session.add(Cliente(
+            nome="Cliente", data_nascimento="2000-01-01", email="c@email.com", telefone="(00) 00000-0000",
+            endereco="Rua B, 1", cidade="Fortaleza", estado="CE", cep="60000-000"
+        ))
+        session.add_all(
+            Produto(nome=f"Produto {i}", categoria="Benchmark", preco=10.0, estoque=10**9) for i in range(itens)
+        )
+        session.commit()
+        status_id = obter_status_id(session, "Pendente")
+        for _ in range(pedidos):
+            registrar_pedido(
+                session, cliente_id=1, status_id=status_id,
+                itens=[{"produto_id": i + 1, "quantidade": 1, "preco_unitario": 10.0} for i in range(itens)]
+            )
+        session.commit()
+    return engine
+
+
+def pagina_anterior(session: Session, size: int) -> bytes:
+    # Implementação anterior de listar_pedidos, até o JSON que o FastAPI enviaria
+    pedidos = session.exec(
+        select(Pedido)
+        .options(
+            selectinload(Pedido.cliente),
+            selectinload(Pedido.status),
+            selectinload(Pedido.itens).selectinload(ItemPedido.produto)
+        )
+        .limit(size)
+    ).all()
+    items = [
+        PedidoResponse(
+            id=pedido.id,
+            data_pedido=pedido.data_pedido,
+            valor_total=pedido.valor_total,
+            status=pedido.status.nome.value,
+            cliente_nome=pedido.cliente.nome,
+            itens=[
+                ItemPedidoResponse(
+                    id=item.id,
+                    quantidade=item.quantidade,
+                    preco_unitario=item.preco_unitario,
+                    subtotal=item.quantidade * item.preco_unitario,
+                    produto=ProdutoResponse(
+                        id=item.produto.id, nome=item.produto.nome,
+                        categoria=item.produto.categoria, preco=item.produto.preco
+                    )
+                ) for item in pedido.itens
+            ]
+        ) for pedido in pedidos
+    ]
+    resposta = PaginatedResponse(items=items, total=len(items), page=1, size=size, pages=1)
+    # response_model: valida de novo e serializa
+    return ADAPTADOR.dump_json(ADAPTADOR.validate_python(resposta, from_attributes=True))
+
+
+def pagina_atual(session: Session, size: int) -> bytes:
+    pedidos = consultar_pedidos(session, select(Pedido.id).order_by(Pedido.id).limit(size))
+    return pagina_json(pedidos, size, total=len(pedidos), page=1, pages=1).body
+
+
+def medir(funcao, engine, size: int, repeticoes: int) -> tuple[float, float]:
+    # Tempo de CPU do processo (consulta + montagem + serialização) e tempo de parede
+    cpu, parede = [], []
+    for _ in range(repeticoes):
+        with Session(engine) as session:
+            inicio_cpu, inicio = time.process_time(), time.perf_counter()
+            funcao(session, size)
+            cpu.append((time.process_time() - inicio_cpu) * 1000)
+            parede.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(cpu), statistics.median(parede)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--pedidos", type=int, default=100)
+    parser.add_argument("--itens", type=int, default=20)
+    parser.add_argument("--repeticoes", type=int, default=30)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        engine = preparar_banco(os.path.join(diretorio, "bench.db"), args.pedidos, args.itens)
+        print(f"Página com {args.pedidos} pedidos de {args.itens} itens\n")
+        print(f"{'caminho':<10} {'CPU p50 (ms)':>13} {'total p50 (ms)':>15}")
+        for nome, funcao in (("anterior", pagina_anterior), ("orjson", pagina_atual)):
+            cpu, parede = medir(funcao, engine, args.pedidos, args.repeticoes)
+            print(f"{nome:<10} {cpu:>13.2f} {parede:>15.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Compara o relatório de receita por mês calculado direto em pedido/item_pedido
+com a mesma consulta lida dos rollups diários (Utils.rollups), para históricos
+de tamanhos diferentes.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_relatorios --pedidos 100000 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from Models.models import ItemPedido, Pedido
+from Utils.rollups import reconstruir_rollups
+from routers.relatorio_routes import receita_por_periodo
+
+DIAS = 5 * 365
+
+
+def preparar_banco(caminho: str, pedidos: int):
+    engine = create_engine(f"sqlite:///{caminho}")
+    SQLModel.metadata.create_all(engine)
+
+    aleatorio = random.Random(42)
+    inicio = datetime.now() - timedelta(days=DIAS)
+    with engine.begin() as conexao:
+        conexao.exec_driver_sql("PRAGMA synchronous=OFF")
+        conexao.exec_driver_sql(
+            "INSERT INTO cliente (id, nome, data_nascimento, email, telefone, endereco, cidade, estado, cep) "
+            "VALUES (1, 'Cliente', '2000-01-01', 'c@email.com', '(00) 00000-0000', 'Rua B, 1', 'Fortaleza', 'CE', '60000-000')"
+        )
+        for lote in range(0, pedidos, 50_000):
+            ids = range(lote + 1, min(lote + 50_000, pedidos) + 1)
+            conexao.exec_driver_sql(
+                "INSERT INTO pedido (id, cliente_id, status_id, data_pedido, valor_total) VALUES (?, 1, 1, ?, 30.0)",
+                [(i, str(inicio + timedelta(seconds=aleatorio.randrange(DIAS * 86400)))) for i in ids]
+            )
+            conexao.exec_driver_sql(
+                "INSERT INTO item_pedido (pedido_id, produto_id, quantidade, preco_unitario) VALUES (?, ?, 3, 10.0)",
+                [(i, aleatorio.randint(1, 500)) for i in ids]
+            )
+    with Session(engine) as session:
+        reconstruir_rollups(session)
+    return engine
+
+
+def medir(funcao, repeticoes: int) -> float:
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--pedidos", type=int, nargs="+", default=[100_000, 1_000_000])
+    parser.add_argument("--repeticoes", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'pedidos':>10} {'base p50 (ms)':>14} {'rollup p50 (ms)':>16}")
+    for pedidos in args.pedidos:
+        with tempfile.TemporaryDirectory() as diretorio:
+            engine = preparar_banco(os.path.join(diretorio, "bench.db"), pedidos)
+            mes = func.strftime("%Y-%m", Pedido.data_pedido)
+            with Session(engine) as session:
+                base = medir(
+                    lambda: session.exec(
+                        select(mes, func.count(func.distinct(Pedido.id)), func.sum(ItemPedido.quantidade * ItemPedido.preco_unitario))
+                        .join(ItemPedido, ItemPedido.pedido_id == Pedido.id)
+                        .group_by(mes)
+                    ).all(),
+                    args.repeticoes
+                )
+                rollup = medir(
+                    lambda: receita_por_periodo(
+                        periodo="mes", inicio=None, fim=None, incluir_cancelados=False, session=session
+                    ),
+                    args.repeticoes
+                )
+            print(f"{pedidos:>10} {base:>14.2f} {rollup:>16.2f}")
+            engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
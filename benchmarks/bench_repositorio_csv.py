@@ -0,0 +1,76 @@
+"""
+Compara o custo por operação do repositório CSV com log e índice
+(Utils.repositorio_csv) com a reescrita do arquivo inteiro a cada alteração,
+como faziam atualizar_csv/remover_do_csv, para arquivos de tamanhos diferentes.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_repositorio_csv --linhas 10000 100000 1000000
+"""
+import argparse
+import csv
+import os
+import random
+import tempfile
+import time
+
+from Models.models import Produto
+from Utils.repositorio_csv import RepositorioCSV
+
+
+def gerar_csv(caminho: str, linhas: int):
+    # Formato antigo (sem _removido): o repositório converte na abertura
+    with open(caminho, "w", newline="") as arquivo:
+        escritor = csv.writer(arquivo)
+        escritor.writerow(["id", "nome", "categoria", "preco", "estoque"])
+        escritor.writerows((i, f"Produto {i}", "Benchmark", 10.0, 5) for i in range(1, linhas + 1))
+
+
+def reescrever(caminho: str, id_valor: int, valores: list):
+    # Implementação anterior de atualizar_csv: lê tudo e regrava o arquivo
+    with open(caminho, newline="") as arquivo:
+        linhas = [valores if linha and linha[0] == str(id_valor) else linha for linha in csv.reader(arquivo)]
+    with open(caminho, "w", newline="") as arquivo:
+        csv.writer(arquivo).writerows(linhas)
+
+
+def medir(funcao, repeticoes: int) -> float:
+    # Microssegundos por operação
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        funcao()
+    return (time.perf_counter() - inicio) / repeticoes * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--linhas", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--operacoes", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'inserir':>10} {'atualizar':>10} {'remover':>10} {'obter':>10} {'reescrita':>12}   (µs/op)")
+    for linhas in args.linhas:
+        with tempfile.TemporaryDirectory() as diretorio:
+            caminho = os.path.join(diretorio, "produtos.csv")
+            gerar_csv(caminho, linhas)
+            repositorio = RepositorioCSV(caminho, Produto)
+            # Conversão do formato antigo e primeiro salvamento do índice fora da medição
+            repositorio.fechar()
+            aleatorio = random.Random(42)
+            produto = Produto(nome="Produto", categoria="Benchmark", preco=12.5, estoque=3)
+
+            inserir = medir(lambda: repositorio.inserir(produto.model_copy()), args.operacoes)
+            atualizar = medir(lambda: repositorio.atualizar(aleatorio.randint(1, linhas), produto), args.operacoes)
+            remover = medir(lambda: repositorio.remover(aleatorio.randint(1, linhas)), args.operacoes)
+            obter = medir(lambda: repositorio.obter(aleatorio.randint(1, linhas)), args.operacoes)
+
+            copia = os.path.join(diretorio, "reescrita.csv")
+            gerar_csv(copia, linhas)
+            reescrita = medir(
+                lambda: reescrever(copia, aleatorio.randint(1, linhas), [0, "Produto", "Benchmark", 12.5, 3]),
+                max(1, min(args.operacoes, 2_000_000 // linhas))
+            )
+            print(f"{linhas:>10} {inserir:>10.1f} {atualizar:>10.1f} {remover:>10.1f} {obter:>10.1f} {reescrita:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,461 @@
+"""
+Suíte de carga de todas as rotas do app: cada cenário dispara requisições
+contra o app ASGI no próprio processo (httpx.ASGITransport, sem rede nem
+uvicorn), --concorrencia de cada vez, e registra vazão, latência p50/p95/p99 e
+máxima, os status devolvidos e o pico de RSS do processo ao fim do cenário.
+
+Sem --banco, gera um banco SQLite temporário com benchmarks.gerar_dados (mesma
+semente, mesmos dados em toda execução). Os parâmetros de cada requisição
+também saem de um gerador com semente fixa. Os cenários de escrita (POST, PUT,
+DELETE, importação) só rodam com --escritas, porque alteram o banco.
+
+O resultado pode ser salvo como linha de base (--salvar) e comparado nas
+execuções seguintes (--comparar): um cenário regride quando o p95 sobe ou a
+vazão cai mais que --tolerancia (diferenças de p95 abaixo de 0,5 ms são
+ignoradas, são ruído); nesse caso o script sai com código 1. Compare apenas
+execuções na mesma máquina, com o mesmo banco e os mesmos parâmetros. As rotas
+do app sem cenário são listadas no final.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_rotas --salvar benchmarks/linha_base.json
+    python -m benchmarks.bench_rotas --comparar benchmarks/linha_base.json
+    python -m benchmarks.bench_rotas --escritas --cenarios pedidos
+    python -m benchmarks.bench_rotas --banco sqlite:///grande.db --requisicoes 1000 --concorrencia 50
+"""
+import argparse
+import asyncio
+import collections
+import importlib
+import json
+import os
+import platform
+import random
+import re
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import func, make_url
+from sqlmodel import Session, select
+
+from Models.models import Cliente, Pedido, Produto, StatusPedidoEnum
+
+# Diferenças de p95 menores que isto (ms) não contam como regressão
+RUIDO_MS = 0.5
+
+
+@dataclass
+class Cenario:
+    nome: str
+    metodo: str
+    # Template da rota no OpenAPI, usado para conferir a cobertura
+    rota: str
+    # Recebe o gerador aleatório e os dados do banco; devolve os argumentos do httpx (url, params, json...)
+    requisicao: Callable[[random.Random, dict], dict]
+    escrita: bool = False
+    # Máximo de requisições do cenário (rotas pesadas: exportação, lotes)
+    limite: Optional[int] = None
+    # Corrotina (cliente, dados, quantidade) executada antes da medição, fora dela
+    preparar: Optional[Callable] = None
+
+
+def novo_cliente(aleatorio: random.Random, dados: dict) -> dict:
+    dados["sequencia"] += 1
+    return {
+        "nome": "Cliente Benchmark", "data_nascimento": "1990-01-01",
+        "email": f"bench{dados['sequencia']}.{aleatorio.randrange(10 ** 9)}@email.com",
+        "telefone": "(85) 99999-0000", "endereco": "Rua A, 1", "cidade": "Fortaleza", "estado": "CE",
+        "cep": "60000-000",
+    }
+
+
+def novo_produto(aleatorio: random.Random, dados: dict) -> dict:
+    return {
+        "nome": f"Produto Benchmark {aleatorio.randrange(10 ** 6)}", "categoria": aleatorio.choice(dados["categorias"]),
+        "preco": round(aleatorio.uniform(1, 500), 2), "estoque": 1_000_000,
+    }
+
+
+def novo_pedido(aleatorio: random.Random, dados: dict) -> dict:
+    produtos = aleatorio.sample(range(1, dados["produtos"] + 1), min(3, dados["produtos"]))
+    return {
+        "cliente_id": aleatorio.randint(1, dados["clientes"]),
+        "itens": [{"produto_id": produto_id, "quantidade": 1, "preco_unitario": 10.0} for produto_id in produtos],
+    }
+
+
+def dia_aleatorio(aleatorio: random.Random, dados: dict) -> date:
+    dias = max((dados["ultimo_dia"] - dados["primeiro_dia"]).days, 0)
+    return dados["primeiro_dia"] + timedelta(days=aleatorio.randint(0, dias))
+
+
+def intervalo(aleatorio: random.Random, dados: dict, dias: int) -> dict:
+    inicio = dia_aleatorio(aleatorio, dados)
+    return {"inicio": inicio.isoformat(), "fim": (inicio + timedelta(days=dias)).isoformat()}
+
+
+def csv_produtos(aleatorio: random.Random, dados: dict) -> bytes:
+    # Upsert pelo id: as mesmas 100 linhas depois do último produto gerado
+    linhas = ["id,nome,categoria,preco,estoque"]
+    for id_ in range(dados["produtos"] + 1, dados["produtos"] + 101):
+        linhas.append(f"{id_},Produto importado {id_},{aleatorio.choice(dados['categorias'])},"
+                      f"{aleatorio.uniform(1, 500):.2f},{aleatorio.randint(0, 1000)}")
+    return ("\n".join(linhas) + "\n").encode()
+
+
+def criar_para_remover(rota: str, corpo: Callable, chave: str):
+    # Os cenários de DELETE removem registros criados aqui, fora da medição
+    async def preparar(cliente: httpx.AsyncClient, dados: dict, quantidade: int):
+        aleatorio = random.Random(0)
+        for _ in range(quantidade):
+            resposta = await cliente.post(rota, json=corpo(aleatorio, dados))
+            if resposta.status_code != 200:
+                raise RuntimeError(f"POST {rota} falhou ({resposta.status_code}): {resposta.text[:300]}")
+            dados[chave].append(resposta.json()["id"])
+    return preparar
+
+
+async def exportar_uma_vez(cliente: httpx.AsyncClient, dados: dict, quantidade: int):
+    resposta = await cliente.get("/export/produtos")
+    resposta.raise_for_status()
+    dados["exportacao"] = resposta.headers["X-Export-Id"]
+
+
+def aleatorio_id(chave: str):
+    return lambda aleatorio, dados: aleatorio.randint(1, dados[chave])
+
+
+cliente_id, produto_id, pedido_id = aleatorio_id("clientes"), aleatorio_id("produtos"), aleatorio_id("pedidos")
+
+CENARIOS = [
+    Cenario("raiz", "GET", "/", lambda a, d: {"url": "/"}),
+    Cenario("banco_pool", "GET", "/banco/pool", lambda a, d: {"url": "/banco/pool"}),
+    Cenario("cache_metricas", "GET", "/cache/metricas", lambda a, d: {"url": "/cache/metricas"}),
+    Cenario("metrics", "GET", "/metrics", lambda a, d: {"url": "/metrics"}),
+
+    Cenario("clientes_pagina", "GET", "/clientes/",
+            lambda a, d: {"url": "/clientes/", "params": {"page": a.randint(1, 50), "size": 20}}),
+    Cenario("clientes_cursor", "GET", "/clientes/",
+            lambda a, d: {"url": "/clientes/", "params": {"after_id": cliente_id(a, d), "size": 50}}),
+    Cenario("clientes_campos", "GET", "/clientes/",
+            lambda a, d: {"url": "/clientes/", "params": {"after_id": cliente_id(a, d), "size": 50, "fields": "nome,email"}}),
+    Cenario("clientes_por_id", "GET", "/clientes/{cliente_id}",
+            lambda a, d: {"url": f"/clientes/{cliente_id(a, d)}"}),
+    Cenario("clientes_com_pedidos", "GET", "/clientes/{cliente_id}",
+            lambda a, d: {"url": f"/clientes/{cliente_id(a, d)}", "params": {"include": "pedidos"}}),
+    Cenario("clientes_quantidade", "GET", "/clientes/quantidade/", lambda a, d: {"url": "/clientes/quantidade/"}),
+    Cenario("clientes_por_estado", "GET", "/clientes/clientes_por_estado/{estado}",
+            lambda a, d: {"url": f"/clientes/clientes_por_estado/{a.choice(d['estados'])}", "params": {"fields": "nome"}}),
+    Cenario("clientes_busca", "GET", "/clientes/busca/{nome}",
+            lambda a, d: {"url": f"/clientes/busca/{a.choice(d['nomes'])}", "params": {"limite": 20}}),
+    Cenario("clientes_criar", "POST", "/clientes/",
+            lambda a, d: {"url": "/clientes/", "json": novo_cliente(a, d)}, escrita=True),
+    Cenario("clientes_atualizar", "PUT", "/clientes/{cliente_id}",
+            lambda a, d: {"url": f"/clientes/{cliente_id(a, d)}", "json": {**novo_cliente(a, d), "nome": "Atualizado"}},
+            escrita=True),
+    Cenario("clientes_remover", "DELETE", "/clientes/{cliente_id}",
+            lambda a, d: {"url": f"/clientes/{d['remover_clientes'].pop()}"}, escrita=True,
+            preparar=criar_para_remover("/clientes/", novo_cliente, "remover_clientes")),
+
+    Cenario("produtos_pagina", "GET", "/produtos/",
+            lambda a, d: {"url": "/produtos/", "params": {"page": a.randint(1, 20), "size": 20}}),
+    Cenario("produtos_cursor", "GET", "/produtos/",
+            lambda a, d: {"url": "/produtos/", "params": {"after_id": produto_id(a, d), "size": 50}}),
+    Cenario("produtos_por_id", "GET", "/produtos/{produto_id}",
+            lambda a, d: {"url": f"/produtos/{produto_id(a, d)}"}),
+    Cenario("produtos_quantidade", "GET", "/produtos/quantidade/", lambda a, d: {"url": "/produtos/quantidade/"}),
+    Cenario("produtos_categoria_qtd", "GET", "/produtos/categoria_qtd/{categoria}",
+            lambda a, d: {"url": f"/produtos/categoria_qtd/{a.choice(d['categorias'])}"}),
+    Cenario("produtos_preco_maior_que", "GET", "/produtos/preco_maior_que/{preco}",
+            lambda a, d: {"url": f"/produtos/preco_maior_que/{a.randint(500, 1000)}"}),
+    Cenario("produtos_busca", "GET", "/produtos/busca/{termo}",
+            lambda a, d: {"url": f"/produtos/busca/{a.choice(d['categorias'])}", "params": {"limite": 20}}),
+    Cenario("produtos_disponibilidade", "GET", "/produtos/{produto_id}/disponibilidade",
+            lambda a, d: {"url": f"/produtos/{produto_id(a, d)}/disponibilidade", "params": {"quantidade": 5}}),
+    Cenario("produtos_criar", "POST", "/produtos/",
+            lambda a, d: {"url": "/produtos/", "json": novo_produto(a, d)}, escrita=True),
+    Cenario("produtos_atualizar", "PUT", "/produtos/{produto_id}",
+            lambda a, d: {"url": f"/produtos/{produto_id(a, d)}", "json": {"preco": round(a.uniform(1, 500), 2)}},
+            escrita=True),
+    Cenario("produtos_remover", "DELETE", "/produtos/{produto_id}",
+            lambda a, d: {"url": f"/produtos/{d['remover_produtos'].pop()}"}, escrita=True,
+            preparar=criar_para_remover("/produtos/", novo_produto, "remover_produtos")),
+
+    Cenario("pedidos_pagina", "GET", "/pedidos/",
+            lambda a, d: {"url": "/pedidos/", "params": {"page": a.randint(1, 50), "size": 20}}),
+    Cenario("pedidos_cursor", "GET", "/pedidos/",
+            lambda a, d: {"url": "/pedidos/", "params": {"after_id": pedido_id(a, d), "size": 50}}),
+    Cenario("pedidos_campos", "GET", "/pedidos/",
+            lambda a, d: {"url": "/pedidos/", "params": {"after_id": pedido_id(a, d), "size": 50, "fields": "data_pedido,valor_total"}}),
+    Cenario("pedidos_por_id", "GET", "/pedidos/{pedido_id}", lambda a, d: {"url": f"/pedidos/{pedido_id(a, d)}"}),
+    Cenario("pedidos_por_data", "GET", "/pedidos/buscar-por-data",
+            lambda a, d: {"url": "/pedidos/buscar-por-data", "params": {"data": dia_aleatorio(a, d).strftime("%d/%m/%Y")}}),
+    Cenario("pedidos_periodo", "GET", "/pedidos/periodo",
+            lambda a, d: {"url": "/pedidos/periodo", "params": {**intervalo(a, d, 7), "size": 50}}),
+    Cenario("pedidos_do_cliente", "GET", "/pedidos/cliente/{cliente_id}",
+            lambda a, d: {"url": f"/pedidos/cliente/{cliente_id(a, d)}"}),
+    Cenario("pedidos_itens", "GET", "/pedidos/{pedido_id}/itens",
+            lambda a, d: {"url": f"/pedidos/{pedido_id(a, d)}/itens"}),
+    Cenario("pedidos_criar", "POST", "/pedidos/",
+            lambda a, d: {"url": "/pedidos/", "json": novo_pedido(a, d)}, escrita=True),
+    Cenario("pedidos_lote", "POST", "/pedidos/bulk",
+            lambda a, d: {"url": "/pedidos/bulk", "headers": {"Content-Type": "application/x-ndjson"},
+                          "content": b"\n".join(json.dumps(novo_pedido(a, d)).encode() for _ in range(100))},
+            escrita=True, limite=20),
+    Cenario("pedidos_atualizar", "PUT", "/pedidos/{pedido_id}",
+            lambda a, d: {"url": f"/pedidos/{pedido_id(a, d)}", "json": {"status": StatusPedidoEnum.PAGO.value}},
+            escrita=True),
+    Cenario("pedidos_remover", "DELETE", "/pedidos/{pedido_id}",
+            lambda a, d: {"url": f"/pedidos/{d['remover_pedidos'].pop()}"}, escrita=True,
+            preparar=criar_para_remover("/pedidos/", novo_pedido, "remover_pedidos")),
+
+    Cenario("relatorio_receita", "GET", "/relatorios/receita",
+            lambda a, d: {"url": "/relatorios/receita", "params": {**intervalo(a, d, 90), "periodo": "semana"}}),
+    Cenario("relatorio_categorias", "GET", "/relatorios/categorias",
+            lambda a, d: {"url": "/relatorios/categorias", "params": intervalo(a, d, 90)}),
+    Cenario("relatorio_estados", "GET", "/relatorios/estados",
+            lambda a, d: {"url": "/relatorios/estados", "params": intervalo(a, d, 90)}),
+    Cenario("relatorio_top_produtos", "GET", "/relatorios/produtos/top",
+            lambda a, d: {"url": "/relatorios/produtos/top", "params": intervalo(a, d, 90)}),
+    Cenario("relatorio_ticket_medio", "GET", "/relatorios/ticket-medio",
+            lambda a, d: {"url": "/relatorios/ticket-medio", "params": intervalo(a, d, 90)}),
+
+    Cenario("exportar_clientes", "GET", "/export/{entidade}",
+            lambda a, d: {"url": "/export/clientes"}, limite=10),
+    Cenario("exportar_manifesto", "GET", "/export/manifestos/{exportacao_id}",
+            lambda a, d: {"url": f"/export/manifestos/{d['exportacao']}"}, preparar=exportar_uma_vez),
+    Cenario("importar_produtos", "POST", "/import/{entidade}",
+            lambda a, d: {"url": "/import/produtos", "files": {"arquivo": ("produtos.csv", csv_produtos(a, d), "text/csv")}},
+            escrita=True, limite=20),
+]
+
+
+def ler_dados(engine_banco) -> dict:
+    # Tamanhos e valores reais do banco, usados para montar as requisições
+    with Session(engine_banco) as session:
+        primeiro, ultimo = session.exec(select(func.min(Pedido.data_pedido), func.max(Pedido.data_pedido))).one()
+        dados = {
+            "clientes": session.exec(select(func.max(Cliente.id))).one() or 1,
+            "produtos": session.exec(select(func.max(Produto.id))).one() or 1,
+            "pedidos": session.exec(select(func.max(Pedido.id))).one() or 1,
+            "estados": session.exec(select(Cliente.estado).distinct()).all() or ["CE"],
+            "categorias": session.exec(select(Produto.categoria).distinct()).all() or ["Livros"],
+            "nomes": sorted({nome.split()[0] for nome in session.exec(select(Cliente.nome).limit(1000)).all()}) or ["Ana"],
+        }
+    dados["primeiro_dia"] = primeiro.date() if primeiro else date.today()
+    dados["ultimo_dia"] = ultimo.date() if ultimo else date.today()
+    dados.update(sequencia=0, remover_clientes=[], remover_produtos=[], remover_pedidos=[], exportacao="")
+    return dados
+
+
+def percentis(latencias: List[float]) -> Dict[str, float]:
+    if len(latencias) < 2:
+        valor = latencias[0] * 1000 if latencias else 0.0
+        return {"p50_ms": valor, "p95_ms": valor, "p99_ms": valor, "max_ms": valor}
+    cortes = statistics.quantiles(latencias, n=100, method="inclusive")
+    return {
+        "p50_ms": cortes[49] * 1000, "p95_ms": cortes[94] * 1000, "p99_ms": cortes[98] * 1000,
+        "max_ms": max(latencias) * 1000,
+    }
+
+
+def rss_pico_mb() -> float:
+    # ru_maxrss vem em KiB no Linux e em bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+async def executar(cliente: httpx.AsyncClient, cenario: Cenario, dados: dict, args) -> dict:
+    total = min(args.requisicoes, cenario.limite) if cenario.limite else args.requisicoes
+    aquecimento = min(args.aquecimento, total)
+    aleatorio = random.Random(f"{args.semente}:{cenario.nome}")
+    if cenario.preparar:
+        await cenario.preparar(cliente, dados, total + aquecimento)
+
+    for _ in range(aquecimento):
+        await cliente.request(cenario.metodo, **cenario.requisicao(aleatorio, dados))
+
+    # As requisições são montadas antes: a sequência não depende da concorrência
+    pendentes = iter([cenario.requisicao(aleatorio, dados) for _ in range(total)])
+    latencias: List[float] = []
+    status = collections.Counter()
+
+    async def trabalhador():
+        for parametros in pendentes:
+            inicio = time.perf_counter()
+            resposta = await cliente.request(cenario.metodo, **parametros)
+            latencias.append(time.perf_counter() - inicio)
+            status[str(resposta.status_code)] += 1
+
+    inicio = time.perf_counter()
+    await asyncio.gather(*(trabalhador() for _ in range(min(args.concorrencia, total))))
+    duracao = time.perf_counter() - inicio
+    return {
+        "metodo": cenario.metodo, "rota": cenario.rota, "requisicoes": total,
+        "concorrencia": min(args.concorrencia, total), "rps": total / duracao,
+        **percentis(latencias), "status": dict(sorted(status.items())), "rss_pico_mb": rss_pico_mb(),
+    }
+
+
+async def rodar(app, cenarios: List[Cenario], dados: dict, args) -> Dict[str, dict]:
+    resultados = {}
+    transporte = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    # O ASGITransport não dispara o lifespan: ele roda aqui (tabelas, índices, caches)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transporte, base_url="http://bench", timeout=None) as cliente:
+            for cenario in cenarios:
+                resultado = await executar(cliente, cenario, dados, args)
+                resultados[cenario.nome] = resultado
+                imprimir_linha(cenario.nome, resultado)
+    return resultados
+
+
+def imprimir_linha(nome: str, resultado: dict, base: Optional[dict] = None, regressao: bool = False):
+    erros = sum(n for codigo, n in resultado["status"].items() if not codigo.startswith(("2", "3")))
+    linha = (f"{nome:<26} {resultado['rps']:>9.1f} {resultado['p50_ms']:>9.2f} {resultado['p95_ms']:>9.2f} "
+             f"{resultado['p99_ms']:>9.2f} {resultado['max_ms']:>9.2f} {resultado['rss_pico_mb']:>8.0f} {erros:>6}")
+    if base:
+        variacao_p95 = (resultado["p95_ms"] / base["p95_ms"] - 1) * 100 if base["p95_ms"] else 0.0
+        variacao_rps = (resultado["rps"] / base["rps"] - 1) * 100 if base["rps"] else 0.0
+        linha += f" {variacao_p95:>+8.1f}% {variacao_rps:>+8.1f}%" + ("  REGRESSÃO" if regressao else "")
+    print(linha, flush=True)
+
+
+def cabecalho(comparando: bool = False):
+    titulo = f"{'cenário':<26} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'máx ms':>9} {'RSS MB':>8} {'erros':>6}"
+    if comparando:
+        titulo += f" {'Δp95':>9} {'Δreq/s':>9}"
+    print(titulo)
+
+
+def regrediu(atual: dict, base: dict, tolerancia: float) -> bool:
+    p95_subiu = (atual["p95_ms"] > base["p95_ms"] * (1 + tolerancia)
+                 and atual["p95_ms"] - base["p95_ms"] >= RUIDO_MS)
+    vazao_caiu = atual["rps"] < base["rps"] * (1 - tolerancia)
+    return p95_subiu or vazao_caiu
+
+
+def comparar(resultados: Dict[str, dict], linha_base: dict, tolerancia: float) -> List[str]:
+    base = linha_base["cenarios"]
+    print(f"\nComparação com a linha base de {linha_base['meta']['data']} "
+          f"(commit {linha_base['meta']['commit']}, tolerância {tolerancia:.0%}):")
+    cabecalho(comparando=True)
+    regressoes = []
+    for nome, resultado in resultados.items():
+        if nome not in base:
+            imprimir_linha(nome, resultado)
+            continue
+        regressao = regrediu(resultado, base[nome], tolerancia)
+        if regressao:
+            regressoes.append(nome)
+        imprimir_linha(nome, resultado, base[nome], regressao)
+    return regressoes
+
+
+def rotas_sem_cenario(app) -> List[str]:
+    cobertas = {(cenario.metodo, cenario.rota) for cenario in CENARIOS}
+    return [
+        f"{metodo.upper()} {rota}"
+        for rota, operacoes in app.openapi()["paths"].items()
+        for metodo in operacoes
+        if (metodo.upper(), rota) not in cobertas
+    ]
+
+
+def commit_atual() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--banco", help="URL do banco (padrão: SQLite temporário gerado com benchmarks.gerar_dados)")
+    parser.add_argument("--clientes", type=int, default=5_000, help="Tamanho do banco gerado")
+    parser.add_argument("--produtos", type=int, default=500, help="Tamanho do banco gerado")
+    parser.add_argument("--pedidos", type=int, default=20_000, help="Tamanho do banco gerado")
+    parser.add_argument("--requisicoes", type=int, default=200, help="Requisições medidas por cenário")
+    parser.add_argument("--concorrencia", type=int, default=10, help="Requisições simultâneas")
+    parser.add_argument("--aquecimento", type=int, default=10, help="Requisições descartadas antes da medição")
+    parser.add_argument("--cenarios", help="Expressão regular: roda só os cenários cujo nome casa")
+    parser.add_argument("--escritas", action="store_true", help="Inclui os cenários que alteram o banco")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--salvar", help="Grava os resultados em JSON (linha de base)")
+    parser.add_argument("--comparar", help="Linha de base em JSON para comparar")
+    parser.add_argument("--tolerancia", type=float, default=0.10, help="Piora aceita no p95 e na vazão (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    diretorio = None
+    url = args.banco
+    if url is None:
+        diretorio = tempfile.TemporaryDirectory()
+        url = f"sqlite:///{os.path.join(diretorio.name, 'bench.db')}"
+
+    # Context.database lê DATABASE_URL ao ser importado (pelo gerador ou pelo
+    # app): precisa estar definido antes, senão o teste roda no database.db
+    os.environ["DATABASE_URL"] = url
+    from Context import database
+
+    if database.DATABASE_URL != url:
+        sys.exit("Context.database foi importado antes de definir DATABASE_URL.")
+    if args.banco is None:
+        from benchmarks.gerar_dados import gerar_banco
+
+        print(f"Gerando banco temporário ({args.clientes} clientes, {args.produtos} produtos, {args.pedidos} pedidos)...")
+        gerar_banco(url, args.clientes, args.produtos, args.pedidos, semente=args.semente)
+
+    app = importlib.import_module("main").app
+    engine = database.engine
+
+    cenarios = [
+        cenario for cenario in CENARIOS
+        if (args.escritas or not cenario.escrita) and (not args.cenarios or re.search(args.cenarios, cenario.nome))
+    ]
+    dados = ler_dados(engine)
+    print(f"\n{len(cenarios)} cenários, {args.requisicoes} requisições, concorrência {args.concorrencia}")
+    cabecalho()
+    resultados = asyncio.run(rodar(app, cenarios, dados, args))
+
+    faltando = rotas_sem_cenario(app)
+    if faltando:
+        print(f"\nRotas sem cenário: {', '.join(faltando)}")
+
+    if args.salvar:
+        meta = {
+            "data": datetime.now().isoformat(timespec="seconds"),
+            "commit": commit_atual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+            "banco": make_url(url).render_as_string(hide_password=True) if args.banco else "sqlite temporário",
+            "tamanhos": {chave: dados[chave] for chave in ("clientes", "produtos", "pedidos")},
+            "parametros": {chave: getattr(args, chave) for chave in
+                           ("requisicoes", "concorrencia", "aquecimento", "escritas", "semente")},
+        }
+        with open(args.salvar, "w", encoding="utf-8") as arquivo:
+            json.dump({"meta": meta, "cenarios": resultados}, arquivo, indent=2, ensure_ascii=False)
+        print(f"\nLinha de base gravada em {args.salvar}")
+
+    if diretorio is not None:
+        engine.dispose()
+        diretorio.cleanup()
+
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as arquivo:
+            regressoes = comparar(resultados, json.load(arquivo), args.tolerancia)
+        if regressoes:
+            sys.exit(f"\nRegressões: {', '.join(regressoes)}")
+        print("\nSem regressões.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Escalabilidade das rotas de leitura com vários workers (servidor.py).
+
+Gera um banco SQLite temporário com benchmarks.gerar_dados (ou usa --banco) e,
+para cada quantidade de workers em --workers, sobe `python servidor.py` num
+subprocesso e dispara requisições GET (produto, cliente e pedido por id,
+páginas por cursor e contagens) durante --duracao segundos, a partir de
+--geradores processos com --conexoes conexões no total. Mostra a vazão, o
+p95, o ganho sobre um worker e a eficiência (ganho / workers).
+
+Com mais de um worker, também confere a invalidação entre processos: lê o
+mesmo produto por conexões novas (que caem em workers diferentes), altera o
+preço com PUT e espera que todas as leituras seguintes vejam o preço novo
+depois de CACHE_SINCRONIA_MS.
+
+A eficiência só é comparada com --eficiencia-minima quando workers +
+geradores cabem nos núcleos da máquina; acima disso os processos disputam CPU
+e a medida não diz nada sobre o app. Sai com código 1 se alguma eficiência
+verificável ficar abaixo do mínimo ou se a invalidação falhar.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.bench_workers
+    python -m benchmarks.bench_workers --workers 1,2,4,8 --duracao 20 --geradores 4
+    python -m benchmarks.bench_workers --banco sqlite:///grande.db --conexoes 128
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def urls_leitura(rnd: random.Random, clientes: int, produtos: int, pedidos: int) -> str:
+    # Mistura de leituras: a maioria por id, algumas páginas e contagens
+    sorteio = rnd.random()
+    if sorteio < 0.3:
+        return f"/produtos/{rnd.randint(1, produtos)}"
+    if sorteio < 0.5:
+        return f"/clientes/{rnd.randint(1, clientes)}"
+    if sorteio < 0.7:
+        return f"/pedidos/{rnd.randint(1, pedidos)}"
+    if sorteio < 0.8:
+        return f"/produtos/?after_id={rnd.randint(0, produtos)}&size=20"
+    if sorteio < 0.9:
+        return f"/clientes/?after_id={rnd.randint(0, clientes)}&size=20"
+    return "/clientes/quantidade/" if sorteio < 0.95 else "/produtos/quantidade/"
+
+
+async def carregar(url: str, conexoes: int, duracao: float, semente: int, tamanhos: tuple) -> tuple:
+    import httpx
+
+    rnd = random.Random(semente)
+    latencias, erros = [], 0
+    limites = httpx.Limits(max_connections=conexoes, max_keepalive_connections=conexoes)
+    async with httpx.AsyncClient(base_url=url, timeout=30, limits=limites) as http:
+        fim = time.perf_counter() + duracao
+
+        async def laco():
+            nonlocal erros
+            while time.perf_counter() < fim:
+                inicio = time.perf_counter()
+                resposta = await http.get(urls_leitura(rnd, *tamanhos))
+                latencias.append(time.perf_counter() - inicio)
+                if resposta.status_code != 200:
+                    erros += 1
+
+        await asyncio.gather(*(laco() for _ in range(conexoes)))
+    return latencias, erros
+
+
+def gerador(argumentos: tuple) -> tuple:
+    # Processo de carga: roda um event loop próprio com as suas conexões
+    return asyncio.run(carregar(*argumentos))
+
+
+def aguardar(servidor: subprocess.Popen, url: str, workers: int):
+    # Espera o socket e alguns acessos bem-sucedidos (os workers sobem em paralelo)
+    import httpx
+
+    limite = time.monotonic() + 60
+    while time.monotonic() < limite:
+        if servidor.poll() is not None:
+            sys.exit("O servidor não iniciou.")
+        try:
+            for _ in range(workers * 4):
+                httpx.get(f"{url}/", headers={"Connection": "close"}, timeout=5).raise_for_status()
+            return
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    sys.exit("O servidor não respondeu em 60s.")
+
+
+def conferir_invalidacao(url: str, espera: float) -> bool:
+    import httpx
+
+    def precos() -> set:
+        # Conexões novas são distribuídas entre os workers, aquecendo o cache de cada um
+        return {
+            httpx.get(f"{url}/produtos/1", headers={"Connection": "close"}).json()["preco"] for _ in range(30)
+        }
+
+    antes = precos()
+    novo = round(max(antes) + 1.5, 2)
+    produto = httpx.get(f"{url}/produtos/1").json()
+    produto["preco"] = novo
+    httpx.put(f"{url}/produtos/1", json=produto).raise_for_status()
+    time.sleep(espera)
+    depois = precos()
+    print(f"  invalidação entre workers: antes {sorted(antes)}, depois {sorted(depois)}")
+    return depois == {novo}
+
+
+def medir(args, url_banco: str, workers: int, tamanhos: tuple) -> dict:
+    porta = porta_livre()
+    url = f"http://127.0.0.1:{porta}"
+    servidor = subprocess.Popen(
+        [sys.executable, "servidor.py", "--workers", str(workers), "--port", str(porta), "--log-level", "warning"],
+        cwd=RAIZ, env=dict(os.environ, DATABASE_URL=url_banco, METRICAS_HABILITADAS="false"),
+    )
+    try:
+        aguardar(servidor, url, workers)
+        invalidacao_ok = conferir_invalidacao(url, args.sincronia_ms / 1000 * 3) if workers > 1 else True
+
+        por_gerador = max(args.conexoes // args.geradores, 1)
+        with multiprocessing.get_context("spawn").Pool(args.geradores) as pool:
+            # Aquecimento curto (caches, conexões), descartado
+            pool.map(gerador, [(url, por_gerador, 1.0, i, tamanhos) for i in range(args.geradores)])
+            inicio = time.perf_counter()
+            resultados = pool.map(
+                gerador, [(url, por_gerador, args.duracao, 1000 + i, tamanhos) for i in range(args.geradores)]
+            )
+            duracao = time.perf_counter() - inicio
+    finally:
+        servidor.terminate()
+        servidor.wait()
+
+    latencias = [latencia for parcial, _ in resultados for latencia in parcial]
+    return {
+        "workers": workers,
+        "rps": len(latencias) / duracao,
+        "p95_ms": statistics.quantiles(latencias, n=100)[94] * 1000 if len(latencias) > 1 else 0.0,
+        "erros": sum(erros for _, erros in resultados),
+        "invalidacao_ok": invalidacao_ok,
+    }
+
+
+def main():
+    nucleos = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--workers", default="1,2,4", help="Quantidades de workers, separadas por vírgula")
+    parser.add_argument("--duracao", type=float, default=10, help="Segundos de carga por medição")
+    parser.add_argument("--conexoes", type=int, default=32, help="Conexões simultâneas no total")
+    parser.add_argument("--geradores", type=int, default=max(nucleos // 4, 1), help="Processos de carga")
+    parser.add_argument("--eficiencia-minima", type=float, default=0.7)
+    parser.add_argument("--banco", help="URL do banco (padrão: SQLite temporário gerado)")
+    parser.add_argument("--clientes", type=int, default=5000)
+    parser.add_argument("--produtos", type=int, default=500)
+    parser.add_argument("--pedidos", type=int, default=20000)
+    args = parser.parse_args()
+    args.sincronia_ms = float(os.getenv("CACHE_SINCRONIA_MS", 100))
+    quantidades = [int(n) for n in args.workers.split(",")]
+
+    url_banco = args.banco
+    if not url_banco:
+        from benchmarks.gerar_dados import gerar_banco
+
+        url_banco = f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}"
+        gerar_banco(url_banco, args.clientes, args.produtos, args.pedidos)
+    tamanhos = (args.clientes, args.produtos, args.pedidos)
+
+    print(f"{nucleos} núcleo(s), {args.geradores} processo(s) de carga, {args.conexoes} conexões, {args.duracao:.0f}s por medição")
+    medicoes = []
+    for workers in quantidades:
+        print(f"{workers} worker(s)...")
+        medicoes.append(medir(args, url_banco, workers, tamanhos))
+
+    base = medicoes[0]["rps"] / medicoes[0]["workers"]
+    falhas = []
+    print(f"\n{'workers':>7} {'req/s':>9} {'p95 ms':>8} {'erros':>6} {'ganho':>6} {'eficiência':>10}")
+    for medicao in medicoes:
+        workers = medicao["workers"]
+        ganho = medicao["rps"] / base
+        eficiencia = ganho / workers
+        verificavel = workers + args.geradores <= nucleos
+        nota = "" if verificavel else "  (não verificável: workers + geradores > núcleos)"
+        print(f"{workers:>7} {medicao['rps']:>9,.0f} {medicao['p95_ms']:>8.1f} {medicao['erros']:>6} "
+              f"{ganho:>6.2f} {eficiencia:>10.0%}{nota}")
+        if verificavel and eficiencia < args.eficiencia_minima:
+            falhas.append(f"eficiência de {eficiencia:.0%} com {workers} workers")
+        if medicao["erros"]:
+            falhas.append(f"{medicao['erros']} erros com {workers} workers")
+        if not medicao["invalidacao_ok"]:
+            falhas.append(f"invalidação entre processos falhou com {workers} workers")
+
+    print("OK." if not falhas else "FALHOU: " + ", ".join(falhas))
+    sys.exit(1 if falhas else 0)
+
+
+if __name__ == "__main__":
+    main()
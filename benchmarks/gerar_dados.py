@@ -0,0 +1,253 @@
+"""
+Gera um banco com dados sintéticos reprodutíveis para testes de carga: a mesma
+semente e os mesmos tamanhos geram sempre os mesmos registros, com ids
+sequenciais a partir de 1.
+
+    clientes  nomes, e-mails únicos, cidades e estados de todo o país
+    produtos  categorias, preços e estoque
+    pedidos   datas crescentes com o id ao longo de --dias, status variados e
+              itens com produtos enviesados (poucos produtos vendem muito)
+
+As linhas são geradas sob demanda e gravadas em lotes com executemany (SQLite)
+ou INSERT multi-VALUES (PostgreSQL), com os índices secundários e os triggers
+da busca desligados durante a carga. No final os índices, o índice de busca, os
+contadores e os rollups são reconstruídos e as estatísticas do planejador
+atualizadas (ANALYZE). O banco precisa estar vazio.
+
+Uso (a partir da raiz do projeto):
+    python -m benchmarks.gerar_dados --banco sqlite:///bench.db
+    python -m benchmarks.gerar_dados --banco sqlite:///grande.db --clientes 1000000 --produtos 100000 --pedidos 10000000
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, datetime, timedelta
+from itertools import islice
+from typing import Dict, Iterator, List
+
+from sqlalchemy import event, func, insert
+from sqlmodel import Session, SQLModel, select
+
+from Context.database import criar_engine, criar_indices, criar_status_padrao
+from Models.models import Cliente, ItemPedido, Pedido, Produto, StatusPedido, StatusPedidoEnum
+from Utils.busca import criar_indices_busca, indexacao_suspensa
+from Utils.contadores import reconstruir_contadores
+from Utils.rollups import reconstruir_rollups
+
+# Último dia do histórico gerado: fixo, para que a mesma semente gere as mesmas datas
+DATA_FINAL = datetime(2025, 1, 1)
+
+LOTE = 50_000
+
+NOMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriel", "Helena", "Igor", "Júlia",
+    "Karina", "Lucas", "Mariana", "Nicolas", "Olívia", "Pedro", "Rafaela", "Samuel", "Tatiana", "Vitor",
+]
+SOBRENOMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Ferreira", "Costa", "Rodrigues", "Almeida",
+    "Nascimento", "Carvalho", "Araújo", "Ribeiro", "Gomes", "Martins", "Rocha", "Barbosa", "Alves", "Felix",
+]
+# Estado -> (DDD, cidades); a ordem define o peso de cada estado no sorteio
+ESTADOS = {
+    "SP": ("11", ["São Paulo", "Campinas", "Santos"]),
+    "RJ": ("21", ["Rio de Janeiro", "Niterói"]),
+    "MG": ("31", ["Belo Horizonte", "Uberlândia"]),
+    "BA": ("71", ["Salvador", "Feira de Santana"]),
+    "PR": ("41", ["Curitiba", "Londrina"]),
+    "RS": ("51", ["Porto Alegre", "Caxias do Sul"]),
+    "PE": ("81", ["Recife", "Olinda"]),
+    "CE": ("85", ["Fortaleza", "Ibaretama", "Paraipaba"]),
+    "PA": ("91", ["Belém"]),
+    "SC": ("48", ["Florianópolis", "Joinville"]),
+    "GO": ("62", ["Goiânia"]),
+    "AM": ("92", ["Manaus"]),
+    "DF": ("61", ["Brasília"]),
+    "ES": ("27", ["Vitória"]),
+    "RN": ("84", ["Natal"]),
+}
+PESOS_ESTADOS = [len(ESTADOS) - i for i in range(len(ESTADOS))]
+CATEGORIAS = ["Eletrônicos", "Livros", "Casa", "Esporte", "Moda", "Beleza", "Brinquedos", "Mercado", "Informática", "Jardim"]
+# Status -> peso no sorteio
+STATUS = {
+    StatusPedidoEnum.ENTREGUE: 60,
+    StatusPedidoEnum.ENVIADO: 10,
+    StatusPedidoEnum.PAGO: 8,
+    StatusPedidoEnum.EM_PROCESSAMENTO: 5,
+    StatusPedidoEnum.PENDENTE: 10,
+    StatusPedidoEnum.CANCELADO: 7,
+}
+
+
+COLUNAS_CLIENTE = ["id", "nome", "data_nascimento", "email", "telefone", "endereco", "cidade", "estado", "cep"]
+
+
+def gerar_clientes(aleatorio: random.Random, quantidade: int) -> Iterator[tuple]:
+    estados = list(ESTADOS)
+    for id_ in range(1, quantidade + 1):
+        nome, sobrenome = aleatorio.choice(NOMES), aleatorio.choice(SOBRENOMES)
+        estado = aleatorio.choices(estados, PESOS_ESTADOS)[0]
+        ddd, cidades = ESTADOS[estado]
+        nascimento = date(1950, 1, 1) + timedelta(days=aleatorio.randrange(365 * 55))
+        yield (
+            id_, f"{nome} {sobrenome}", nascimento.isoformat(),
+            f"{nome.lower()}.{sobrenome.lower()}{id_}@email.com",
+            f"({ddd}) 9{aleatorio.randrange(10 ** 4):04d}-{aleatorio.randrange(10 ** 4):04d}",
+            f"Rua {aleatorio.choice(SOBRENOMES)}, {aleatorio.randint(1, 2000)}",
+            aleatorio.choice(cidades), estado, f"{aleatorio.randrange(10 ** 5):05d}-{aleatorio.randrange(1000):03d}",
+        )
+
+
+def gerar_produtos(aleatorio: random.Random, quantidade: int, precos: List[float]) -> Iterator[tuple]:
+    # precos recebe o preço de cada produto (índice id - 1), usado nos itens dos pedidos
+    for id_ in range(1, quantidade + 1):
+        preco = round(aleatorio.lognormvariate(4, 1), 2) + 1
+        precos.append(preco)
+        yield id_, f"Produto {id_}", aleatorio.choice(CATEGORIAS), preco, aleatorio.randint(1000, 100_000)
+
+
+def gerar_pedidos(
+    aleatorio: random.Random, quantidade: int, clientes: int, precos: List[float],
+    itens_media: int, dias: int, status_ids: Dict[StatusPedidoEnum, int]
+) -> Iterator[tuple]:
+    # (pedido, [itens]); as datas crescem com o id, como em um sistema real
+    ids_status = [status_ids[status] for status in STATUS]
+    pesos_status = list(STATUS.values())
+    inicio = DATA_FINAL - timedelta(days=dias)
+    intervalo = dias * 86400 / max(quantidade, 1)
+    produtos = len(precos)
+    item_id = 1
+    for id_ in range(1, quantidade + 1):
+        data_pedido = inicio + timedelta(seconds=(id_ - 1 + aleatorio.random()) * intervalo)
+        itens = []
+        for _ in range(aleatorio.randint(1, 2 * itens_media - 1)):
+            # Distribuição enviesada: os primeiros ids concentram as vendas
+            produto_id = int(produtos * aleatorio.random() ** 3) + 1
+            itens.append((item_id, id_, produto_id, aleatorio.randint(1, 5), precos[produto_id - 1]))
+            item_id += 1
+        valor_total = round(sum(quantidade * preco for _, _, _, quantidade, preco in itens), 2)
+        status_id = aleatorio.choices(ids_status, pesos_status)[0]
+        yield (id_, aleatorio.randint(1, clientes), status_id, data_pedido, valor_total), itens
+
+
+def inserir(conexao, modelo, colunas: List[str], linhas: List[tuple]):
+    # SQLite: executemany do driver com tuplas, sem o processamento de parâmetros
+    # do SQLAlchemy. PostgreSQL: INSERT multi-VALUES do SQLAlchemy (insertmanyvalues),
+    # bem mais rápido que o executemany linha a linha do psycopg2.
+    if not linhas:
+        return
+    if conexao.dialect.name == "sqlite":
+        marcadores = ", ".join("?" for _ in colunas)
+        conexao.exec_driver_sql(
+            f"INSERT INTO {modelo.__tablename__} ({', '.join(colunas)}) VALUES ({marcadores})", linhas
+        )
+    else:
+        conexao.execute(insert(modelo.__table__), [dict(zip(colunas, linha)) for linha in linhas])
+
+
+def carregar(session: Session, modelo, colunas: List[str], linhas: Iterator[tuple], total: int):
+    inicio = time.perf_counter()
+    gravadas = 0
+    while lote := list(islice(linhas, LOTE)):
+        inserir(session.connection(), modelo, colunas, lote)
+        session.commit()
+        gravadas += len(lote)
+        print(f"\r  {modelo.__tablename__}: {gravadas:,}/{total:,}", end="", flush=True)
+    print(f"  ({gravadas / max(time.perf_counter() - inicio, 1e-9):,.0f} linhas/s)")
+
+
+def carregar_pedidos(session: Session, pedidos: Iterator[tuple], total: int):
+    colunas_pedido = ["id", "cliente_id", "status_id", "data_pedido", "valor_total"]
+    colunas_item = ["id", "pedido_id", "produto_id", "quantidade", "preco_unitario"]
+    # No SQLite a data vai como texto, no mesmo formato que o SQLAlchemy grava
+    sqlite = session.get_bind().dialect.name == "sqlite"
+    inicio = time.perf_counter()
+    gravados = itens = 0
+    while lote := list(islice(pedidos, LOTE)):
+        conexao = session.connection()
+        linhas_pedidos = [pedido for pedido, _ in lote]
+        if sqlite:
+            linhas_pedidos = [(*pedido[:3], pedido[3].isoformat(" ", "microseconds"), pedido[4]) for pedido in linhas_pedidos]
+        inserir(conexao, Pedido, colunas_pedido, linhas_pedidos)
+        linhas_itens = [item for _, itens_pedido in lote for item in itens_pedido]
+        inserir(conexao, ItemPedido, colunas_item, linhas_itens)
+        session.commit()
+        gravados += len(lote)
+        itens += len(linhas_itens)
+        print(f"\r  pedido: {gravados:,}/{total:,} ({itens:,} itens)", end="", flush=True)
+    print(f"  ({(gravados + itens) / max(time.perf_counter() - inicio, 1e-9):,.0f} linhas/s)")
+
+
+def indices_secundarios(tabelas) -> list:
+    return [indice for tabela in tabelas for indice in tabela.indexes]
+
+
+def gerar_banco(url: str, clientes: int, produtos: int, pedidos: int, itens_media: int = 3,
+                dias: int = 730, semente: int = 42):
+    engine = criar_engine(url)
+    if engine.dialect.name == "sqlite":
+        # Só durante a carga: uma queda de energia aqui perde o banco, que é descartável.
+        # Vai no connect porque o PRAGMA não pode ser mudado dentro de uma transação.
+        event.listen(engine, "connect", lambda conexao, _: conexao.execute("PRAGMA synchronous=OFF"))
+    SQLModel.metadata.create_all(engine)
+    criar_indices_busca(engine)
+    aleatorio = random.Random(semente)
+
+    with Session(engine) as session:
+        if session.exec(select(func.count()).select_from(Cliente)).one():
+            sys.exit("O banco já tem dados; use um banco vazio.")
+        criar_status_padrao(session)
+        status_ids = {status.nome: status.id for status in session.exec(select(StatusPedido)).all()}
+        session.commit()
+
+        # Índices secundários são recriados uma vez no final (criar_indices)
+        tabelas = [Cliente.__table__, Produto.__table__, Pedido.__table__, ItemPedido.__table__]
+        with engine.begin() as conexao:
+            for indice in indices_secundarios(tabelas):
+                indice.drop(conexao, checkfirst=True)
+
+        inicio = time.perf_counter()
+        with indexacao_suspensa(session, "cliente"):
+            carregar(session, Cliente, COLUNAS_CLIENTE, gerar_clientes(aleatorio, clientes), clientes)
+        precos: List[float] = []
+        with indexacao_suspensa(session, "produto"):
+            carregar(session, Produto, ["id", "nome", "categoria", "preco", "estoque"],
+                     gerar_produtos(aleatorio, produtos, precos), produtos)
+        if pedidos and clientes and produtos:
+            carregar_pedidos(
+                session, gerar_pedidos(aleatorio, pedidos, clientes, precos, itens_media, dias, status_ids), pedidos
+            )
+
+        print("  índices, contadores e rollups...", flush=True)
+        criar_indices(engine)
+        if session.get_bind().dialect.name == "postgresql":
+            # Os ids foram gravados explicitamente: as sequências precisam avançar
+            for tabela in tabelas:
+                session.connection().exec_driver_sql(
+                    f"SELECT setval(pg_get_serial_sequence('{tabela.name}', 'id'), "
+                    f"(SELECT coalesce(max(id), 0) + 1 FROM {tabela.name}), false)"
+                )
+        reconstruir_contadores(session)
+        reconstruir_rollups(session)
+        session.connection().exec_driver_sql("ANALYZE")
+        session.commit()
+        print(f"Concluído em {time.perf_counter() - inicio:.1f}s")
+    engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--banco", required=True, help="URL do banco (ex.: sqlite:///bench.db)")
+    parser.add_argument("--clientes", type=int, default=10_000)
+    parser.add_argument("--produtos", type=int, default=1_000)
+    parser.add_argument("--pedidos", type=int, default=50_000)
+    parser.add_argument("--itens", type=int, default=3, help="Média de itens por pedido")
+    parser.add_argument("--dias", type=int, default=730, help="Dias de histórico até 2025-01-01")
+    parser.add_argument("--semente", type=int, default=42)
+    args = parser.parse_args()
+
+    gerar_banco(args.banco, args.clientes, args.produtos, args.pedidos, args.itens, args.dias, args.semente)
+
+
+if __name__ == "__main__":
+    main()
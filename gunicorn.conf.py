@@ -0,0 +1,15 @@
+# Configuração do gunicorn com workers do uvicorn (ver servidor.py):
+#     gunicorn main:app -c gunicorn.conf.py
+# O banco é inicializado uma vez no processo principal, antes dos workers.
+import multiprocessing
+import os
+
+from servidor import preparar_workers
+
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+bind = os.getenv("BIND", "127.0.0.1:8000")
+
+
+def on_starting(server):
+    preparar_workers(server.cfg.workers)
@@ -1,14 +1,35 @@
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
-from Context.database import create_db_and_tables
-from routers import cliente_routes, produto_routes, pedido_routes
+from sqlmodel import Session
+from Context.database import inicializar_banco, metricas_pool, engine, async_engine, DB_ASYNC
+from routers import cliente_routes, produto_routes, pedido_routes, relatorio_routes, export_routes, import_routes
+from Utils.cache import metricas_cache
+from Utils.fila_pedidos import PEDIDOS_AGRUPADOS
+from Utils.invalidacao import CACHE_SINCRONIZAR, SincroniaCache
+from Utils.metricas import METRICAS_HABILITADAS, MetricasMiddleware, exportar_metricas
+from Utils.pedidos import carregar_status
+from Utils.rotas_async import criar_router_async
+
+# Invalidações de cache vindas dos outros workers (CACHE_SINCRONIZAR=true)
+sincronia_cache = SincroniaCache(engine)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Criar tabelas ao iniciar
-    create_db_and_tables()
+    # Criar tabelas ao iniciar (uma vez só com vários workers, ver servidor.py)
+    inicializar_banco()
+    # Status de pedido em cache (tabela fixa)
+    with Session(engine) as session:
+        carregar_status(session)
+    # Commit agrupado de POST /pedidos/ (PEDIDOS_AGRUPADOS=true)
+    if PEDIDOS_AGRUPADOS:
+        await pedido_routes.fila_pedidos.iniciar()
+    if CACHE_SINCRONIZAR:
+        sincronia_cache.iniciar()
     yield
-    # Limpeza ao encerrar (se necessário)
+    # Grava os pedidos que ainda estão na fila antes de encerrar
+    await pedido_routes.fila_pedidos.parar()
+    sincronia_cache.parar()
 
 app = FastAPI(
     title="Sistema de Vendas",
@@ -22,6 +43,10 @@ app = FastAPI(
     }    
 )
 
+# Latência, status e comandos SQL por rota, expostos em GET /metrics
+if METRICAS_HABILITADAS:
+    app.add_middleware(MetricasMiddleware)
+
 @app.get("/", description="Rota inicial com informações da API")
 async def root():
     return {
@@ -30,11 +55,33 @@ async def root():
         "endpoints": {
             "clientes": "/clientes",
             "produtos": "/produtos",
-            "pedidos": "/pedidos"
+            "pedidos": "/pedidos",
+            "relatorios": "/relatorios",
+            "export": "/export",
+            "import": "/import"
         }
     }
 
-# Registra as rotas
-app.include_router(cliente_routes.router)
-app.include_router(produto_routes.router)
-app.include_router(pedido_routes.router)
\ No newline at end of file
+@app.get("/banco/pool", description="Métricas do pool de conexões com o banco")
+def banco_pool():
+    metricas = metricas_pool()
+    if async_engine is not None:
+        metricas["async"] = metricas_pool(async_engine.sync_engine)
+    return metricas
+
+@app.get("/cache/metricas", description="Acertos, faltas e invalidações dos caches de leitura")
+def cache_metricas():
+    # Por processo: com vários workers, cada requisição vê os caches de um deles
+    metricas = metricas_cache()
+    if CACHE_SINCRONIZAR:
+        metricas["sincronia"] = sincronia_cache.metricas()
+    return metricas
+
+@app.get("/metrics", description="Métricas de desempenho no formato do Prometheus", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(exportar_metricas(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Registra as rotas (versões async quando DB_ASYNC=true)
+for router in (cliente_routes.router, produto_routes.router, pedido_routes.router, relatorio_routes.router,
+               export_routes.router, import_routes.router):
+    app.include_router(criar_router_async(router) if DB_ASYNC else router)
\ No newline at end of file
@@ -1,16 +1,57 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlmodel import Session, select
-from sqlalchemy import func
 from Models.models import Cliente, PaginatedResponse
 from Context.database import get_session
-from typing import List
+from Utils.paginacao import resolver_after_id, paginar_por_chave, ler_cursor
+from Utils.contadores import incrementar, obter_contagem
+from Utils.busca import consulta_busca
+from Utils.campos import colunas_do_modelo, parametro_campos, selecionar
+from Utils.etag import cliente_por_id, versoes_alteradas
+from Utils.respostas import pagina_json, pedidos_recentes, resposta_json
+from Utils.rollups import SEM_ESTADO, mover_cliente
+from typing import List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/clientes", tags=["Clientes"])
 
+
+def incluir_pedidos(
+    include: Optional[str] = Query(
+        default=None, pattern="^pedidos$", description="pedidos: embute os pedidos mais recentes de cada cliente"
+    ),
+    pedidos_size: int = Query(default=5, ge=1, le=50, description="Pedidos embutidos por cliente"),
+) -> Optional[int]:
+    # Quantos pedidos embutir por cliente, ou None sem ?include=pedidos
+    return pedidos_size if include == "pedidos" else None
+
+
+campos_cliente = parametro_campos([*colunas_do_modelo(Cliente), "pedidos"])
+
+
+def com_pedidos(session: Session, clientes: List[dict], size: int, posicao: Optional[dict] = None) -> List[dict]:
+    # Acrescenta "pedidos": {"items": [...], "next_cursor": ...} a cada cliente.
+    # O next_cursor continua em GET /clientes/{id}?include=pedidos&pedidos_cursor=...
+    embutidos = pedidos_recentes(session, [cliente["id"] for cliente in clientes], size, posicao)
+    return [{**cliente, "pedidos": embutidos[cliente["id"]]} for cliente in clientes]
+
+
+def montar_clientes(
+    session: Session, clientes: List[dict], campos: Optional[List[str]], pedidos_size: Optional[int]
+) -> List[dict]:
+    # Com ?include=pedidos embute os pedidos, a menos que ?fields= os deixe de fora
+    if pedidos_size and (campos is None or "pedidos" in campos):
+        return com_pedidos(session, clientes, pedidos_size)
+    return clientes
+
+
 @router.post("/", response_model=Cliente, description="Insere um novo cliente no sistema.")
 def inserir_cliente(cliente: Cliente, session: Session = Depends(get_session)) -> Cliente:
     try:
         session.add(cliente)
+        incrementar(session, "cliente")
+        versoes_alteradas(session, "cliente", descritivos=False)
         session.commit()
         session.refresh(cliente)
         return cliente
@@ -23,22 +64,43 @@ def inserir_cliente(cliente: Cliente, session: Session = Depends(get_session)) -
 def listar_clientes(
     page: int = Query(default=1, ge=1, description="Número da página"),
     size: int = Query(default=10, ge=1, le=100, description="Itens por página"),
+    cursor: Optional[str] = Query(default=None, description="Cursor opaco retornado em next_cursor"),
+    after_id: Optional[int] = Query(default=None, ge=0, description="Pagina por chave a partir deste id"),
+    incluir_total: bool = Query(default=False, description="Conta o total na paginação por cursor"),
+    campos: Optional[List[str]] = Depends(campos_cliente),
+    pedidos_size: Optional[int] = Depends(incluir_pedidos),
     session: Session = Depends(get_session)
 ) -> PaginatedResponse[Cliente]:
+    inicio = resolver_after_id(cursor, after_id)
+    # Com ?fields= ou ?include= a página sai como dicts de um SELECT só das
+    # colunas pedidas (Utils.campos), sem objetos do ORM
+    carregar = (lambda query: selecionar(session, query, Cliente, campos)) if campos or pedidos_size else None
     try:
+        # Paginação por cursor: busca pela chave primária e só conta o total se pedido
+        if inicio is not None:
+            total = obter_contagem(session, "cliente") if incluir_total else None
+            items, next_cursor = paginar_por_chave(session, select(Cliente), Cliente.id, inicio, size, carregar)
+            if carregar:
+                items = montar_clientes(session, items, campos, pedidos_size)
+                return pagina_json(items, size, total, next_cursor=next_cursor)
+            return PaginatedResponse(items=items, total=total, size=size, next_cursor=next_cursor)
+
         # Calcula o offset
         offset = (page - 1) * size
         
         # Busca total de registros
-        total = session.exec(select(func.count(Cliente.id))).one()
+        total = obter_contagem(session, "cliente")
         
+        # Calcula total de páginas
+        pages = -(-total // size)  # Divisão arredondada para cima
+
         # Busca items da página atual
         query = select(Cliente).offset(offset).limit(size)
+        if carregar:
+            items = montar_clientes(session, carregar(query), campos, pedidos_size)
+            return pagina_json(items, size, total, page, pages)
         items = session.exec(query).all()
         
-        # Calcula total de páginas
-        pages = -(-total // size)  # Divisão arredondada para cima
-        
         # Cria resposta
         response = PaginatedResponse(
             items=items,
@@ -51,13 +113,25 @@ def listar_clientes(
         return response
     
     except Exception as e:
-        print(f"Erro ao listar clientes: {e}")  # Debug
+        logger.exception("Erro ao listar clientes")
         raise HTTPException(status_code=500, detail=f"Erro ao listar clientes: {str(e)}")
 
 @router.get("/{cliente_id}", description="Retorna um cliente existente.")
-def listar_clientes(cliente_id: int, session: Session = Depends(get_session)) -> Cliente:
+def listar_clientes(
+    cliente_id: int,
+    etag: dict = Depends(cliente_por_id),
+    pedidos_size: Optional[int] = Depends(incluir_pedidos),
+    pedidos_cursor: Optional[str] = Query(default=None, description="next_cursor dos pedidos embutidos"),
+    session: Session = Depends(get_session)
+) -> Cliente:
+    posicao = ler_cursor(pedidos_cursor) if pedidos_cursor else None
+    if posicao and "data_pedido" not in posicao:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
     try:
         cliente = session.get(Cliente, cliente_id)
+        if cliente and pedidos_size:
+            return resposta_json(com_pedidos(session, [cliente.model_dump()], pedidos_size, posicao)[0], etag)
         return cliente
     
     except Exception as e:
@@ -73,9 +147,14 @@ def atualizar_cliente(cliente_id: int, cliente_atualizado: Cliente, session: Ses
         if not db_cliente:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
         
+        estado_anterior = db_cliente.estado
         cliente_data = cliente_atualizado.model_dump(exclude_unset=True)
         db_cliente.sqlmodel_update(cliente_data)
         session.add(db_cliente)
+        # As vendas do cliente acompanham o estado no rollup por estado
+        if db_cliente.estado != estado_anterior:
+            mover_cliente(session, cliente_id, estado_anterior, db_cliente.estado)
+        versoes_alteradas(session, "cliente", [cliente_id])
         session.commit()
         session.refresh(db_cliente)
         return {"message": "Cliente atualizado com sucesso"}
@@ -93,7 +172,10 @@ def deletar_cliente(cliente_id: int, session: Session = Depends(get_session)):
         if not cliente:
             raise HTTPException(status_code=404, detail="Cliente não encontrado")
         
+        mover_cliente(session, cliente_id, cliente.estado, SEM_ESTADO)
         session.delete(cliente)
+        incrementar(session, "cliente", -1)
+        versoes_alteradas(session, "cliente", [cliente_id])
         session.commit()
         return {"message": "Cliente removido com sucesso"}
     
@@ -103,20 +185,41 @@ def deletar_cliente(cliente_id: int, session: Session = Depends(get_session)):
 @router.get("/quantidade/", description="Retorna a quantidade total de clientes cadastrados.")
 def quantidade_clientes(session: Session = Depends(get_session)):
     try:
-        return {"Quantidade": session.exec(select(func.count()).select_from(Cliente)).one()}
+        return {"Quantidade": obter_contagem(session, "cliente")}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao contar clientes: {str(e)}")
 
 @router.get("/clientes_por_estado/{estado}", description="Retorna clientes por estado.")
-def quantidade_clientes(estado: str, session: Session = Depends(get_session)) -> list[Cliente]:
+def quantidade_clientes(
+    estado: str,
+    campos: Optional[List[str]] = Depends(campos_cliente),
+    pedidos_size: Optional[int] = Depends(incluir_pedidos),
+    session: Session = Depends(get_session)
+) -> list[Cliente]:
     try:
-        return session.exec(select(Cliente).where(Cliente.estado.like(estado))).all()
+        query = select(Cliente).where(Cliente.estado.like(estado))
+        if campos or pedidos_size:
+            clientes = selecionar(session, query, Cliente, campos)
+            return resposta_json(montar_clientes(session, clientes, campos, pedidos_size))
+        return session.exec(query).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao retornar clientes: {str(e)}")
         
-@router.get("/busca/{nome}", description="Busca clientes por nome parcial")
-def buscar_clientes_por_nome(nome: str, session: Session = Depends(get_session)) -> list[Cliente]:
+@router.get("/busca/{nome}", description="Busca clientes por nome ou email (prefixos de palavras, sem diferenciar acentos)")
+def buscar_clientes_por_nome(
+    nome: str,
+    limite: int = Query(default=50, ge=1, le=500, description="Máximo de resultados"),
+    campos: Optional[List[str]] = Depends(campos_cliente),
+    pedidos_size: Optional[int] = Depends(incluir_pedidos),
+    session: Session = Depends(get_session)
+) -> list[Cliente]:
     try:
-        return session.exec(select(Cliente).where(Cliente.nome.like(f"%{nome}%"))).all()
+        query = consulta_busca(session, "cliente", nome, limite)
+        if query is None:
+            return []
+        if campos or pedidos_size:
+            clientes = selecionar(session, query, Cliente, campos)
+            return resposta_json(montar_clientes(session, clientes, campos, pedidos_size))
+        return session.exec(query).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
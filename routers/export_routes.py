@@ -0,0 +1,50 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session
+from Models.models import Exportacao
+from Context.database import get_session, engine
+from Utils.exportacao import FORMATOS, exportar
+from typing import Literal
+import importlib.util
+import uuid
+
+router = APIRouter(prefix="/export", tags=["Exportação"])
+
+
+@router.get("/manifestos/{exportacao_id}", response_model=Exportacao, description="Manifesto de uma exportação: status, linhas, bytes e SHA-256 do corpo enviado")
+def buscar_manifesto(exportacao_id: str, session: Session = Depends(get_session)):
+    exportacao = session.get(Exportacao, exportacao_id)
+    if not exportacao:
+        raise HTTPException(status_code=404, detail="Exportação não encontrada")
+    return exportacao
+
+
+@router.get("/{entidade}", description="Exporta todas as linhas da entidade em streaming (CSV, CSV gzip ou Parquet)")
+def exportar_entidade(
+    entidade: Literal["clientes", "produtos", "pedidos", "itens_pedido"],
+    formato: Literal["csv", "csv.gz", "parquet"] = Query(default="csv", description="Formato do arquivo"),
+    session: Session = Depends(get_session)
+):
+    if formato == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=400, detail="O formato parquet requer o pacote pyarrow.")
+
+    try:
+        exportacao = Exportacao(id=uuid.uuid4().hex, entidade=entidade, formato=formato)
+        session.add(exportacao)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        raise HTTPException(status_code=500, detail=f"Erro ao iniciar exportação: {str(e)}")
+
+    # O gerador é síncrono: o Starlette o consome no threadpool, sem bloquear o event loop
+    media_type, extensao = FORMATOS[formato]
+    manifesto = f"{router.prefix}/manifestos/{exportacao.id}"
+    return StreamingResponse(
+        exportar(engine, exportacao.id, entidade, formato),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{entidade}.{extensao}"',
+            "X-Export-Id": exportacao.id,
+            "Link": f'<{manifesto}>; rel="describedby"',
+        }
+    )
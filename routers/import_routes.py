@@ -0,0 +1,28 @@
+from fastapi import APIRouter, HTTPException, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session
+from Context.database import engine
+from Utils.importacao import IMPORT_LOTE, importar_csv
+from typing import Literal
+
+router = APIRouter(prefix="/import", tags=["Importação"])
+
+
+@router.post("/{entidade}", description="Importa clientes ou produtos de um arquivo CSV (upsert pelo id)")
+async def importar_entidade(
+    entidade: Literal["clientes", "produtos"],
+    arquivo: UploadFile = File(..., description="CSV com cabeçalho; UTF-8 ou Latin-1"),
+    tamanho_lote: int = Query(default=IMPORT_LOTE, ge=1, le=100_000, description="Linhas gravadas por transação")
+):
+    # O upload já está em um arquivo temporário; a leitura, a validação e as
+    # gravações rodam no threadpool para não bloquear o event loop
+    def importar():
+        with Session(engine) as session:
+            return importar_csv(session, entidade, arquivo.file, tamanho_lote)
+
+    try:
+        return await run_in_threadpool(importar)
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao importar {entidade}: {str(e)}")
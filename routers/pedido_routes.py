@@ -1,25 +1,42 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-from sqlalchemy import func
 from Models.models import (
     Pedido, 
     ItemPedido, 
     PaginatedResponse, 
-    StatusPedido, 
     StatusPedidoEnum,
-    Cliente,
-    Produto
+    Cliente
 )
-from Context.database import get_session
+from Context.database import get_session, engine
+from Utils.pedidos import (
+    obter_status_id, registrar_pedido, registrar_pedidos, ler_linhas_ndjson, filtro_periodo,
+    agrupar_quantidades, ajustar_reserva, sincronizar_itens
+)
+from Utils.paginacao import resolver_after_id, codificar_cursor, ler_cursor
+from Utils.contadores import incrementar, obter_contagem
+from Utils.rollups import aplicar_pedido, itens_do_pedido
+from Utils.etag import pedido_por_id, versoes_alteradas
+from Utils.respostas import consultar_pedidos, pagina_json, resposta_json
+from Utils.transacoes import com_retentativas
+from Utils.fila_pedidos import PEDIDOS_AGRUPADOS, FilaPedidos, coletor_fila
+from Utils.campos import parametro_campos, projetar
 from typing import List, Optional
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
 from sqlalchemy.orm import selectinload
-from sqlalchemy import delete
+from sqlalchemy import delete, tuple_
 from datetime import datetime, date
+import json
+import tempfile
 
 
 router = APIRouter(prefix="/pedidos", tags=["Pedidos"])
 
+fila_pedidos = FilaPedidos(engine)
+coletor_fila(fila_pedidos)
+
 class PedidoCreate(BaseModel):
     cliente_id: int
     itens: List[dict] = Field(..., example=[{
@@ -61,7 +78,8 @@ class PedidoResponse(BaseModel):
     class Config:
         from_attributes = True
 
-@router.post("/", response_model=Pedido)
+campos_pedido = parametro_campos(PedidoResponse.model_fields)
+
 def criar_pedido(pedido_data: PedidoCreate, session: Session = Depends(get_session)):
     try:
         # Verifica se o cliente existe
@@ -73,62 +91,29 @@ def criar_pedido(pedido_data: PedidoCreate, session: Session = Depends(get_sessi
             )
 
         # Busca o status inicial (Pendente)
-        status_inicial = session.exec(
-            select(StatusPedido)
-            .where(StatusPedido.nome == StatusPedidoEnum.PENDENTE)
-        ).first()
+        status_inicial_id = obter_status_id(session, StatusPedidoEnum.PENDENTE)
         
-        if not status_inicial:
+        if not status_inicial_id:
             raise HTTPException(status_code=500, detail="Status inicial não encontrado")
 
-        # Criar o pedido
-        novo_pedido = Pedido(
-            cliente_id=pedido_data.cliente_id,
-            status_id=status_inicial.id,
-            valor_total=0
-        )
-        session.add(novo_pedido)
-        session.flush()
-
-        valor_total = 0
-        # Adicionar os itens do pedido
-        for item in pedido_data.itens:
-            # Verifica se o produto existe
-            produto = session.get(Produto, item["produto_id"])
-            if not produto:
-                session.rollback()
-                raise HTTPException(
-                    status_code=404,
-                    detail=f"Produto com ID {item['produto_id']} não encontrado"
-                )
-
-            # Verifica se há estoque suficiente
-            if produto.estoque < item["quantidade"]:
-                session.rollback()
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Estoque insuficiente para o produto {produto.nome}. Disponível: {produto.estoque}"
-                )
-
-            item_pedido = ItemPedido(
-                pedido_id=novo_pedido.id,
-                produto_id=item["produto_id"],
-                quantidade=item["quantidade"],
-                preco_unitario=item["preco_unitario"]
+        # Cria o pedido e os itens com uma consulta de produtos, um insert em lote
+        # e um único UPDATE condicional de estoque
+        def gravar() -> dict:
+            novo_pedido = registrar_pedido(
+                session,
+                cliente_id=pedido_data.cliente_id,
+                itens=pedido_data.itens,
+                status_id=status_inicial_id
             )
-            valor_total += item["quantidade"] * item["preco_unitario"]
-            session.add(item_pedido)
+            # A resposta é montada antes do commit: um refresh depois dele pegaria
+            # outra conexão do pool e a seguraria até a serialização, que sob carga
+            # espera por uma thread livre enquanto as threads esperam por conexões
+            resposta = novo_pedido.model_dump()
+            session.commit()
+            return resposta
 
-            # Atualiza o estoque do produto
-            produto.estoque -= item["quantidade"]
-            session.add(produto)
-
-        # Atualiza o valor total do pedido
-        novo_pedido.valor_total = valor_total
-        
-        session.commit()
-        session.refresh(novo_pedido)
-        return novo_pedido
+        # Conflitos transitórios (lock/deadlock) refazem a transação com espera
+        return com_retentativas(session, gravar)
     except HTTPException as e:
         session.rollback()
         raise e
@@ -137,119 +122,207 @@ def criar_pedido(pedido_data: PedidoCreate, session: Session = Depends(get_sessi
         raise HTTPException(status_code=500, detail=f"Erro ao criar pedido: {str(e)}")
 
 
+async def criar_pedido_agrupado(pedido_data: PedidoCreate):
+    # Commit agrupado: o pedido entra na fila e a resposta sai depois do commit
+    # do lote em que ele foi gravado (Utils.fila_pedidos)
+    return await fila_pedidos.enfileirar(pedido_data.cliente_id, pedido_data.itens)
+
+
+# Com PEDIDOS_AGRUPADOS=true o POST usa a fila de commit agrupado
+router.add_api_route(
+    "/", criar_pedido_agrupado if PEDIDOS_AGRUPADOS else criar_pedido, methods=["POST"], response_model=Pedido
+)
+
+
+def importar_lote_pedidos(session: Session, lote: List[tuple[int, bytes]]) -> List[dict]:
+    # Valida e grava um lote de linhas NDJSON em uma única transação.
+    # Cada pedido roda em um savepoint, então um pedido inválido não desfaz os demais.
+    resultados = []
+    validos = []
+    for numero, linha in lote:
+        try:
+            validos.append((numero, PedidoCreate.model_validate_json(linha)))
+        except ValidationError as e:
+            resultados.append({
+                "linha": numero,
+                "status": "erro",
+                "detail": jsonable_encoder(e.errors(include_url=False, include_context=False))
+            })
+
+    status_inicial_id = obter_status_id(session, StatusPedidoEnum.PENDENTE)
+    if not status_inicial_id:
+        raise HTTPException(status_code=500, detail="Status inicial não encontrado")
+
+    def gravar() -> list:
+        registrados = registrar_pedidos(
+            session, [(pedido.cliente_id, pedido.itens) for _, pedido in validos], status_inicial_id
+        )
+        # Os ids são lidos antes do commit, que expira os objetos
+        registrados = [registrado if isinstance(registrado, HTTPException) else registrado.id for registrado in registrados]
+        session.commit()
+        return registrados
+
+    try:
+        # Conflitos transitórios (lock/deadlock) refazem o lote com espera
+        registrados = com_retentativas(session, gravar)
+        for (numero, _), registrado in zip(validos, registrados):
+            if isinstance(registrado, HTTPException):
+                resultados.append({"linha": numero, "status": "erro", "detail": registrado.detail})
+            else:
+                resultados.append({"linha": numero, "status": "criado", "pedido_id": registrado})
+    except Exception as e:
+        session.rollback()
+        resultados.extend(
+            {"linha": numero, "status": "erro", "detail": f"Erro ao gravar lote: {str(e)}"} for numero, _ in validos
+        )
+
+    # Libera os objetos do lote para manter o uso de memória constante
+    session.expunge_all()
+    return sorted(resultados, key=lambda resultado: resultado["linha"])
+
+
+@router.post("/bulk", description="Importa pedidos em lote a partir de um corpo NDJSON (um PedidoCreate por linha)")
+async def importar_pedidos(
+    request: Request,
+    tamanho_lote: int = Query(default=1000, ge=1, le=10000, description="Pedidos gravados por transação")
+):
+    # O corpo precisa ser lido por completo antes de a resposta começar a ser enviada,
+    # então os resultados vão para um arquivo temporário (em disco acima de 1 MB)
+    # e são devolvidos em streaming no final
+    resultados = tempfile.SpooledTemporaryFile(max_size=1024 * 1024, mode="w+b")
+
+    def gravar_resultados(lote_resultados: List[dict]):
+        for resultado in lote_resultados:
+            resultados.write(json.dumps(resultado, ensure_ascii=False).encode() + b"\n")
+
+    # No SQLite cada lote já começa com a trava de escrita (BEGIN IMMEDIATE)
+    with Session(engine.execution_options(escrita_imediata=True)) as session:
+        lote = []
+        async for numero, linha in ler_linhas_ndjson(request.stream()):
+            lote.append((numero, linha))
+            if len(lote) >= tamanho_lote:
+                gravar_resultados(await run_in_threadpool(importar_lote_pedidos, session, lote))
+                lote = []
+
+        if lote:
+            gravar_resultados(await run_in_threadpool(importar_lote_pedidos, session, lote))
+
+    def enviar_resultados():
+        with resultados:
+            resultados.seek(0)
+            while pedaco := resultados.read(64 * 1024):
+                yield pedaco
+
+    return StreamingResponse(enviar_resultados(), media_type="application/x-ndjson")
+
+
 @router.get("/", response_model=PaginatedResponse[PedidoResponse])
 def listar_pedidos(
     page: int = Query(default=1, ge=1),
     size: int = Query(default=10, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Cursor opaco retornado em next_cursor"),
+    after_id: Optional[int] = Query(default=None, ge=0, description="Pagina por chave a partir deste id"),
+    incluir_total: bool = Query(default=False, description="Conta o total na paginação por cursor"),
+    campos: Optional[List[str]] = Depends(campos_pedido),
     session: Session = Depends(get_session)
 ):
+    inicio = resolver_after_id(cursor, after_id)
     try:
+        # Página montada por uma consulta com JOIN e serializada com orjson (Utils.respostas)
+        pagina = select(Pedido.id).order_by(Pedido.id).limit(size + 1 if inicio is not None else size)
+
+        if inicio is not None:
+            # Paginação por cursor: custo constante em qualquer profundidade
+            total = obter_contagem(session, "pedido") if incluir_total else None
+            pedidos = consultar_pedidos(session, pagina.where(Pedido.id > inicio), campos=campos)
+            next_cursor = codificar_cursor(pedidos[size - 1]["id"]) if len(pedidos) > size else None
+            return pagina_json(projetar(pedidos[:size], campos), size, total=total, next_cursor=next_cursor)
+
         offset = (page - 1) * size
-        total = session.exec(select(func.count(Pedido.id))).one()
+        total = obter_contagem(session, "pedido")
+        pedidos = consultar_pedidos(session, pagina.offset(offset), campos=campos)
+
+        pages = -(-total // size)
+
+        return pagina_json(projetar(pedidos, campos), size, total=total, page=page, pages=pages)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao listar pedidos: {str(e)}")
+
+@router.get("/buscar-por-data", description="Lista pedidos por data")
+def listar_pedidos_por_data(
+    data: str = Query(
+        ..., 
+        pattern=r"^\d{2}/\d{2}/\d{4}$",
+        example="20/03/2024",
+        description="Data no formato DD/MM/YYYY"
+    ),
+    session: Session = Depends(get_session)
+) -> list[Pedido]:
+    try:
+        # Converte a data do formato BR para o formato do banco
+        dia, mes, ano = data.split('/')
+        data_formatada = date(int(ano), int(mes), int(dia))
         
-        # Ajustando a query para garantir o carregamento dos itens
+        # Intervalo [dia, dia seguinte) sobre a coluna sem função, para usar o índice
+        return session.exec(select(Pedido).where(*filtro_periodo(data_formatada, data_formatada))).all()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao listar pedidos: {str(e)}")
+
+@router.get("/periodo", response_model=PaginatedResponse[PedidoResponse], description="Lista pedidos entre duas datas, com paginação por cursor")
+def listar_pedidos_por_periodo(
+    inicio: date = Query(..., description="Data inicial (YYYY-MM-DD), inclusiva"),
+    fim: date = Query(..., description="Data final (YYYY-MM-DD), inclusiva"),
+    status: Optional[StatusPedidoEnum] = Query(default=None, description="Filtra pelo status do pedido"),
+    cliente_id: Optional[int] = Query(default=None, description="Filtra pelo cliente"),
+    size: int = Query(default=10, ge=1, le=100),
+    cursor: Optional[str] = Query(default=None, description="Cursor opaco retornado em next_cursor"),
+    campos: Optional[List[str]] = Depends(campos_pedido),
+    session: Session = Depends(get_session)
+):
+    if fim < inicio:
+        raise HTTPException(status_code=400, detail="A data final deve ser maior ou igual à inicial.")
+    posicao = ler_cursor(cursor) if cursor else None
+    if posicao and "data_pedido" not in posicao:
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+    try:
         query = (
-            select(Pedido)
-            .options(
-                selectinload(Pedido.cliente),
-                selectinload(Pedido.status),
-                selectinload(Pedido.itens).selectinload(ItemPedido.produto)
-            )
-            .offset(offset)
-            .limit(size)
+            select(Pedido.id)
+            .where(*filtro_periodo(inicio, fim))
+            .order_by(Pedido.data_pedido, Pedido.id)
+            .limit(size + 1)
         )
-        
-        pedidos = session.exec(query).all()
-        
-        # Formata a resposta com verificação de segurança e debug
-        items = []
-        for pedido in pedidos:
-            itens_pedido = []
-            for item in pedido.itens:
-                if item.produto:  # Verifica se o produto existe
-                    itens_pedido.append(
-                        ItemPedidoResponse(
-                            id=item.id,
-                            quantidade=item.quantidade,
-                            preco_unitario=item.preco_unitario,
-                            subtotal=item.quantidade * item.preco_unitario,
-                            produto=ProdutoResponse(
-                                id=item.produto.id,
-                                nome=item.produto.nome,
-                                categoria=item.produto.categoria,
-                                preco=item.produto.preco
-                            )
-                        )
-                    )
-            
-            items.append(
-                PedidoResponse(
-                    id=pedido.id,
-                    data_pedido=pedido.data_pedido,
-                    valor_total=pedido.valor_total,
-                    status=pedido.status.nome.value if pedido.status else "Status não definido",
-                    cliente_nome=pedido.cliente.nome if pedido.cliente else "Cliente não encontrado",
-                    itens=itens_pedido
-                )
+        if cliente_id is not None:
+            query = query.where(Pedido.cliente_id == cliente_id)
+        if status is not None:
+            query = query.where(Pedido.status_id == obter_status_id(session, status))
+        if posicao:
+            # Continua depois do último (data_pedido, id) da página anterior
+            query = query.where(
+                tuple_(Pedido.data_pedido, Pedido.id)
+                > tuple_(datetime.fromisoformat(posicao["data_pedido"]), posicao["id"])
             )
-        
-        pages = -(-total // size)
-        
-        return PaginatedResponse(
-            items=items,
-            total=total,
-            page=page,
-            size=size,
-            pages=pages
-        )
+
+        pedidos = consultar_pedidos(session, query, ordem=(Pedido.data_pedido, Pedido.id), campos=campos)
+
+        next_cursor = None
+        if len(pedidos) > size:
+            ultimo = pedidos[size - 1]
+            next_cursor = codificar_cursor(ultimo["id"], data_pedido=ultimo["data_pedido"].isoformat())
+
+        return pagina_json(projetar(pedidos[:size], campos), size, next_cursor=next_cursor)
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao listar pedidos: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Erro ao listar pedidos por período: {str(e)}")
 
 @router.get("/{pedido_id}", response_model=PedidoResponse)
-def buscar_pedido(pedido_id: int, session: Session = Depends(get_session)):
+def buscar_pedido(pedido_id: int, etag: dict = Depends(pedido_por_id), session: Session = Depends(get_session)):
     try:
-        # Ajustando a query para garantir o carregamento dos itens
-        pedido = session.exec(
-            select(Pedido)
-            .where(Pedido.id == pedido_id)
-            .options(
-                selectinload(Pedido.cliente),
-                selectinload(Pedido.status),
-                selectinload(Pedido.itens).selectinload(ItemPedido.produto)
-            )
-        ).first()
-        
-        if not pedido:
+        pedidos = consultar_pedidos(session, select(Pedido.id).where(Pedido.id == pedido_id))
+
+        if not pedidos:
             raise HTTPException(status_code=404, detail="Pedido não encontrado")
-        
-        # Construir a lista de itens com verificação
-        itens_pedido = []
-        for item in pedido.itens:
-            if item.produto:  # Verifica se o produto existe
-                itens_pedido.append(
-                    ItemPedidoResponse(
-                        id=item.id,
-                        quantidade=item.quantidade,
-                        preco_unitario=item.preco_unitario,
-                        subtotal=item.quantidade * item.preco_unitario,
-                        produto=ProdutoResponse(
-                            id=item.produto.id,
-                            nome=item.produto.nome,
-                            categoria=item.produto.categoria,
-                            preco=item.produto.preco
-                        )
-                    )
-                )
-        
-        # Construir a resposta com verificações de segurança
-        return PedidoResponse(
-            id=pedido.id,
-            data_pedido=pedido.data_pedido,
-            valor_total=pedido.valor_total,
-            status=pedido.status.nome.value if pedido.status else "Status não definido",
-            cliente_nome=pedido.cliente.nome if pedido.cliente else "Cliente não encontrado",
-            itens=itens_pedido
-        )
+
+        return resposta_json(pedidos[0], etag)
             
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao buscar pedido: {str(e)}")
@@ -268,25 +341,6 @@ def listar_pedidos_cliente(cliente_id: int, session: Session = Depends(get_sessi
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar pedidos: {str(e)}")
 
-@router.get("/buscar-por-data", description="Lista pedidos por data")
-def listar_pedidos_por_data(
-    data: str = Query(
-        ..., 
-        pattern=r"^\d{2}/\d{2}/\d{4}$",
-        example="20/03/2024",
-        description="Data no formato DD/MM/YYYY"
-    ),
-    session: Session = Depends(get_session)
-) -> list[Pedido]:
-    try:
-        # Converte a data do formato BR para o formato do banco
-        dia, mes, ano = data.split('/')
-        data_formatada = date(int(ano), int(mes), int(dia))
-        
-        return session.exec(select(Pedido).where(func.date(Pedido.data_pedido) == data_formatada)).all()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erro ao listar pedidos: {str(e)}")
-
 @router.get("/{pedido_id}/itens", description="Lista todos os itens de um pedido específico")
 def listar_itens_pedido(pedido_id: int, session: Session = Depends(get_session)):
     try:
@@ -336,41 +390,48 @@ def atualizar_pedido(pedido_id: int, pedido_update: PedidoUpdate, session: Sessi
         if not pedido:
             raise HTTPException(status_code=404, detail="Pedido não encontrado")
 
+        cancelado_id = obter_status_id(session, StatusPedidoEnum.CANCELADO)
+        estava_cancelado = pedido.status_id == cancelado_id
+
         # Atualiza o status se fornecido
         if pedido_update.status:
-            status = session.exec(
-                select(StatusPedido)
-                .where(StatusPedido.nome == pedido_update.status)
-            ).first()
-            
-            if not status:
+            status_id = obter_status_id(session, pedido_update.status)
+            if not status_id:
                 raise HTTPException(status_code=404, detail="Status não encontrado")
                 
-            pedido.status_id = status.id
+            pedido.status_id = status_id
+
+        if pedido_update.status or pedido_update.itens:
+            itens_atuais = itens_do_pedido(session, pedido_id)
+            itens_novos = pedido_update.itens or itens_atuais
+            cancelado = pedido.status_id == cancelado_id
 
-        # Atualiza os itens se fornecidos
-        if pedido_update.itens:
-            # Remove os itens antigos
-            session.exec(
-                delete(ItemPedido).where(ItemPedido.pedido_id == pedido_id)
+            # Pedidos cancelados não reservam estoque: a mudança de itens ou de
+            # status aplica ao estoque só a diferença entre as duas reservas.
+            # Vem antes dos rollups para travar os produtos na mesma ordem que
+            # a criação de pedidos.
+            ajustar_reserva(
+                session,
+                agrupar_quantidades(itens_atuais) if not estava_cancelado else {},
+                agrupar_quantidades(itens_novos) if not cancelado else {},
+                produto_ids=[item["produto_id"] for item in pedido_update.itens or []]
             )
-            
-            # Adiciona os novos itens
-            valor_total = 0
-            for item in pedido_update.itens:
-                novo_item = ItemPedido(
-                    pedido_id=pedido_id,
-                    produto_id=item["produto_id"],
-                    quantidade=item["quantidade"],
-                    preco_unitario=item["preco_unitario"]
+
+            # Troca o pedido nos rollups: sai com o status e os itens antigos e
+            # volta com os novos
+            aplicar_pedido(session, pedido, itens_atuais, estava_cancelado, sinal=-1)
+
+            # Atualiza os itens se fornecidos, gravando só as linhas que mudaram
+            if pedido_update.itens:
+                sincronizar_itens(session, pedido_id, itens_atuais, pedido_update.itens)
+                pedido.valor_total = sum(
+                    item["quantidade"] * item["preco_unitario"] for item in pedido_update.itens
                 )
-                valor_total += item["quantidade"] * item["preco_unitario"]
-                session.add(novo_item)
-            
-            # Atualiza o valor total do pedido
-            pedido.valor_total = valor_total
+
+            aplicar_pedido(session, pedido, itens_novos, cancelado)
 
         session.add(pedido)
+        versoes_alteradas(session, "pedido", [pedido_id])
         session.commit()
         session.refresh(pedido)
         
@@ -385,6 +446,9 @@ def atualizar_pedido(pedido_id: int, pedido_update: PedidoUpdate, session: Sessi
             )
         ).first()
         
+    except HTTPException as e:
+        session.rollback()
+        raise e
     except Exception as e:
         session.rollback()
         raise HTTPException(status_code=500, detail=f"Erro ao atualizar pedido: {str(e)}")
@@ -397,12 +461,22 @@ def deletar_pedido(pedido_id: int, session: Session = Depends(get_session)):
         if not pedido:
             raise HTTPException(status_code=404, detail="Pedido não encontrado")
         
+        cancelado = pedido.status_id == obter_status_id(session, StatusPedidoEnum.CANCELADO)
+        itens = itens_do_pedido(session, pedido_id)
+
+        # Um pedido ativo devolve ao estoque o que reservava, como no cancelamento
+        if not cancelado:
+            ajustar_reserva(session, agrupar_quantidades(itens), {})
+        aplicar_pedido(session, pedido, itens, cancelado, sinal=-1)
+
         # 1. Primeiro deleta os itens do pedido (tabela ItemPedido)
         session.exec(
             delete(ItemPedido).where(ItemPedido.pedido_id == pedido_id)
         )
      
         session.delete(pedido)
+        incrementar(session, "pedido", -1)
+        versoes_alteradas(session, "pedido", [pedido_id])
         session.commit()
         
         return {
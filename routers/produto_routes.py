@@ -1,16 +1,27 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
 from sqlmodel import Session, select
-from sqlalchemy import func
 from Models.models import Produto, PaginatedResponse
 from Context.database import get_session
-from typing import List
+from Utils.paginacao import resolver_after_id, paginar_por_chave
+from Utils.contadores import incrementar, obter_contagem
+from Utils.busca import consulta_busca
+from Utils.campos import colunas_do_modelo, parametro_campos, selecionar
+from Utils.cache import invalidar_apos_commit, obter_produto, produto_cache
+from Utils.etag import lista_produtos, versoes_alteradas
+from Utils.respostas import pagina_json, resposta_json
+from typing import List, Optional
 
 router = APIRouter(prefix="/produtos", tags=["Produtos"])
 
+campos_produto = parametro_campos(colunas_do_modelo(Produto))
+
 @router.post("/", description="Insere um novo produto no sistema.")
 def inserir_produto(produto: Produto, session: Session = Depends(get_session)) -> Produto:
     try:
         session.add(produto)
+        incrementar(session, "produto")
+        incrementar(session, "produto", categoria=produto.categoria)
+        versoes_alteradas(session, "produto", descritivos=False)
         session.commit()
         session.refresh(produto)
         return produto
@@ -23,19 +34,33 @@ def inserir_produto(produto: Produto, session: Session = Depends(get_session)) -
 def listar_produtos(
     page: int = Query(default=1, ge=1, description="Número da página"),
     size: int = Query(default=10, ge=1, le=100, description="Itens por página"),
+    cursor: Optional[str] = Query(default=None, description="Cursor opaco retornado em next_cursor"),
+    after_id: Optional[int] = Query(default=None, ge=0, description="Pagina por chave a partir deste id"),
+    incluir_total: bool = Query(default=False, description="Conta o total na paginação por cursor"),
+    campos: Optional[List[str]] = Depends(campos_produto),
+    _etag: dict = Depends(lista_produtos),
     session: Session = Depends(get_session)
 ) -> PaginatedResponse[Produto]:
+    inicio = resolver_after_id(cursor, after_id)
+    # Com ?fields= a página é um SELECT só das colunas pedidas (Utils.campos)
+    carregar = (lambda query: selecionar(session, query, Produto, campos)) if campos else None
     try:
+        if inicio is not None:
+            total = obter_contagem(session, "produto") if incluir_total else None
+            items, next_cursor = paginar_por_chave(session, select(Produto), Produto.id, inicio, size, carregar)
+            if campos:
+                return pagina_json(items, size, total, next_cursor=next_cursor, headers=_etag)
+            return PaginatedResponse(items=items, total=total, size=size, next_cursor=next_cursor)
+
         offset = (page - 1) * size
-        total = session.exec(select(func.count(Produto.id))).one()
-        
-        items = session.exec(
-            select(Produto)
-            .offset(offset)
-            .limit(size)
-        ).all()
-        
+        total = obter_contagem(session, "produto")
         pages = -(-total // size)
+
+        query = select(Produto).offset(offset).limit(size)
+        if campos:
+            return pagina_json(carregar(query), size, total, page, pages, headers=_etag)
+
+        items = session.exec(query).all()
         
         return PaginatedResponse(
             items=items,
@@ -50,8 +75,7 @@ def listar_produtos(
 @router.get("/{produto_id}", description="Retorna um produto existente.")
 def listar_clientes(produto_id: int, session: Session = Depends(get_session)) -> Produto:
     try:
-        produto = session.get(Produto, produto_id)
-        return produto
+        return obter_produto(session, produto_id)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao listar clientes: {str(e)}")
@@ -66,9 +90,17 @@ def atualizar_produto(produto_id: int, produto_atualizado: Produto, session: Ses
         if not db_produto:
             raise HTTPException(status_code=404, detail="Produto não encontrado")
         
+        categoria_anterior = db_produto.categoria
         produto_data = produto_atualizado.model_dump(exclude_unset=True)
         db_produto.sqlmodel_update(produto_data)
         session.add(db_produto)
+
+        # Move o produto entre os contadores de categoria
+        if db_produto.categoria != categoria_anterior:
+            incrementar(session, "produto", -1, categoria=categoria_anterior)
+            incrementar(session, "produto", categoria=db_produto.categoria)
+        invalidar_apos_commit(session, produto_cache, [produto_id])
+        versoes_alteradas(session, "produto", [produto_id])
         session.commit()
         session.refresh(db_produto)
         return {"message": "Produto atualizado com sucesso"}
@@ -87,6 +119,10 @@ def deletar_produto(produto_id: int, session: Session = Depends(get_session)):
             raise HTTPException(status_code=404, detail="Produto não encontrado")
         
         session.delete(produto)
+        incrementar(session, "produto", -1)
+        incrementar(session, "produto", -1, categoria=produto.categoria)
+        invalidar_apos_commit(session, produto_cache, [produto_id])
+        versoes_alteradas(session, "produto", [produto_id])
         session.commit()
         return {"message": "Produto removido com sucesso"}
     
@@ -96,28 +132,50 @@ def deletar_produto(produto_id: int, session: Session = Depends(get_session)):
 @router.get("/quantidade/", description="Retorna a quantidade total de produtos cadastrados.")
 def quantidade_produtos(session: Session = Depends(get_session)):
     try:
-        return {"Quantidade": session.exec(select(func.count()).select_from(Produto)).one()}
+        return {"Quantidade": obter_contagem(session, "produto")}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao contar produtos: {str(e)}")
     
 @router.get("/categoria_qtd/{categoria}", description="Retorna a quantidade de produtos por categoria.")
 def quantidade_clientes(categoria: str, session: Session = Depends(get_session)):
     try:
-        return {"Quantidade": session.exec(select(func.count()).select_from(Produto).where(Produto.categoria == categoria)).one()}
+        return {"Quantidade": obter_contagem(session, "produto", categoria=categoria)}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro ao contar produtos por categoria: {str(e)}")
 
 @router.get("/preco_maior_que/{preco}", description="Lista produtos com preço maior que o valor especificado")
-def listar_produtos_por_preco(preco: float, session: Session = Depends(get_session)) -> list[Produto]:
+def listar_produtos_por_preco(
+    preco: float, campos: Optional[List[str]] = Depends(campos_produto), session: Session = Depends(get_session)
+) -> list[Produto]:
     try:
-        return session.exec(select(Produto).where(Produto.preco > preco)).all()
+        query = select(Produto).where(Produto.preco > preco)
+        if campos:
+            return resposta_json(selecionar(session, query, Produto, campos))
+        return session.exec(query).all()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
+
+@router.get("/busca/{termo}", description="Busca produtos por nome ou categoria (prefixos de palavras, sem diferenciar acentos)")
+def buscar_produtos(
+    termo: str,
+    limite: int = Query(default=50, ge=1, le=500, description="Máximo de resultados"),
+    campos: Optional[List[str]] = Depends(campos_produto),
+    session: Session = Depends(get_session)
+) -> list[Produto]:
+    try:
+        query = consulta_busca(session, "produto", termo, limite)
+        if query is None:
+            return []
+        if campos:
+            return resposta_json(selecionar(session, query, Produto, campos))
+        return session.exec(query).all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erro na busca: {str(e)}")
 
 @router.get("/{produto_id}/disponibilidade")
 def verificar_disponibilidade(produto_id: int, quantidade: int, session: Session = Depends(get_session)):
     try:
-        produto = session.get(Produto, produto_id)
+        produto = obter_produto(session, produto_id)
         if not produto:
             raise HTTPException(status_code=404, detail="Produto não encontrado")
         
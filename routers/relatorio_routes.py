@@ -0,0 +1,249 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlmodel import Session, select
+from sqlalchemy import Integer, cast, func, desc
+from sqlalchemy.exc import OperationalError
+from Models.models import Produto, VendaDiariaEstado, VendaDiariaProduto
+from Context.database import get_session
+from Utils.rollups import SEM_ESTADO
+from contextlib import contextmanager
+from datetime import date
+from typing import Literal, Optional
+import os
+import sqlite3
+import time
+
+router = APIRouter(prefix="/relatorios", tags=["Relatórios"])
+
+# Tempo máximo de execução de cada relatório, em segundos
+RELATORIO_TEMPO_LIMITE = float(os.getenv("RELATORIO_TEMPO_LIMITE", 10))
+
+# Formato usado para agrupar data_pedido em cada período. A semana é a ISO 8601
+# (começa na segunda; ano da semana pode diferir do ano civil), calculada à
+# parte no SQLite, que não tem %G/%V antes da versão 3.46
+FORMATOS_SQLITE = {"dia": "%Y-%m-%d", "mes": "%Y-%m", "ano": "%Y"}
+FORMATOS_POSTGRES = {"dia": "YYYY-MM-DD", "semana": "IYYY-\"W\"IW", "mes": "YYYY-MM", "ano": "YYYY"}
+
+
+@contextmanager
+def tempo_limite(session: Session, segundos: float = RELATORIO_TEMPO_LIMITE):
+    # Interrompe a consulta que passar do limite: progress handler no SQLite e
+    # statement_timeout no PostgreSQL. O erro vira 504 para o cliente.
+    conexao = session.connection()
+    driver = conexao.connection.driver_connection
+    sqlite_sincrono = isinstance(driver, sqlite3.Connection)
+
+    if sqlite_sincrono:
+        prazo = time.monotonic() + segundos
+        driver.set_progress_handler(lambda: time.monotonic() > prazo, 10_000)
+    elif conexao.dialect.name == "postgresql":
+        conexao.exec_driver_sql(f"SET LOCAL statement_timeout = {int(segundos * 1000)}")
+
+    try:
+        yield
+    except OperationalError as e:
+        if "interrupted" in str(e) or "statement timeout" in str(e):
+            raise HTTPException(status_code=504, detail="O relatório excedeu o tempo limite; reduza o período.")
+        raise
+    finally:
+        if sqlite_sincrono:
+            driver.set_progress_handler(None, 0)
+
+
+def filtros_rollup(modelo, inicio: Optional[date], fim: Optional[date], incluir_cancelados: bool) -> list:
+    # Os relatórios leem só os rollups diários (Utils.rollups), filtrados pela chave dia
+    filtros = []
+    if inicio is not None:
+        filtros.append(modelo.dia >= inicio)
+    if fim is not None:
+        filtros.append(modelo.dia <= fim)
+    if not incluir_cancelados:
+        filtros.append(modelo.cancelado.is_(False))
+    return filtros
+
+
+def agrupar_periodo(session: Session, periodo: str):
+    if session.get_bind().dialect.name == "postgresql":
+        return func.to_char(VendaDiariaEstado.dia, FORMATOS_POSTGRES[periodo])
+    if periodo == "semana":
+        # A quinta-feira da semana está sempre no ano ISO, e o dia do ano dela dá o número da semana
+        quinta = func.date(VendaDiariaEstado.dia, "-3 days", "weekday 4")
+        semana = (cast(func.strftime("%j", quinta), Integer) - 1) / 7 + 1
+        return func.printf("%s-W%02d", func.strftime("%Y", quinta), semana)
+    return func.strftime(FORMATOS_SQLITE[periodo], VendaDiariaEstado.dia)
+
+
+def validar_intervalo(inicio: Optional[date], fim: Optional[date]):
+    if inicio and fim and fim < inicio:
+        raise HTTPException(status_code=400, detail="A data final deve ser maior ou igual à inicial.")
+
+
+@router.get("/receita", description="Receita e quantidade de pedidos por período, com receita acumulada")
+def receita_por_periodo(
+    periodo: Literal["dia", "semana", "mes", "ano"] = Query(default="dia", description="Agrupamento"),
+    inicio: Optional[date] = Query(default=None, description="Data inicial (YYYY-MM-DD), inclusiva"),
+    fim: Optional[date] = Query(default=None, description="Data final (YYYY-MM-DD), inclusiva"),
+    incluir_cancelados: bool = Query(default=False),
+    session: Session = Depends(get_session)
+):
+    validar_intervalo(inicio, fim)
+    try:
+        with tempo_limite(session):
+            chave = agrupar_periodo(session, periodo).label("periodo")
+            agregado = (
+                select(
+                    chave,
+                    func.sum(VendaDiariaEstado.pedidos).label("pedidos"),
+                    func.sum(VendaDiariaEstado.receita).label("receita")
+                )
+                .where(*filtros_rollup(VendaDiariaEstado, inicio, fim, incluir_cancelados))
+                .group_by(chave)
+                .having(func.sum(VendaDiariaEstado.pedidos) > 0)
+                .subquery()
+            )
+            linhas = session.exec(
+                select(
+                    agregado.c.periodo,
+                    agregado.c.pedidos,
+                    agregado.c.receita,
+                    func.sum(agregado.c.receita).over(order_by=agregado.c.periodo).label("receita_acumulada")
+                ).order_by(agregado.c.periodo)
+            ).all()
+        return [linha._asdict() for linha in linhas]
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório de receita: {str(e)}")
+
+
+@router.get("/categorias", description="Receita e quantidade vendida por categoria de produto")
+def receita_por_categoria(
+    inicio: Optional[date] = Query(default=None, description="Data inicial (YYYY-MM-DD), inclusiva"),
+    fim: Optional[date] = Query(default=None, description="Data final (YYYY-MM-DD), inclusiva"),
+    incluir_cancelados: bool = Query(default=False),
+    session: Session = Depends(get_session)
+):
+    validar_intervalo(inicio, fim)
+    try:
+        with tempo_limite(session):
+            receita = func.sum(VendaDiariaProduto.receita)
+            linhas = session.exec(
+                select(
+                    Produto.categoria,
+                    func.sum(VendaDiariaProduto.quantidade).label("quantidade"),
+                    receita.label("receita"),
+                    (receita / func.sum(receita).over()).label("participacao")
+                )
+                .join(Produto, Produto.id == VendaDiariaProduto.produto_id)
+                .where(*filtros_rollup(VendaDiariaProduto, inicio, fim, incluir_cancelados))
+                .group_by(Produto.categoria)
+                .having(func.sum(VendaDiariaProduto.quantidade) > 0)
+                .order_by(desc("receita"))
+            ).all()
+        return [linha._asdict() for linha in linhas]
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório por categoria: {str(e)}")
+
+
+@router.get("/estados", description="Receita, pedidos e ticket médio por estado do cliente")
+def receita_por_estado(
+    inicio: Optional[date] = Query(default=None, description="Data inicial (YYYY-MM-DD), inclusiva"),
+    fim: Optional[date] = Query(default=None, description="Data final (YYYY-MM-DD), inclusiva"),
+    incluir_cancelados: bool = Query(default=False),
+    session: Session = Depends(get_session)
+):
+    validar_intervalo(inicio, fim)
+    try:
+        with tempo_limite(session):
+            pedidos = func.sum(VendaDiariaEstado.pedidos)
+            receita = func.sum(VendaDiariaEstado.receita)
+            linhas = session.exec(
+                select(
+                    # Pedidos de clientes removidos saem com estado null
+                    func.nullif(VendaDiariaEstado.estado, SEM_ESTADO).label("estado"),
+                    pedidos.label("pedidos"),
+                    receita.label("receita"),
+                    (receita / func.nullif(pedidos, 0)).label("ticket_medio")
+                )
+                .where(*filtros_rollup(VendaDiariaEstado, inicio, fim, incluir_cancelados))
+                .group_by(VendaDiariaEstado.estado)
+                .having(pedidos > 0)
+                .order_by(desc("receita"))
+            ).all()
+        return [linha._asdict() for linha in linhas]
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar relatório por estado: {str(e)}")
+
+
+@router.get("/produtos/top", description="Produtos com maior receita no período")
+def top_produtos(
+    limite: int = Query(default=10, ge=1, le=100, description="Quantidade de produtos"),
+    inicio: Optional[date] = Query(default=None, description="Data inicial (YYYY-MM-DD), inclusiva"),
+    fim: Optional[date] = Query(default=None, description="Data final (YYYY-MM-DD), inclusiva"),
+    incluir_cancelados: bool = Query(default=False),
+    session: Session = Depends(get_session)
+):
+    validar_intervalo(inicio, fim)
+    try:
+        with tempo_limite(session):
+            receita = func.sum(VendaDiariaProduto.receita)
+            ranking = (
+                select(
+                    VendaDiariaProduto.produto_id,
+                    func.sum(VendaDiariaProduto.quantidade).label("quantidade"),
+                    receita.label("receita"),
+                    func.rank().over(order_by=receita.desc()).label("posicao")
+                )
+                .where(*filtros_rollup(VendaDiariaProduto, inicio, fim, incluir_cancelados))
+                .group_by(VendaDiariaProduto.produto_id)
+                .having(func.sum(VendaDiariaProduto.quantidade) > 0)
+                .subquery()
+            )
+            linhas = session.exec(
+                select(
+                    ranking.c.posicao,
+                    ranking.c.produto_id,
+                    Produto.nome,
+                    Produto.categoria,
+                    ranking.c.quantidade,
+                    ranking.c.receita
+                )
+                .join(Produto, Produto.id == ranking.c.produto_id)
+                .where(ranking.c.posicao <= limite)
+                .order_by(ranking.c.posicao, ranking.c.produto_id)
+            ).all()
+        return [linha._asdict() for linha in linhas]
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao gerar ranking de produtos: {str(e)}")
+
+
+@router.get("/ticket-medio", description="Quantidade de pedidos, receita e ticket médio no período")
+def ticket_medio(
+    inicio: Optional[date] = Query(default=None, description="Data inicial (YYYY-MM-DD), inclusiva"),
+    fim: Optional[date] = Query(default=None, description="Data final (YYYY-MM-DD), inclusiva"),
+    incluir_cancelados: bool = Query(default=False),
+    session: Session = Depends(get_session)
+):
+    validar_intervalo(inicio, fim)
+    try:
+        with tempo_limite(session):
+            pedidos = func.coalesce(func.sum(VendaDiariaEstado.pedidos), 0)
+            receita = func.coalesce(func.sum(VendaDiariaEstado.receita), 0)
+            linha = session.exec(
+                select(
+                    pedidos.label("pedidos"),
+                    receita.label("receita"),
+                    (receita / func.nullif(pedidos, 0)).label("ticket_medio")
+                )
+                .where(*filtros_rollup(VendaDiariaEstado, inicio, fim, incluir_cancelados))
+            ).one()
+        return linha._asdict()
+    except HTTPException as e:
+        raise e
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erro ao calcular ticket médio: {str(e)}")
@@ -0,0 +1,57 @@
+"""
+Entrypoint com vários processos (workers) do uvicorn.
+
+Antes de criar os workers, inicializa o banco uma única vez (tabelas, índices,
+status padrão e rollups) sob a trava de inicialização (Context.database) e
+marca BANCO_INICIALIZADO=1 para que os workers pulem essa etapa. Com mais de um
+worker e sem CACHE_URL, liga CACHE_SINCRONIZAR: cada worker tem os seus caches
+em memória e as invalidações passam de um para o outro pela tabela
+invalidacao_cache (Utils.invalidacao).
+
+O que continua por processo: os caches em memória (com o atraso de
+CACHE_SINCRONIA_MS entre workers), a fila do commit agrupado
+(Utils.fila_pedidos) e as métricas de GET /metrics e /cache/metricas, que
+mostram só o worker que atendeu a requisição. Os contadores e rollups ficam no
+banco e valem para todos. No SQLite os escritores dos vários processos se
+revezam pela trava do próprio banco: o driver só abre a transação no primeiro
+INSERT/UPDATE/DELETE, que espera a trava pelo busy_timeout (as gravações em
+lote já começam com BEGIN IMMEDIATE).
+
+Com gunicorn, use gunicorn.conf.py, que faz a mesma preparação.
+
+Uso (a partir da raiz do projeto):
+    python servidor.py --workers 4
+    python servidor.py --workers 4 --host 0.0.0.0 --port 8000
+    CACHE_URL=redis://localhost:6379/0 python servidor.py --workers 8
+"""
+import argparse
+import os
+
+import uvicorn
+
+
+def preparar_workers(workers: int):
+    # Roda no processo principal, antes de criar os workers
+    from Context.database import engine, inicializar_banco
+
+    inicializar_banco()
+    # Conexões abertas aqui não devem ser herdadas pelos workers
+    engine.dispose()
+    if workers > 1 and not os.getenv("CACHE_URL"):
+        os.environ.setdefault("CACHE_SINCRONIZAR", "true")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", 1)))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    preparar_workers(args.workers)
+    uvicorn.run("main:app", host=args.host, port=args.port, workers=args.workers, log_level=args.log_level)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Fixtures dos testes: o app roda sobre um banco SQLite temporário. DATABASE_URL
+é definido antes de importar o app, porque Context.database cria o engine na
+importação.
+"""
+import itertools
+import os
+import tempfile
+
+import pytest
+
+DIRETORIO = tempfile.mkdtemp(prefix="testes-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DIRETORIO, 'testes.db')}"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+sequencia = itertools.count(1)
+
+
+@pytest.fixture(scope="session")
+def http():
+    from main import app
+
+    with TestClient(app) as cliente_http:
+        yield cliente_http
+
+
+@pytest.fixture(scope="session")
+def engine(http):
+    from Context.database import engine as engine_app
+
+    return engine_app
+
+
+@pytest.fixture
+def criar_cliente(http):
+    def criar(estado: str = "SP") -> int:
+        numero = next(sequencia)
+        resposta = http.post("/clientes/", json={
+            "nome": f"Cliente {numero}", "data_nascimento": "1990-01-01", "email": f"cliente{numero}@email.com",
+            "telefone": "(11) 90000-0000", "endereco": "Rua A, 1", "cidade": "Cidade", "estado": estado,
+            "cep": "00000-000",
+        })
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()["id"]
+    return criar
+
+
+@pytest.fixture
+def criar_produto(http):
+    def criar(estoque: int = 100, preco: float = 10.0) -> int:
+        numero = next(sequencia)
+        resposta = http.post("/produtos/", json={
+            "nome": f"Produto {numero}", "categoria": "Testes", "preco": preco, "estoque": estoque,
+        })
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()["id"]
+    return criar
+
+
+@pytest.fixture
+def criar_pedido(http):
+    def criar(cliente_id: int, produto_id: int, quantidade: int = 1, preco: float = 10.0) -> int:
+        resposta = http.post("/pedidos/", json={
+            "cliente_id": cliente_id,
+            "itens": [{"produto_id": produto_id, "quantidade": quantidade, "preco_unitario": preco}],
+        })
+        assert resposta.status_code == 200, resposta.text
+        return resposta.json()["id"]
+    return criar
@@ -0,0 +1,39 @@
+from sqlmodel import Session
+
+from Utils.busca import criar_indices_busca, indexacao_suspensa
+
+
+def nomes_encontrados(http, termo: str) -> set:
+    resposta = http.get(f"/clientes/busca/{termo}")
+    assert resposta.status_code == 200, resposta.text
+    return {cliente["nome"] for cliente in resposta.json()}
+
+
+def test_escrita_durante_a_carga_e_indexada(http, engine, criar_cliente):
+    with Session(engine) as session:
+        with indexacao_suspensa(session, "cliente"):
+            cliente_id = criar_cliente()
+            assert http.put(f"/clientes/{cliente_id}", json={"nome": "Durante Carga"}).status_code == 200
+
+    assert "Durante Carga" in nomes_encontrados(http, "durante")
+
+
+def test_carga_interrompida_reindexa_no_startup(http, engine, criar_cliente):
+    session = Session(engine)
+    # Entra no bloco e não sai, como um processo que caiu no meio da carga (a
+    # referência mantém o gerador vivo: coletado, ele rodaria o finally)
+    suspensao = indexacao_suspensa(session, "cliente")
+    suspensao.__enter__()
+    cliente_id = criar_cliente()
+    assert http.put(f"/clientes/{cliente_id}", json={"nome": "Carga Interrompida"}).status_code == 200
+    session.close()
+    assert "Carga Interrompida" not in nomes_encontrados(http, "interrompida")
+
+    criar_indices_busca(engine)
+
+    assert "Carga Interrompida" in nomes_encontrados(http, "interrompida")
+    # Os triggers voltaram: escritas seguintes entram no índice
+    outro_id = criar_cliente()
+    assert http.put(f"/clientes/{outro_id}", json={"nome": "Depois Startup"}).status_code == 200
+    assert "Depois Startup" in nomes_encontrados(http, "depois")
+    del suspensao
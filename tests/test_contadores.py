@@ -0,0 +1,42 @@
+from sqlalchemy import delete
+from sqlmodel import Session, func, select
+
+from Models.models import Cliente, Contador, Produto
+from Utils.contadores import obter_contagem
+
+
+def invalidar(engine, tabela: str):
+    with Session(engine) as session:
+        session.exec(delete(Contador).where(Contador.tabela == tabela))
+        session.commit()
+
+
+def test_leitura_nao_confirma_a_sessao(http, engine):
+    invalidar(engine, "cliente")
+    with Session(engine) as session:
+        total = session.exec(select(func.count()).select_from(Cliente)).one()
+        session.add(Cliente(
+            nome="Pendente", data_nascimento="1990-01-01", email="pendente@email.com", telefone="(11) 0000-0000",
+            endereco="Rua C, 3", cidade="Cidade", estado="SP", cep="00000-000",
+        ))
+        assert obter_contagem(session, "cliente") == total
+        session.rollback()
+
+    with Session(engine) as session:
+        assert session.exec(select(Cliente).where(Cliente.nome == "Pendente")).first() is None
+        assert session.get(Contador, ("cliente", "*")).quantidade == total
+
+
+def test_incremento_com_contador_ausente(http, engine, criar_produto):
+    criar_produto()
+    invalidar(engine, "produto")
+    # O primeiro escritor materializa o contador já com a própria linha
+    criar_produto()
+    criar_produto()
+
+    with Session(engine) as session:
+        total = session.exec(select(func.count()).select_from(Produto)).one()
+        testes = session.exec(select(func.count()).select_from(Produto).where(Produto.categoria == "Testes")).one()
+        assert session.get(Contador, ("produto", "*")).quantidade == total
+        assert session.get(Contador, ("produto", "Testes")).quantidade == testes
+    assert http.get("/produtos/quantidade/").json() == {"Quantidade": total}
@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlmodel import Session
+
+from Models.models import Produto
+
+COMPRADORES = 40
+ESTOQUE = 5
+
+
+def test_compras_simultaneas_nao_vendem_acima_do_estoque(http, engine, criar_cliente, criar_produto):
+    cliente_id = criar_cliente()
+    produto_id = criar_produto(estoque=ESTOQUE)
+
+    def comprar(_) -> int:
+        return http.post("/pedidos/", json={
+            "cliente_id": cliente_id,
+            "itens": [{"produto_id": produto_id, "quantidade": 1, "preco_unitario": 10.0}],
+        }).status_code
+
+    # As rotas síncronas rodam no threadpool do app: os POSTs disputam o produto de verdade
+    with ThreadPoolExecutor(max_workers=COMPRADORES) as executor:
+        status = list(executor.map(comprar, range(COMPRADORES)))
+
+    assert set(status) <= {200, 400}, status
+    with Session(engine) as session:
+        estoque_final = session.get(Produto, produto_id).estoque
+    assert estoque_final >= 0
+    assert status.count(200) == ESTOQUE
+    assert estoque_final == 0
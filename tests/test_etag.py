@@ -0,0 +1,12 @@
+import pytest
+
+
+@pytest.mark.parametrize("rota", ["/produtos/?size=5&fields=id,nome", "/produtos/?after_id=0&size=5&fields=id,nome"])
+def test_lista_com_campos_tem_etag(http, criar_produto, rota):
+    criar_produto()
+    resposta = http.get(rota)
+    assert resposta.status_code == 200, resposta.text
+    etag = resposta.headers["ETag"]
+    assert resposta.headers["Cache-Control"].startswith("max-age=")
+
+    assert http.get(rota, headers={"If-None-Match": etag}).status_code == 304
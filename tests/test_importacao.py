@@ -0,0 +1,43 @@
+import csv
+import io
+
+from Models.models import Cliente
+
+COLUNAS = [campo for campo in Cliente.model_fields if campo != "id"]
+
+
+def csv_clientes(linhas: list[dict], colunas: list[str]) -> bytes:
+    texto = io.StringIO()
+    escritor = csv.DictWriter(texto, colunas, extrasaction="ignore")
+    escritor.writeheader()
+    escritor.writerows(linhas)
+    return texto.getvalue().encode()
+
+
+def importar(http, conteudo: bytes) -> dict:
+    resposta = http.post("/import/clientes", files={"arquivo": ("clientes.csv", conteudo, "text/csv")})
+    assert resposta.status_code == 200, resposta.text
+    return resposta.json()
+
+
+def test_csv_sem_coluna_id(http):
+    linha = {
+        "nome": "Importado Sem Id", "data_nascimento": "1990-01-01", "email": "importado.sem.id@email.com",
+        "telefone": "(11) 90000-0000", "endereco": "Rua A 1", "cidade": "Cidade", "estado": "SP", "cep": "00000-000",
+    }
+    relatorio = importar(http, csv_clientes([linha], COLUNAS))
+    assert relatorio["gravadas"] == 1, relatorio
+    assert relatorio["rejeitadas"] == 0
+
+
+def test_importacao_que_muda_o_estado_move_as_vendas(http, criar_cliente, criar_produto, criar_pedido):
+    cliente_id = criar_cliente("AP")
+    criar_pedido(cliente_id, criar_produto(), 2)
+    cliente = http.get(f"/clientes/{cliente_id}").json()
+
+    relatorio = importar(http, csv_clientes([{**cliente, "estado": "PI"}], ["id", *COLUNAS]))
+    assert relatorio["gravadas"] == 1, relatorio
+
+    estados = {linha["estado"] for linha in http.get("/relatorios/estados").json()}
+    assert "AP" not in estados
+    assert "PI" in estados
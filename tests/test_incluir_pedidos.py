@@ -0,0 +1,63 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlmodel import Session
+
+from Models.models import Cliente
+from Utils.respostas import CLIENTES_POR_CONSULTA
+
+
+@contextmanager
+def contar_comandos(engine):
+    comandos = []
+
+    def registrar(conexao, cursor, sql, parametros, contexto, executemany):
+        comandos.append(sql)
+
+    event.listen(engine, "before_cursor_execute", registrar)
+    try:
+        yield comandos
+    finally:
+        event.remove(engine, "before_cursor_execute", registrar)
+
+
+def test_comandos_nao_crescem_com_a_pagina(http, engine, criar_cliente, criar_produto, criar_pedido):
+    # ?include=pedidos não pode voltar a ser N+1: a lista de 2 e a de 20 clientes
+    # custam a mesma quantidade de comandos SQL
+    produto_id = criar_produto()
+    clientes = [criar_cliente("PE") for _ in range(20)]
+    for cliente_id in clientes:
+        criar_pedido(cliente_id, produto_id)
+        criar_pedido(cliente_id, produto_id)
+
+    contagens = {}
+    for size in (2, 20):
+        with contar_comandos(engine) as comandos:
+            resposta = http.get("/clientes/", params={"after_id": clientes[0] - 1, "size": size, "include": "pedidos"})
+        assert resposta.status_code == 200, resposta.text
+        itens = resposta.json()["items"]
+        assert len(itens) == size
+        assert all(len(cliente["pedidos"]["items"]) == 2 for cliente in itens)
+        contagens[size] = len(comandos)
+
+    assert contagens[2] == contagens[20]
+
+
+def test_estado_com_muitos_clientes(http, engine):
+    # Mais clientes que o limite de termos de um SELECT composto do SQLite (500)
+    quantidade = CLIENTES_POR_CONSULTA * 2 + 150
+    with Session(engine) as session:
+        session.add_all(
+            Cliente(
+                nome=f"Cliente TO {numero}", data_nascimento="1990-01-01", email=f"to{numero}@email.com",
+                telefone="(63) 90000-0000", endereco="Rua B, 2", cidade="Palmas", estado="TO", cep="77000-000",
+            )
+            for numero in range(quantidade)
+        )
+        session.commit()
+
+    with contar_comandos(engine) as comandos:
+        resposta = http.get("/clientes/clientes_por_estado/TO", params={"include": "pedidos"})
+    assert resposta.status_code == 200, resposta.text
+    assert len(resposta.json()) == quantidade
+    assert len([sql for sql in comandos if "UNION ALL" in sql]) == 3
@@ -0,0 +1,29 @@
+from sqlmodel import Session
+
+from Models.models import Produto
+
+
+def estoque(engine, produto_id: int) -> int:
+    with Session(engine) as session:
+        return session.get(Produto, produto_id).estoque
+
+
+def test_remover_pedido_ativo_devolve_estoque(http, engine, criar_cliente, criar_produto, criar_pedido):
+    cliente_id = criar_cliente()
+    produto_id = criar_produto(estoque=10)
+    pedido_id = criar_pedido(cliente_id, produto_id, quantidade=4)
+    assert estoque(engine, produto_id) == 6
+
+    assert http.delete(f"/pedidos/{pedido_id}").status_code == 200
+    assert estoque(engine, produto_id) == 10
+
+
+def test_remover_pedido_cancelado_nao_devolve_de_novo(http, engine, criar_cliente, criar_produto, criar_pedido):
+    cliente_id = criar_cliente()
+    produto_id = criar_produto(estoque=10)
+    pedido_id = criar_pedido(cliente_id, produto_id, quantidade=4)
+    assert http.put(f"/pedidos/{pedido_id}", json={"status": "Cancelado"}).status_code == 200
+    assert estoque(engine, produto_id) == 10
+
+    assert http.delete(f"/pedidos/{pedido_id}").status_code == 200
+    assert estoque(engine, produto_id) == 10
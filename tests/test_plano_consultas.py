@@ -0,0 +1,118 @@
+"""
+As consultas feitas pelas rotas GET usam índices: cada SELECT com WHERE passa
+por EXPLAIN QUERY PLAN e o teste falha se algum fizer SCAN de uma tabela
+inteira (SQLite).
+"""
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import delete, event
+from sqlmodel import Session, select
+
+from Models.models import Cliente, Contador, Produto
+from Utils.pedidos import obter_status_id, registrar_pedido
+
+# Consultas que ainda não têm como usar índice, com o motivo
+PENDENTES: dict[str, str] = {
+    "FROM status_pedido WHERE status_pedido.nome": "tabela com 4 linhas, lida uma vez e mantida em cache",
+}
+
+ROTAS = (
+    "/clientes/?size=5",
+    "/clientes/?after_id=1&size=5",
+    "/clientes/1",
+    "/clientes/quantidade/",
+    "/clientes/clientes_por_estado/CE",
+    "/clientes/busca/Plano 19",
+    "/produtos/?size=5",
+    "/produtos/?after_id=1&size=5",
+    "/produtos/1",
+    "/produtos/quantidade/",
+    "/produtos/categoria_qtd/Benchmark",
+    "/produtos/preco_maior_que/50",
+    "/produtos/busca/Plano 19",
+    "/produtos/1/disponibilidade?quantidade=1",
+    "/pedidos/?size=5",
+    "/pedidos/?after_id=1&size=5",
+    "/pedidos/1",
+    "/pedidos/cliente/1",
+    "/pedidos/1/itens",
+    "/pedidos/buscar-por-data?data={hoje:%d/%m/%Y}",
+    "/pedidos/periodo?inicio={hoje:%Y-%m-%d}&fim={hoje:%Y-%m-%d}&size=5",
+    "/pedidos/periodo?inicio={hoje:%Y-%m-%d}&fim={hoje:%Y-%m-%d}&cliente_id=3",
+    "/pedidos/periodo?inicio={hoje:%Y-%m-%d}&fim={hoje:%Y-%m-%d}&status=Pendente&size=5",
+    "/relatorios/receita?periodo=dia&inicio={hoje:%Y-%m-%d}&fim={hoje:%Y-%m-%d}",
+    "/relatorios/categorias?inicio={hoje:%Y-%m-%d}&fim={hoje:%Y-%m-%d}",
+    "/relatorios/estados?inicio={hoje:%Y-%m-%d}&fim={hoje:%Y-%m-%d}",
+    "/relatorios/produtos/top?inicio={hoje:%Y-%m-%d}&fim={hoje:%Y-%m-%d}",
+    "/relatorios/ticket-medio?inicio={hoje:%Y-%m-%d}&fim={hoje:%Y-%m-%d}",
+)
+
+ESTADOS = ("CE", "SP", "RJ", "MG", "BA", "PE", "RS", "PR", "SC", "GO", "PA", "AM", "MA", "PB", "RN")
+
+
+@pytest.fixture(scope="module")
+def banco_com_volume(engine):
+    with Session(engine) as session:
+        session.add_all(
+            Cliente(
+                nome=f"Plano {i}", data_nascimento="2000-01-01", email=f"plano{i}@email.com",
+                telefone="(00) 00000-0000", endereco="Rua B, 1", cidade="Fortaleza",
+                estado=ESTADOS[i % len(ESTADOS)], cep="60000-000"
+            ) for i in range(200)
+        )
+        session.add_all(
+            Produto(nome=f"Plano {i}", categoria="Benchmark" if i % 2 else "Outros", preco=i, estoque=10**6)
+            for i in range(200)
+        )
+        # Inseridos fora das rotas: os contadores são recalculados na próxima leitura
+        session.exec(delete(Contador).where(Contador.tabela.in_(["cliente", "produto"])))
+        session.commit()
+
+        clientes = session.exec(select(Cliente.id).where(Cliente.email.like("plano%"))).all()
+        produtos = session.exec(select(Produto.id).where(Produto.nome.like("Plano %"))).all()
+        status_id = obter_status_id(session, "Pendente")
+        # Volume suficiente para o planejador preferir os índices a varrer a tabela
+        for numero in range(2000):
+            registrar_pedido(
+                session, cliente_id=clientes[numero % 200], status_id=status_id,
+                itens=[
+                    {"produto_id": produtos[(numero + i) % 200], "quantidade": 1, "preco_unitario": 10.0}
+                    for i in range(3)
+                ]
+            )
+        session.commit()
+    with engine.begin() as conexao:
+        conexao.exec_driver_sql("ANALYZE")
+
+
+def tabelas_varridas(conexao, statement: str, parameters) -> list[str]:
+    plano = conexao.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    # Subconsultas (anon_N) já foram filtradas e agregadas; só tabelas contam
+    return [linha[-1] for linha in plano if re.match(r"SCAN (?!anon_)\w+$", linha[-1])]
+
+
+@pytest.mark.parametrize("rota", ROTAS)
+def test_consultas_da_rota_usam_indices(http, engine, banco_com_volume, rota):
+    consultas = []
+
+    def capturar(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and re.search(r"\bWHERE\b", statement, re.I):
+            consultas.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capturar)
+    try:
+        resposta = http.get(rota.format(hoje=date.today()))
+    finally:
+        event.remove(engine, "before_cursor_execute", capturar)
+    assert resposta.status_code == 200, resposta.text
+
+    sem_indice = []
+    with engine.connect() as conexao:
+        for statement, parameters in consultas:
+            scans = tabelas_varridas(conexao, statement, parameters)
+            sql = " ".join(statement.split())
+            if scans and not any(trecho in sql for trecho in PENDENTES):
+                sem_indice.append(f"{', '.join(scans)}: {sql[:400]}")
+    assert not sem_indice, "\n".join(sem_indice)
@@ -0,0 +1,31 @@
+from datetime import date
+
+from sqlalchemy import delete
+from sqlmodel import Session
+
+from Models.models import VendaDiariaEstado
+
+# Dias na virada do ano e a semana ISO 8601 de cada um
+SEMANAS = {
+    date(2032, 12, 31): "2032-W53",
+    date(2033, 1, 2): "2032-W53",
+    date(2033, 1, 3): "2033-W01",
+    date(2035, 12, 31): "2036-W01",
+}
+
+
+def test_semana_iso(http, engine):
+    with Session(engine) as session:
+        session.add_all(
+            VendaDiariaEstado(dia=dia, estado="ZZ", quantidade=1, receita=10.0, pedidos=1) for dia in SEMANAS
+        )
+        session.commit()
+    try:
+        resposta = http.get("/relatorios/receita?periodo=semana&inicio=2032-12-01&fim=2036-01-31")
+        assert resposta.status_code == 200, resposta.text
+        pedidos = {linha["periodo"]: linha["pedidos"] for linha in resposta.json()}
+        assert pedidos == {"2032-W53": 2, "2033-W01": 1, "2036-W01": 1}
+    finally:
+        with Session(engine) as session:
+            session.exec(delete(VendaDiariaEstado).where(VendaDiariaEstado.estado == "ZZ"))
+            session.commit()
@@ -0,0 +1,85 @@
+import csv
+import hashlib
+import io
+import os
+import shutil
+import zipfile
+
+import pytest
+
+from Models.models import Cliente, Produto
+from Utils.repositorio_csv import RepositorioCSV
+from Utils.utils import calcular_hash, compactar_csv, escrever_csv
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def copia(tmp_path):
+    def copiar(nome: str) -> str:
+        destino = tmp_path / nome
+        shutil.copyfile(os.path.join(RAIZ, nome), destino)
+        return str(destino)
+    return copiar
+
+
+def ler_bytes(caminho: str) -> bytes:
+    with open(caminho, "rb") as arquivo:
+        return arquivo.read()
+
+
+@pytest.mark.parametrize("nome, modelo", [("clientes.csv", Cliente), ("produtos.csv", Produto)])
+def test_abrir_nao_altera_o_arquivo(copia, nome, modelo):
+    caminho = copia(nome)
+    original = ler_bytes(caminho)
+
+    repo = RepositorioCSV(caminho, modelo)
+    registros = repo.listar()
+    assert registros and repo.contar() == len(registros)
+    assert repo.obter(registros[0].id) == registros[0]
+    calcular_hash(caminho)
+
+    assert ler_bytes(caminho) == original
+
+
+def test_primeira_escrita_converte(copia):
+    caminho = copia("produtos.csv")
+    repo = RepositorioCSV(caminho, Produto)
+    antes = repo.listar()
+    repo.inserir(Produto(nome="Novo", categoria="Eletrônicos", preco=1.0, estoque=1))
+
+    assert ler_bytes(caminho).splitlines()[0].endswith(b"_removido")
+    assert repo.listar()[:len(antes)] == antes
+
+
+def test_zip_e_hash_refletem_os_dados_vivos(tmp_path):
+    historico = str(tmp_path / "historico.csv")
+    repo = RepositorioCSV(historico, Produto)
+    for numero in range(5):
+        repo.inserir(Produto(nome=f"P{numero}", categoria="A", preco=1.0, estoque=numero))
+    repo.atualizar(2, Produto(nome="P1 novo", categoria="B", preco=2.0, estoque=9))
+    repo.remover(4)
+
+    conteudo = b"".join(repo.exportar())
+
+    linhas = list(csv.reader(io.StringIO(conteudo.decode("utf-8"))))
+    assert linhas[0] == list(Produto.model_fields)
+    assert [linha[0] for linha in linhas[1:]] == ["1", "2", "3", "5"]
+    assert linhas[2][1] == "P1 novo"
+
+    assert calcular_hash(historico) == hashlib.sha256(conteudo).hexdigest()
+    with zipfile.ZipFile(compactar_csv(historico)) as zf:
+        assert zf.read(zf.namelist()[0]) == conteudo
+
+
+def test_escrever_csv_usa_o_id_do_modelo(tmp_path):
+    caminho = str(tmp_path / "produtos.csv")
+    escrever_csv(caminho, Produto(id=7, nome="Sete", categoria="Testes", preco=7.0, estoque=7))
+    assert [produto.id for produto in RepositorioCSV(caminho, Produto).listar()] == [7]
+
+    with pytest.raises(ValueError):
+        escrever_csv(caminho, Produto(id=7, nome="Outro", categoria="Testes", preco=1.0, estoque=1))
+    assert RepositorioCSV(caminho, Produto).obter(7).nome == "Sete"
+
+    escrever_csv(caminho, Produto(nome="Oito", categoria="Testes", preco=8.0, estoque=8))
+    assert RepositorioCSV(caminho, Produto).obter(8).nome == "Oito"
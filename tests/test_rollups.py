@@ -0,0 +1,79 @@
+from sqlmodel import Session, select
+
+from Models.models import VendaDiariaEstado, VendaDiariaProduto
+from Utils.rollups import recalcular
+
+
+def rollups(engine) -> dict:
+    # Rollups sem as linhas zeradas, por tabela
+    with Session(engine) as session:
+        return {
+            modelo.__tablename__: sorted(
+                tuple(round(valor, 6) if isinstance(valor, float) else valor for valor in linha)
+                for linha in session.exec(
+                    select(*modelo.__table__.columns).where(modelo.pedidos != 0)
+                ).all()
+            )
+            for modelo in (VendaDiariaProduto, VendaDiariaEstado)
+        }
+
+
+def reconstruidos(engine) -> dict:
+    with Session(engine) as session:
+        recalcular(session)
+        session.flush()
+        resultado = {
+            modelo.__tablename__: sorted(
+                tuple(round(valor, 6) if isinstance(valor, float) else valor for valor in linha)
+                for linha in session.exec(
+                    select(*modelo.__table__.columns).where(modelo.pedidos != 0)
+                ).all()
+            )
+            for modelo in (VendaDiariaProduto, VendaDiariaEstado)
+        }
+        session.rollback()
+    return resultado
+
+
+def test_mudanca_de_estado_move_as_vendas(http, engine, criar_cliente, criar_produto, criar_pedido):
+    cliente_id = criar_cliente("AC")
+    produto_id = criar_produto()
+    pedido_antigo = criar_pedido(cliente_id, produto_id, 2)
+    criar_pedido(cliente_id, produto_id, 3)
+
+    cliente = http.get(f"/clientes/{cliente_id}").json()
+    assert http.put(f"/clientes/{cliente_id}", json={**cliente, "estado": "AM"}).status_code == 200
+    assert http.delete(f"/pedidos/{pedido_antigo}").status_code == 200
+
+    assert rollups(engine) == reconstruidos(engine)
+    estados = {linha["estado"] for linha in http.get("/relatorios/estados").json()}
+    assert "AC" not in estados
+
+
+def test_pedido_de_cliente_removido(http, engine, criar_cliente, criar_produto, criar_pedido):
+    cliente_id = criar_cliente("RR")
+    produto_id = criar_produto()
+    pedido_alterado = criar_pedido(cliente_id, produto_id)
+    pedido_removido = criar_pedido(cliente_id, produto_id)
+    assert http.delete(f"/clientes/{cliente_id}").status_code == 200
+
+    resposta = http.put(f"/pedidos/{pedido_alterado}", json={"status": "Cancelado"})
+    assert resposta.status_code == 200, resposta.text
+    resposta = http.delete(f"/pedidos/{pedido_removido}")
+    assert resposta.status_code == 200, resposta.text
+
+    assert rollups(engine) == reconstruidos(engine)
+
+
+def test_remover_cliente_nao_altera_a_receita(http, criar_cliente, criar_produto, criar_pedido):
+    cliente_id = criar_cliente("TO")
+    produto_id = criar_produto()
+    criar_pedido(cliente_id, produto_id, 2)
+    receita = http.get("/relatorios/receita").json()
+    ticket = http.get("/relatorios/ticket-medio").json()
+
+    assert http.delete(f"/clientes/{cliente_id}").status_code == 200
+    assert http.get("/relatorios/receita").json() == receita
+    assert http.get("/relatorios/ticket-medio").json() == ticket
+    estados = {linha["estado"]: linha["receita"] for linha in http.get("/relatorios/estados").json()}
+    assert estados[None] >= 20.0
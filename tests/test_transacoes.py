@@ -0,0 +1,61 @@
+import asyncio
+import sqlite3
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from Utils.transacoes import com_retentativas
+
+
+def banco_travado(falhas: int):
+    # Operação que falha com "database is locked" nas primeiras tentativas
+    tentativas = []
+
+    def operacao():
+        tentativas.append(1)
+        if len(tentativas) <= falhas:
+            raise OperationalError("UPDATE produto", {}, sqlite3.OperationalError("database is locked"))
+        return len(tentativas)
+    return operacao
+
+
+def test_retentativa_sincrona():
+    class SessaoFalsa:
+        def rollback(self):
+            pass
+
+    assert com_retentativas(SessaoFalsa(), banco_travado(2), espera_base=0.001) == 3
+
+
+def test_espera_nao_trava_o_event_loop(monkeypatch):
+    # Em DB_ASYNC o handler roda em run_sync, na thread do loop: durante a espera
+    # entre tentativas as outras tarefas precisam continuar rodando
+    pytest.importorskip("aiosqlite")
+    # Sem jitter: esperas de 0,05 + 0,1 + 0,2 s
+    monkeypatch.setattr("Utils.transacoes.random.uniform", lambda inicio, fim: fim)
+
+    async def cenario():
+        engine = create_async_engine("sqlite+aiosqlite://")
+        voltas = 0
+
+        async def outra_requisicao():
+            nonlocal voltas
+            while True:
+                await asyncio.sleep(0.005)
+                voltas += 1
+
+        tarefa = asyncio.create_task(outra_requisicao())
+        async with AsyncSession(engine) as session:
+            resultado = await session.run_sync(
+                lambda sync_session: com_retentativas(sync_session, banco_travado(3), espera_base=0.05)
+            )
+        tarefa.cancel()
+        await engine.dispose()
+        return resultado, voltas
+
+    resultado, voltas = asyncio.run(cenario())
+    assert resultado == 4
+    # Um time.sleep de 0,35 s na thread do loop deixaria a outra tarefa parada
+    assert voltas >= 20